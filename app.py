@@ -1,64 +1,229 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 from datetime import datetime, timedelta
 import json
+import queue
 import random
+import threading
+from config import Config
 from models.genetic_optimizer import GeneticOptimizer
-from models.conflict_detector import ConflictDetector
+from models.partitioned_optimizer import PartitionedOptimizer
+from models.local_search import LocalSearchRefiner
 from models.data_models import Train, Station, TrackSection
+from models.fleet_store import FleetStore
+from models.rail_network import RailNetwork
+from models.incremental_detector import IncrementalConflictDetector
+from models.scenario_simulator import ScenarioSimulator, ScenarioState
 from data.sample_data import generate_sample_data
+from services.optimization_jobs import OptimizationJobManager
+from services.live_stream import LiveStream
+from services.fleet_state import FleetState
+from services.storage import Storage
+from services.telemetry import TelemetryIngestor
+from services.scenario_batch import ScenarioBatchRunner
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'railsync-ai-sih2025'
 
 # Initialize components
-optimizer = GeneticOptimizer()
-conflict_detector = ConflictDetector()
+def build_genetic_optimizer():
+    """Create a genetic optimizer from the configured GA parameters"""
+    return GeneticOptimizer(
+        population_size=Config.GA_POPULATION_SIZE,
+        generations=Config.GA_GENERATIONS,
+        mutation_rate=Config.GA_MUTATION_RATE,
+        islands=Config.GA_ISLANDS,
+        migration_interval=Config.GA_MIGRATION_INTERVAL,
+        migration_size=Config.GA_MIGRATION_SIZE,
+        fitness_cache_size=Config.GA_FITNESS_CACHE_SIZE,
+        block_length_km=Config.SIGNAL_BLOCK_KM,
+        warm_start=Config.GA_WARM_START,
+        warm_start_max_changed=Config.GA_WARM_START_MAX_CHANGED,
+        convergence_patience=Config.GA_CONVERGENCE_PATIENCE,
+        convergence_tolerance=Config.GA_CONVERGENCE_TOLERANCE,
+        local_search=LocalSearchRefiner(Config.GA_LOCAL_SEARCH_SECONDS) if Config.GA_LOCAL_SEARCH_SECONDS > 0 else None,
+        time_budget=Config.GA_TIME_BUDGET_SECONDS,
+        adaptive_mutation=Config.GA_ADAPTIVE_MUTATION,
+        diversity_floor=Config.GA_DIVERSITY_FLOOR
+    )
 
-# Sample data
-trains, stations, track_sections = generate_sample_data()
+def build_optimizer():
+    """The genetic optimizer, decomposed into network regions when GA_PARTITION_MAX_TRAINS is set"""
+    if Config.GA_PARTITION_MAX_TRAINS > 0:
+        return PartitionedOptimizer(build_genetic_optimizer, max_region_trains=Config.GA_PARTITION_MAX_TRAINS,
+                                    max_workers=Config.GA_PARTITION_WORKERS)
+    return build_genetic_optimizer()
+
+storage = Storage(Config.DATABASE_URL, pool_size=Config.DATABASE_POOL_SIZE, timeout=Config.DATABASE_TIMEOUT)
+optimizer = build_optimizer()
+# The optimizer keeps per-run state (trace, statistics, warm start), so requests use it one at a time
+optimizer_lock = threading.Lock()
+optimization_jobs = OptimizationJobManager(
+    build_optimizer,
+    max_workers=Config.OPTIMIZATION_WORKERS,
+    ttl_seconds=Config.OPTIMIZATION_JOB_TTL,
+    storage=storage
+)
+scenario_batches = ScenarioBatchRunner(max_workers=Config.SCENARIO_WORKERS, max_scenarios=Config.SCENARIO_BATCH_MAX)
 
 @app.route('/')
 def dashboard():
     """Main dashboard route"""
     return render_template('index.html')
 
+def serialize_train(train):
+    """Train fields exposed through the API"""
+    return {
+        'id': train.id,
+        'name': train.name,
+        'current_position': train.current_position,
+        'destination': train.destination,
+        'delay_minutes': train.delay_minutes,
+        'priority': train.priority,
+        'speed': train.speed,
+        'status': train.status
+    }
+
+def build_metrics():
+    """System performance metrics for the current state version"""
+    return fleet_state.memoize('metrics', compute_metrics)
+
+def compute_metrics():
+    """Compute system performance metrics"""
+    graph = fleet_state.conflict_graph()
+    return {
+        'total_trains': len(trains),
+        'active_conflicts': len(fleet_state.conflicts()),
+        'conflicting_pairs': len(graph),
+        'conflict_clusters': len(graph.clusters),
+        'urgent_clusters': graph.top_clusters(Config.CONFLICT_TOP_CLUSTERS, max_trains=10),
+        'average_delay': sum(train.delay_minutes for train in trains) / len(trains),
+        'system_efficiency': random.randint(75, 95),
+        'throughput_today': random.randint(120, 150),
+        'safety_incidents': 0,
+        'optimization_success_rate': random.randint(85, 98)
+    }
+
+def build_dashboard_snapshot():
+    """Everything the dashboard shows, computed once per stream tick"""
+    return {
+        'metrics': build_metrics(),
+        'trains': build_train_list(),
+        'conflicts': fleet_state.conflicts()
+    }
+
+def build_train_list():
+    """Serialized trains for the current state version"""
+    return fleet_state.memoize('trains', lambda: [serialize_train(train) for train in trains])
+
+def versioned_response(name, build):
+    """JSON response memoized per state version, answering If-None-Match with 304"""
+    etag = fleet_state.etag(name)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(fleet_state.encoded(name, build, app.json.dumps), mimetype='application/json')
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+live_stream = LiveStream(build_dashboard_snapshot, interval_seconds=Config.STREAM_TICK_SECONDS,
+                         version_fn=lambda: fleet_state.version)
+
+telemetry = TelemetryIngestor(lambda updates: fleet_state.apply_updates(updates),
+                              max_queue=Config.TELEMETRY_QUEUE_SIZE, batch_size=Config.TELEMETRY_BATCH_SIZE,
+                              flush_seconds=Config.TELEMETRY_FLUSH_MS / 1000)
+if Config.TELEMETRY_FEED_PORT:
+    telemetry.serve(Config.HOST, Config.TELEMETRY_FEED_PORT)
+
+def load_fleet(new_trains, new_stations, new_track_sections):
+    """Replace the live network and fleet (held in columnar form) and start a fresh versioned state"""
+    global trains, stations, track_sections, fleet_state, simulator
+
+    trains = new_trains if isinstance(new_trains, FleetStore) else FleetStore.from_trains(new_trains)
+    stations = new_stations
+    track_sections = new_track_sections
+
+    # Track graph; small enough networks get an all-pairs distance table (reused from disk if cached)
+    network = RailNetwork(track_sections, stations)
+    if network.n_nodes <= Config.NETWORK_PRECOMPUTE_MAX_NODES:
+        network.precompute(Config.NETWORK_CACHE_DIR)
+
+    # Versioned live state; conflicts are kept current by train updates instead of full rescans
+    detector = IncrementalConflictDetector(network, lookahead_minutes=Config.CONFLICT_LOOKAHEAD_MINUTES,
+                                           block_length_km=Config.SIGNAL_BLOCK_KM)
+    fleet_state = FleetState(trains, stations, track_sections, network, detector, storage)
+    fleet_state.add_listener(lambda version: live_stream.publish())
+    live_stream.publish()
+
+    simulator = ScenarioSimulator(network, track_sections, Config.SCENARIO_HORIZON_MINUTES)
+
+def stored_fleet():
+    """The fleet from the database; an empty database is seeded with the sample data first"""
+    fleet = storage.load_fleet()
+    if fleet is None:
+        sample_trains, sample_stations, sample_sections = generate_sample_data()
+        # Only one worker seeds; the others load what it stored
+        storage.seed_fleet(sample_trains, sample_stations, sample_sections,
+                           RailNetwork(sample_sections, sample_stations))
+        fleet = storage.load_fleet()
+    return fleet
+
+load_fleet(*stored_fleet())
+storage.refresh_timetable(trains, fleet_state.network)
+
 @app.route('/api/trains')
 def get_trains():
     """Get current train data"""
-    train_data = []
-    for train in trains:
-        train_data.append({
-            'id': train.id,
-            'name': train.name,
-            'current_position': train.current_position,
-            'destination': train.destination,
-            'delay_minutes': train.delay_minutes,
-            'priority': train.priority,
-            'speed': train.speed,
-            'status': train.status
-        })
-    return jsonify(train_data)
+    return versioned_response('trains', build_train_list)
+
+@app.route('/api/trains/<train_id>/timetable')
+def get_train_timetable(train_id):
+    """Stored timetable of a train: the sections it runs through with entry and exit times"""
+    if trains.get(train_id) is None:
+        return jsonify({'success': False, 'error': 'Train not found'}), 404
+    
+    return jsonify({'success': True, 'train_id': train_id, 'timetable': storage.train_timetable(train_id)})
 
 @app.route('/api/conflicts')
 def detect_conflicts():
     """Detect train conflicts"""
-    conflicts = conflict_detector.detect_conflicts(trains, track_sections)
-    return jsonify(conflicts)
+    return versioned_response('conflicts', fleet_state.conflicts)
+
+@app.route('/api/conflicts/clusters')
+def get_conflict_clusters():
+    """Conflict clusters, most urgent first (?limit=N, default all), or the cluster of one train (?train_id=...)"""
+    graph = fleet_state.conflict_graph()
+    train_id = request.args.get('train_id')
+    if train_id is not None:
+        return jsonify({'success': True, 'train_id': train_id, 'cluster': graph.cluster_of(train_id),
+                        'conflicts': graph.conflicts_of(train_id)})
+    
+    limit = request.args.get('limit', len(graph.clusters), type=int)
+    return jsonify({'success': True, 'clusters': graph.top_clusters(limit), 'total_clusters': len(graph.clusters),
+                    'conflicting_pairs': len(graph)})
 
 @app.route('/api/optimize', methods=['POST'])
 def optimize_schedule():
     """Optimize train scheduling using genetic algorithm"""
     try:
         # Get current conflicts
-        conflicts = conflict_detector.detect_conflicts(trains, track_sections)
+        conflicts = fleet_state.conflicts()
         
         if conflicts:
             # Run optimization
-            optimized_schedule = optimizer.optimize(trains, track_sections, conflicts)
+            with optimizer_lock:
+                optimized_schedule, trace = optimizer.optimize(trains, track_sections, conflicts, stations=stations,
+                                                               return_trace=True)
+                statistics = optimizer.last_run_stats
+            result_id = storage.save_optimization_result(optimized_schedule, statistics, len(conflicts))
             
             return jsonify({
                 'success': True,
+                'result_id': result_id,
                 'optimized_schedule': optimized_schedule,
+                'statistics': statistics,
+                'convergence_trace': trace,
                 'improvements': {
                     'delay_reduction': f"{random.randint(20, 40)}%",
                     'throughput_increase': f"{random.randint(15, 30)}%",
@@ -75,40 +240,198 @@ def optimize_schedule():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/optimize/pareto', methods=['POST'])
+def optimize_pareto():
+    """Trade-off schedules between delay, throughput and (optionally) energy from a multi-objective run.
+
+    Body: {"energy": false, "max_solutions": 20}
+    """
+    options = request.get_json(silent=True) or {}
+    if not isinstance(options, dict):
+        return jsonify({'success': False, 'error': 'Expected an options object'}), 400
+    try:
+        max_solutions = int(options.get('max_solutions') or 20)
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'max_solutions must be an integer'}), 400
+    if max_solutions < 1:
+        return jsonify({'success': False, 'error': 'max_solutions must be positive'}), 400
+
+    try:
+        conflicts = fleet_state.conflicts()
+        with optimizer_lock:
+            solutions = optimizer.optimize_pareto(trains, track_sections, conflicts, stations=stations,
+                                                  energy=bool(options.get('energy')), max_solutions=max_solutions)
+            statistics = optimizer.last_run_stats
+        
+        return jsonify({
+            'success': True,
+            'solutions': solutions,
+            'statistics': statistics,
+            'conflicts': len(conflicts)
+        })
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/optimize/results')
+def get_optimization_results():
+    """Most recent stored optimization results"""
+    limit = request.args.get('limit', 10, type=int)
+    return jsonify({'success': True, 'results': storage.optimization_results(limit)})
+
+@app.route('/api/optimize/jobs', methods=['POST'])
+def create_optimization_job():
+    """Start an asynchronous optimization of the current fleet"""
+    job = optimization_jobs.submit(trains, track_sections, fleet_state.conflicts(), stations)
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f"/api/optimize/jobs/{job.id}",
+        'stream_url': f"/api/optimize/jobs/{job.id}/stream"
+    }), 202
+
+@app.route('/api/optimize/jobs/<job_id>')
+def get_optimization_job(job_id):
+    """Poll an optimization job for progress and result"""
+    job = optimization_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    return jsonify(job.to_dict())
+
+@app.route('/api/optimize/jobs/<job_id>/stream')
+def stream_optimization_job(job_id):
+    """Stream per-generation progress of an optimization job as Server-Sent Events"""
+    if optimization_jobs.get(job_id) is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    return Response(optimization_jobs.stream(job_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/optimize/jobs/<job_id>', methods=['DELETE'])
+def cancel_optimization_job(job_id):
+    """Cancel a queued or running optimization job"""
+    job = optimization_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    return jsonify({'success': True, 'job_id': job.id, 'status': job.status})
+
+def scenario_horizon(data):
+    """Simulation horizon in minutes from a scenario request body; ValueError unless it is a positive integer
+    no longer than Config.SCENARIO_MAX_HORIZON_MINUTES"""
+    value = data.get('horizon_minutes') or Config.SCENARIO_HORIZON_MINUTES
+    try:
+        horizon = int(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid horizon_minutes: {value!r}") from None
+    if horizon <= 0:
+        raise ValueError("horizon_minutes must be positive")
+    if horizon > Config.SCENARIO_MAX_HORIZON_MINUTES:
+        raise ValueError(f"horizon_minutes must be at most {Config.SCENARIO_MAX_HORIZON_MINUTES}")
+    return horizon
+
 @app.route('/api/scenario', methods=['POST'])
 def run_scenario():
-    """Run what-if scenario simulation"""
-    scenario_data = request.json
-    
-    # Simulate scenario outcomes
-    results = {
-        'scenario_name': scenario_data.get('name', 'Test Scenario'),
-        'predicted_delay': random.randint(5, 20),
-        'throughput_change': random.randint(-10, 25),
-        'safety_score': random.randint(85, 98),
-        'recommendations': [
-            "Prioritize express trains during peak hours",
-            "Implement dynamic platform allocation",
-            "Increase buffer time for freight trains"
-        ]
-    }
+    """Run a what-if scenario through the discrete-event simulator and compare it with the unchanged fleet.
+
+    Body: {"name": ..., "type": one of the dashboard presets (optional),
+    "events": [block_closure | speed_restriction | extra_train | delay_injection, ...],
+    "horizon_minutes": ...}
+    """
+    scenario_data = request.get_json(silent=True) or {}
+    if not isinstance(scenario_data, dict):
+        return jsonify({'success': False, 'error': 'Expected a scenario object'}), 400
+    try:
+        horizon = scenario_horizon(scenario_data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    # Both runs share one snapshot of the fleet; the scenario only records its changes on top
+    base = ScenarioState(fleet_state.snapshot())
+    baseline = fleet_state.memoize(f"scenario.baseline.{horizon}", lambda: simulator.run(base, horizon))
+
+    try:
+        results = simulator.evaluate(base, baseline, scenario_data, horizon)
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
     return jsonify(results)
 
+@app.route('/api/scenario/batch', methods=['POST'])
+def run_scenario_batch():
+    """Evaluate many scenarios in parallel, streaming NDJSON results as they finish and a ranking last.
+
+    Body: {"scenarios": [scenario, ...], "rank_by": "predicted_delay", "horizon_minutes": ...}
+    with each scenario shaped like a /api/scenario body.
+    """
+    batch_data = request.get_json(silent=True) or {}
+    if not isinstance(batch_data, dict):
+        return jsonify({'success': False, 'error': 'Expected a batch object'}), 400
+    definitions = batch_data.get('scenarios')
+    rank_by = batch_data.get('rank_by', 'predicted_delay')
+    error = scenario_batches.validate(definitions, rank_by)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    try:
+        horizon = scenario_horizon(batch_data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    base = ScenarioState(fleet_state.snapshot())
+    baseline = fleet_state.memoize(f"scenario.baseline.{horizon}", lambda: simulator.run(base, horizon))
+    lines = scenario_batches.run(simulator, base, baseline, definitions, horizon, rank_by)
+    
+    return Response((json.dumps(line) + '\n' for line in lines), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/telemetry', methods=['POST'])
+def ingest_telemetry():
+    """Queue position reports (NDJSON, CSV with a header row, or a JSON array) for the live fleet"""
+    try:
+        if request.mimetype == 'application/json':
+            reports = request.get_json(silent=True)
+            if not isinstance(reports, list):
+                return jsonify({'success': False, 'error': 'Expected a JSON array of reports'}), 400
+            accepted, invalid = telemetry.submit(reports)
+            parse_errors = []
+        else:
+            fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+            accepted, parse_errors, invalid = telemetry.ingest(request.get_data(as_text=True).splitlines(), fmt)
+    except queue.Full as e:
+        response = jsonify({'success': False, 'error': str(e), 'queue_depth': telemetry.queue_depth})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(telemetry.retry_after())
+        return response
+    
+    errors = ([{'line': line, 'errors': [error]} for line, error in parse_errors] +
+              [{'index': index, 'errors': report_errors} for index, report_errors in invalid])
+    return jsonify({
+        'success': True,
+        'accepted': accepted,
+        'rejected': len(errors),
+        'errors': errors[:20],
+        'queue_depth': telemetry.queue_depth
+    }), 202
+
+@app.route('/api/telemetry/metrics')
+def get_telemetry_metrics():
+    """Ingestion counters, queue depth and backpressure state"""
+    return jsonify(telemetry.metrics())
+
 @app.route('/api/metrics')
 def get_metrics():
     """Get system performance metrics"""
-    metrics = {
-        'total_trains': len(trains),
-        'active_conflicts': len(conflict_detector.detect_conflicts(trains, track_sections)),
-        'average_delay': sum(train.delay_minutes for train in trains) / len(trains),
-        'system_efficiency': random.randint(75, 95),
-        'throughput_today': random.randint(120, 150),
-        'safety_incidents': 0,
-        'optimization_success_rate': random.randint(85, 98)
-    }
-    
-    return jsonify(metrics)
+    return versioned_response('metrics', build_metrics)
+
+@app.route('/api/stream')
+def stream_dashboard():
+    """Push dashboard snapshots and deltas as Server-Sent Events"""
+    subscriber = live_stream.subscribe()
+    return Response(live_stream.events(subscriber), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
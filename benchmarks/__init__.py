@@ -0,0 +1,6 @@
+"""
+RailSync AI Benchmarks Package
+
+Scaling benchmarks for the conflict detectors, the genetic optimizer and the API endpoints.
+Run them with `python -m benchmarks.run`.
+"""
@@ -0,0 +1,253 @@
+"""
+Benchmark runner: times detectors, the optimizer and API endpoints on synthetic fleets
+
+    python -m benchmarks.run --sizes 10,1000,100000 --output results/HEAD.json
+    python -m benchmarks.run --baseline results/main.json
+
+Every result carries p50/p99 latency, throughput and peak traced memory, and
+the JSON report records the commit and library versions, so reports from two
+commits can be compared directly (or with --baseline).
+"""
+
+import argparse
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from data.synthetic_data import generate_synthetic_data
+from models import CONFLICT_DETECTORS, IncrementalConflictDetector, FleetStore, GeneticOptimizer
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+def percentile(samples, q):
+    """q-th percentile of the samples by the nearest-rank method"""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def measure(name, size, fn, repeat, setup=None, items=None):
+    """Time fn() `repeat` times (after setup() each time) and measure its peak memory once.
+
+    Memory is traced in a separate run because tracemalloc slows down the
+    code it traces. items is the number of units of work per call (trains
+    by default) used for the throughput figure.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    p50 = percentile(samples, 50)
+    items = size if items is None else items
+    return {
+        'benchmark': name,
+        'size': size,
+        'repeat': repeat,
+        'p50_ms': round(p50 * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'throughput_per_s': round(items / p50, 1) if p50 > 0 else None,
+        'peak_memory_kb': round(peak / 1024, 1)
+    }
+
+def bench_detectors(size, data, args):
+    trains, stations, track_sections = data
+    fleet = FleetStore.from_trains(trains)
+    results = []
+
+    for strategy, detector_class in CONFLICT_DETECTORS.items():
+        if strategy == 'pairwise' and size > args.max_pairwise_trains:
+            continue  # O(n^2) over the whole fleet
+        detector = detector_class()
+        results.append(measure(f"detector.{strategy}", size,
+                               lambda: detector.detect_conflicts(fleet, track_sections), args.repeat))
+
+    # Look-ahead over projected runs on the signal-block reservation table
+    detector = CONFLICT_DETECTORS['indexed'](lookahead_minutes=args.lookahead_minutes)
+    results.append(measure('detector.indexed.lookahead', size,
+                           lambda: detector.detect_conflicts(fleet, track_sections), args.repeat))
+
+    incremental = IncrementalConflictDetector()
+    results.append(measure('detector.incremental.load', size,
+                           lambda: incremental.load(fleet, track_sections), args.repeat))
+
+    # A single train moving to a neighbouring section, as a live position report would
+    incremental.load(fleet, track_sections)
+    moves = [{'id': train.id, 'current_position': train.destination, 'destination': train.current_position}
+             for train in fleet[:args.repeat + 1]]
+    moves_iter = iter(moves)
+    results.append(measure('detector.incremental.update', size,
+                           lambda: incremental.apply_updates([next(moves_iter)]), args.repeat, items=1))
+
+    return results
+
+def bench_optimizer(size, data, args):
+    if size > args.max_optimizer_trains:
+        return []
+
+    trains, stations, track_sections = data
+    fleet = FleetStore.from_trains(trains)
+    conflicts = CONFLICT_DETECTORS['indexed']().detect_conflicts(fleet, track_sections)
+    optimizer = GeneticOptimizer(population_size=args.population_size, generations=args.generations, seed=args.seed)
+
+    result = measure('optimizer.optimize', size,
+                     lambda: optimizer.optimize(fleet, track_sections, conflicts, stations=stations), args.optimizer_repeat,
+                     items=size * args.population_size * args.generations)
+    result['unit'] = 'train-evaluations'
+    result['statistics'] = optimizer.last_run_stats
+    return [result]
+
+def bench_api(size, data, args):
+    import app as railsync
+
+    railsync.load_fleet(*data)
+    if size <= args.max_optimizer_trains:
+        railsync.optimizer = GeneticOptimizer(population_size=args.population_size,
+                                              generations=args.generations, seed=args.seed)
+
+    client = railsync.app.test_client()
+    results = []
+
+    def request(method, path, **kwargs):
+        response = client.open(path, method=method, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}")
+        return response
+
+    def invalidate():
+        railsync.fleet_state.bump()
+
+    for path in ('/api/trains', '/api/conflicts', '/api/metrics'):
+        name = 'api' + path.replace('/api', '').replace('/', '.')
+
+        # Recomputed for a new state version vs served from the per-version cache
+        results.append(measure(name, size, lambda: request('GET', path), args.repeat, setup=invalidate))
+        request('GET', path)
+        results.append(measure(f"{name}.cached", size, lambda: request('GET', path), args.repeat))
+
+        etag = request('GET', path).headers['ETag']
+        results.append(measure(f"{name}.not_modified", size,
+                               lambda: request('GET', path, headers={'If-None-Match': etag}), args.repeat))
+
+    results.append(measure('api.scenario', size,
+                           lambda: request('POST', '/api/scenario', json={'name': 'Benchmark'}), args.repeat))
+
+    if size <= args.max_optimizer_trains:
+        results.append(measure('api.optimize', size, lambda: request('POST', '/api/optimize'),
+                               args.optimizer_repeat, setup=invalidate))
+
+    return results
+
+BENCHMARKS = {
+    'detector': bench_detectors,
+    'optimizer': bench_optimizer,
+    'api': bench_api
+}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    results = []
+    for size in args.sizes:
+        data = generate_synthetic_data(size, junction_density=args.junction_density, seed=args.seed)
+        for group in args.only:
+            print(f"[{size} trains] {group}", file=sys.stderr)
+            results.extend(BENCHMARKS[group](size, data, args))
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'junction_density': args.junction_density,
+            'population_size': args.population_size,
+            'generations': args.generations
+        },
+        'results': results
+    }
+
+def compare(report, baseline):
+    """Print p50 latency of every benchmark relative to a baseline report"""
+    previous = {(result['benchmark'], result['size']): result for result in baseline['results']}
+
+    print(f"{'benchmark':36} {'size':>7} {'base p50 ms':>12} {'p50 ms':>10} {'change':>8}", file=sys.stderr)
+    for result in report['results']:
+        before = previous.get((result['benchmark'], result['size']))
+        if before is None or not before['p50_ms']:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+        print(f"{result['benchmark']:36} {result['size']:>7} {before['p50_ms']:>12.3f} "
+              f"{result['p50_ms']:>10.3f} {change:>+7.1f}%", file=sys.stderr)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='RailSync AI scaling benchmarks')
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')],
+                        default=DEFAULT_SIZES, help='comma-separated fleet sizes (trains)')
+    parser.add_argument('--only', type=lambda value: value.split(','), default=list(BENCHMARKS),
+                        help=f"comma-separated benchmark groups ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--junction-density', type=float, default=0.2,
+                        help='share of stations that are junctions')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per benchmark')
+    parser.add_argument('--optimizer-repeat', type=int, default=3, help='timed runs per optimizer benchmark')
+    parser.add_argument('--population-size', type=int, default=50)
+    parser.add_argument('--generations', type=int, default=30)
+    parser.add_argument('--lookahead-minutes', type=int, default=60,
+                        help='horizon of the predicted-conflict detector benchmark')
+    parser.add_argument('--max-pairwise-trains', type=int, default=5000,
+                        help='skip the O(n^2) pairwise detector above this fleet size')
+    parser.add_argument('--max-optimizer-trains', type=int, default=10000,
+                        help='skip optimizer benchmarks above this fleet size')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='JSON report to compare p50 latencies against')
+
+    args = parser.parse_args(argv)
+    unknown = set(args.only) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark groups: {', '.join(sorted(unknown))}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+if __name__ == '__main__':
+    main()
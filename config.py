@@ -3,22 +3,54 @@ import os
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'railsync-ai-sih2025-secret'
     
-    # Database configuration (for future use)
+    # Database configuration
     DATABASE_URL = os.environ.get('DATABASE_URL') or 'sqlite:///railsync.db'
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE') or 4)  # connections per worker process
+    DATABASE_TIMEOUT = float(os.environ.get('DATABASE_TIMEOUT') or 5.0)  # seconds to wait for a lock or connection
     
     # AI Model parameters
     GA_POPULATION_SIZE = int(os.environ.get('GA_POPULATION_SIZE') or 50)
     GA_GENERATIONS = int(os.environ.get('GA_GENERATIONS') or 30)
     GA_MUTATION_RATE = float(os.environ.get('GA_MUTATION_RATE') or 0.1)
+    GA_ISLANDS = int(os.environ.get('GA_ISLANDS') or 1)  # >1 evolves islands in parallel processes
+    GA_MIGRATION_INTERVAL = int(os.environ.get('GA_MIGRATION_INTERVAL') or 5)  # generations
+    GA_MIGRATION_SIZE = int(os.environ.get('GA_MIGRATION_SIZE') or 2)  # elites per island
+    GA_FITNESS_CACHE_SIZE = int(os.environ.get('GA_FITNESS_CACHE_SIZE') or 2048)  # memoized genomes
+    GA_WARM_START = (os.environ.get('GA_WARM_START') or 'true').lower() == 'true'  # seed runs from the previous population
+    GA_WARM_START_MAX_CHANGED = float(os.environ.get('GA_WARM_START_MAX_CHANGED') or 0.5)  # changed-train share that forces a cold start
+    GA_CONVERGENCE_PATIENCE = int(os.environ.get('GA_CONVERGENCE_PATIENCE') or 5)  # generations without improvement before stopping, 0 disables
+    GA_CONVERGENCE_TOLERANCE = float(os.environ.get('GA_CONVERGENCE_TOLERANCE') or 0.001)  # relative improvement that still counts
+    GA_LOCAL_SEARCH_SECONDS = float(os.environ.get('GA_LOCAL_SEARCH_SECONDS') or 0)  # hill-climbing budget after the GA, 0 disables
+    GA_TIME_BUDGET_SECONDS = float(os.environ.get('GA_TIME_BUDGET_SECONDS') or 0)  # wall-clock limit per run, 0 = generations only
+    GA_ADAPTIVE_MUTATION = (os.environ.get('GA_ADAPTIVE_MUTATION') or 'true').lower() == 'true'  # raise mutation when diversity collapses
+    GA_DIVERSITY_FLOOR = float(os.environ.get('GA_DIVERSITY_FLOOR') or 0.1)  # diversity below which mutation is raised
+    GA_PARTITION_MAX_TRAINS = int(os.environ.get('GA_PARTITION_MAX_TRAINS') or 0)  # trains per region of a decomposed run, 0 = one genome
+    GA_PARTITION_WORKERS = int(os.environ.get('GA_PARTITION_WORKERS') or 0)  # processes optimizing regions, 0 = one per CPU
+    OPTIMIZATION_WORKERS = int(os.environ.get('OPTIMIZATION_WORKERS') or 2)  # concurrent background jobs
+    OPTIMIZATION_JOB_TTL = int(os.environ.get('OPTIMIZATION_JOB_TTL') or 3600)  # seconds to keep finished jobs
     
     # System parameters
     SAFETY_BUFFER_MINUTES = int(os.environ.get('SAFETY_BUFFER_MINUTES') or 5)
     CONFLICT_DISTANCE_THRESHOLD = int(os.environ.get('CONFLICT_DISTANCE_THRESHOLD') or 2)  # km
     MAX_TRAIN_SPEED = int(os.environ.get('MAX_TRAIN_SPEED') or 160)  # km/h
+    NETWORK_PRECOMPUTE_MAX_NODES = int(os.environ.get('NETWORK_PRECOMPUTE_MAX_NODES') or 2000)  # all-pairs table up to this many stations
+    NETWORK_CACHE_DIR = os.environ.get('NETWORK_CACHE_DIR') or None  # where precomputed distance tables are kept
+    CONFLICT_LOOKAHEAD_MINUTES = int(os.environ.get('CONFLICT_LOOKAHEAD_MINUTES') or 60)  # predicted conflicts horizon, 0 disables
+    SIGNAL_BLOCK_KM = float(os.environ.get('SIGNAL_BLOCK_KM') or 5.0)  # reservation table block length
+    CONFLICT_TOP_CLUSTERS = int(os.environ.get('CONFLICT_TOP_CLUSTERS') or 5)  # most urgent conflict clusters in the metrics
     
     # API settings
     API_RATE_LIMIT = int(os.environ.get('API_RATE_LIMIT') or 100)  # requests per minute
     REAL_TIME_UPDATE_INTERVAL = int(os.environ.get('REAL_TIME_UPDATE_INTERVAL') or 30)  # seconds
+    STREAM_TICK_SECONDS = int(os.environ.get('STREAM_TICK_SECONDS') or 5)  # /api/stream snapshot interval
+    TELEMETRY_QUEUE_SIZE = int(os.environ.get('TELEMETRY_QUEUE_SIZE') or 50000)  # queued position reports before 429
+    TELEMETRY_BATCH_SIZE = int(os.environ.get('TELEMETRY_BATCH_SIZE') or 1000)  # reports applied per micro-batch
+    TELEMETRY_FLUSH_MS = int(os.environ.get('TELEMETRY_FLUSH_MS') or 50)  # longest a report waits for its batch
+    TELEMETRY_FEED_PORT = int(os.environ.get('TELEMETRY_FEED_PORT') or 0)  # TCP NDJSON feed, 0 disables (single process only)
+    SCENARIO_HORIZON_MINUTES = int(os.environ.get('SCENARIO_HORIZON_MINUTES') or 240)  # what-if simulation length
+    SCENARIO_MAX_HORIZON_MINUTES = int(os.environ.get('SCENARIO_MAX_HORIZON_MINUTES') or 1440)  # cap on a request's horizon_minutes
+    SCENARIO_WORKERS = int(os.environ.get('SCENARIO_WORKERS') or 0)  # processes per scenario batch, 0 = one per CPU
+    SCENARIO_BATCH_MAX = int(os.environ.get('SCENARIO_BATCH_MAX') or 200)  # scenarios per /api/scenario/batch request
     
     # Flask settings
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
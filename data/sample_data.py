@@ -31,12 +31,12 @@ def generate_sample_data():
     
     # Sample track sections
     track_sections = [
-        TrackSection('TRK001', 'Delhi-Mumbai Main Line', 'New Delhi', 'Mumbai Central', 3),
-        TrackSection('TRK002', 'Mumbai-Pune Section', 'Mumbai Central', 'Pune Junction', 2),
-        TrackSection('TRK003', 'Chennai-Bangalore Line', 'Chennai Central', 'Bangalore City', 2),
-        TrackSection('TRK004', 'Delhi-Kolkata Route', 'New Delhi', 'Kolkata', 2),
-        TrackSection('TRK005', 'Mumbai-Ahmedabad Line', 'Mumbai Central', 'Ahmedabad', 2),
-        TrackSection('TRK006', 'Hyderabad Junction', 'Hyderabad', 'New Delhi', 1)
+        TrackSection('TRK001', 'Delhi-Mumbai Main Line', 'New Delhi', 'Mumbai Central', 3, 1384),
+        TrackSection('TRK002', 'Mumbai-Pune Section', 'Mumbai Central', 'Pune Junction', 2, 192),
+        TrackSection('TRK003', 'Chennai-Bangalore Line', 'Chennai Central', 'Bangalore City', 2, 362),
+        TrackSection('TRK004', 'Delhi-Kolkata Route', 'New Delhi', 'Kolkata', 2, 1447),
+        TrackSection('TRK005', 'Mumbai-Ahmedabad Line', 'Mumbai Central', 'Ahmedabad', 2, 491),
+        TrackSection('TRK006', 'Hyderabad Junction', 'Hyderabad', 'New Delhi', 1, 1660)
     ]
     
     return trains, stations, track_sections
\ No newline at end of file
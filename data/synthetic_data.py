@@ -0,0 +1,134 @@
+"""
+Seeded synthetic railway networks and fleets for scaling experiments
+"""
+
+import math
+import random
+
+from models.data_models import Train, Station, TrackSection
+
+# Service mix of a typical Indian Railways division: (name label, priority, share of trains)
+TRAIN_SERVICES = [
+    ('Express', 2, 0.30),
+    ('Passenger', 1, 0.18),
+    ('Freight', 1, 0.20),
+    ('Local', 1, 0.14),
+    ('Rajdhani Express', 3, 0.05),
+    ('Shatabdi Express', 3, 0.05),
+    ('Duronto Express', 3, 0.04),
+    ('Vande Bharat', 3, 0.04)
+]
+
+# Section capacities (parallel tracks) and how common each is
+SECTION_CAPACITIES = [(1, 0.3), (2, 0.5), (3, 0.15), (4, 0.05)]
+
+def generate_synthetic_data(n_trains, n_stations=None, junction_density=0.2, extra_link_ratio=0.3,
+                            through_ratio=0.1, seed=0):
+    """Generate a connected rail network and a fleet running on it.
+
+    The network grows as a tree where half of the new stations attach to
+    an existing line end (so hub stations collect lines), plus
+    extra_link_ratio * n_stations cross links. The best-connected
+    junction_density share of stations are junctions. Trains are spread
+    over sections with weights growing with the log of the number of lines
+    at their ends (busier corridors between hubs), and through_ratio of them head for a station
+    two hops away. Same seed, same data.
+
+    Returns (trains, stations, track_sections) like generate_sample_data.
+    """
+    rng = random.Random(seed)
+    if n_stations is None:
+        n_stations = max(8, n_trains // 4)
+
+    stations, track_sections, neighbours = _generate_network(rng, n_stations, junction_density, extra_link_ratio)
+    trains = _generate_fleet(rng, n_trains, stations, track_sections, neighbours, through_ratio)
+    return trains, stations, track_sections
+
+def _generate_network(rng, n_stations, junction_density, extra_link_ratio):
+    """Stations and track sections of a connected network, plus each station's neighbour indices"""
+    links = []
+    neighbours = [set() for _ in range(n_stations)]
+    endpoints = []  # every station once per line it has, for degree-proportional sampling
+
+    def link(a, b):
+        links.append((a, b))
+        neighbours[a].add(b)
+        neighbours[b].add(a)
+        endpoints.extend((a, b))
+
+    # Spanning tree: each new station joins the network at an existing one, half the time at a hub
+    for station in range(1, n_stations):
+        if endpoints and rng.random() < 0.5:
+            link(rng.choice(endpoints), station)
+        else:
+            link(rng.randrange(station), station)
+
+    # Cross links that close loops
+    for _ in range(int(n_stations * extra_link_ratio)):
+        a = rng.randrange(n_stations)
+        b = rng.choice(endpoints)
+        if a != b and b not in neighbours[a]:
+            link(a, b)
+
+    junction_count = int(round(n_stations * junction_density))
+    by_degree = sorted(range(n_stations), key=lambda station: (-len(neighbours[station]), station))
+    junctions = set(by_degree[:junction_count])
+
+    names = []
+    stations = []
+    for index in range(n_stations):
+        name = f"Station {index:05d}" + (' Junction' if index in junctions else '')
+        names.append(name)
+        platforms = min(24, 2 + 2 * len(neighbours[index]))
+        stations.append(Station(f"STN{index:05d}", name, platforms))
+
+    capacities, weights = zip(*SECTION_CAPACITIES)
+    track_sections = []
+    for index, (a, b) in enumerate(links):
+        length_km = int(min(2000, max(5, rng.lognormvariate(math.log(150), 0.8))))
+        track_sections.append(TrackSection(
+            f"TRK{index:05d}", f"{names[a]}-{names[b]} Line", names[a], names[b],
+            rng.choices(capacities, weights)[0], length_km
+        ))
+
+    return stations, track_sections, [sorted(station_neighbours) for station_neighbours in neighbours]
+
+def _generate_fleet(rng, n_trains, stations, track_sections, neighbours, through_ratio):
+    """Trains placed on sections, favouring corridors between well-connected stations"""
+    index_of = {station.name: index for index, station in enumerate(stations)}
+    ends = [(index_of[section.start_station], index_of[section.end_station]) for section in track_sections]
+
+    # Busy corridors run between well-connected stations
+    cum_weights = []
+    total = 0
+    for a, b in ends:
+        total += 1 + math.log(len(neighbours[a]) * len(neighbours[b]))
+        cum_weights.append(total)
+
+    services = [(label, priority) for label, priority, _ in TRAIN_SERVICES]
+    service_weights = [share for _, _, share in TRAIN_SERVICES]
+
+    trains = []
+    chosen = rng.choices(ends, cum_weights=cum_weights, k=n_trains)
+    for number, (a, b) in enumerate(chosen):
+        if rng.random() < 0.5:
+            a, b = b, a
+        if rng.random() < through_ratio:
+            b = rng.choice(neighbours[b])  # destination beyond the next section
+
+        label, priority = rng.choices(services, service_weights)[0]
+        train = Train(f"TRN{number:06d}", f"{label} {10000 + number}", stations[a].name, stations[b].name, priority)
+
+        # Overwrite the randomly drawn live state so the fleet depends only on the seed
+        train.delay_minutes = rng.randint(0, 30)
+        train.speed = rng.randint(60, 120)
+        if train.delay_minutes > 15:
+            train.status = 'Delayed'
+        elif train.delay_minutes > 5:
+            train.status = 'Approaching'
+        else:
+            train.status = rng.choice(['On Time', 'At Platform'])
+
+        trains.append(train)
+
+    return trains
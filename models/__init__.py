@@ -5,8 +5,17 @@ This package contains all the data models and AI components for the railway traf
 """
 
 from .data_models import Train, Station, TrackSection
+from .fleet_store import FleetStore, TrainView
+from .rail_network import RailNetwork
 from .genetic_optimizer import GeneticOptimizer
-from .conflict_detector import ConflictDetector
+from .partitioned_optimizer import PartitionedOptimizer
+from .local_search import LocalSearchRefiner
+from .pareto import non_dominated_ranks, crowding_distances
+from .conflict_detector import ConflictDetector, IndexedConflictDetector
+from .incremental_detector import IncrementalConflictDetector
+from .conflict_graph import ConflictGraph
+from .reservation_table import ReservationTable
+from .scenario_simulator import ScenarioState, ScenarioSimulator
 
 __version__ = '1.0.0'
 __author__ = 'SIH 2025 Team'
@@ -16,21 +25,45 @@ __all__ = [
     'Train',
     'Station', 
     'TrackSection',
+    'FleetStore',
+    'TrainView',
+    'RailNetwork',
+    'ReservationTable',
+    'ScenarioState',
+    'ScenarioSimulator',
     'GeneticOptimizer',
-    'ConflictDetector'
+    'PartitionedOptimizer',
+    'LocalSearchRefiner',
+    'non_dominated_ranks',
+    'crowding_distances',
+    'ConflictDetector',
+    'IndexedConflictDetector',
+    'IncrementalConflictDetector',
+    'ConflictGraph'
 ]
 
 # Model registry for easy access
 MODEL_REGISTRY = {
     'train': Train,
     'station': Station,
-    'track_section': TrackSection
+    'track_section': TrackSection,
+    'rail_network': RailNetwork
 }
 
 # AI Component registry
 AI_COMPONENTS = {
     'optimizer': GeneticOptimizer,
-    'detector': ConflictDetector
+    'partitioned_optimizer': PartitionedOptimizer,
+    'local_search': LocalSearchRefiner,
+    'detector': ConflictDetector,
+    'indexed_detector': IndexedConflictDetector,
+    'incremental_detector': IncrementalConflictDetector
+}
+
+# Interchangeable one-shot conflict detection strategies (compared by the benchmarks)
+CONFLICT_DETECTORS = {
+    'pairwise': ConflictDetector,
+    'indexed': IndexedConflictDetector
 }
 
 def get_model(model_name):
@@ -45,9 +78,9 @@ def create_optimizer(**kwargs):
     """Factory function to create genetic optimizer"""
     return GeneticOptimizer(**kwargs)
 
-def create_detector(**kwargs):
+def create_detector(strategy='pairwise', **kwargs):
     """Factory function to create conflict detector"""
-    return ConflictDetector(**kwargs)
+    return CONFLICT_DETECTORS[strategy.lower()](**kwargs)
 
 # Initialize logging for models
 import logging
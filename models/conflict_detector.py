@@ -1,14 +1,41 @@
 from datetime import datetime, timedelta
 import math
 
+from .fleet_store import FleetStore
+from .rail_network import RailNetwork
+from .reservation_table import ReservationTable
+
 class ConflictDetector:
-    def __init__(self):
+    def __init__(self, network=None, lookahead_minutes=0, block_length_km=5.0):
         self.safety_buffer = 5  # minutes
         self.distance_threshold = 2  # km
         
+        # Predicted conflicts: projected runs reserve signal blocks this far ahead (0 disables)
+        self.lookahead_minutes = lookahead_minutes
+        self.block_length_km = block_length_km
+        self.block_clearance = 1  # minutes a block stays reserved after a train clears it
+        
+        # Track graph for along-track distances; built from the track sections unless given
+        self.network = network
+        self._network_given = network is not None
+        self._network_key = None
+        
+    def use_network(self, track_sections):
+        """Make sure the rail network matches the given track sections"""
+        if self._network_given or track_sections is None:
+            return self.network
+        
+        key = tuple((section.id, section.start_station, section.end_station, section.length_km)
+                    for section in track_sections)
+        if key != self._network_key:
+            self.network = RailNetwork(track_sections)
+            self._network_key = key
+        return self.network
+        
     def detect_conflicts(self, trains, track_sections):
         """Detect potential conflicts between trains"""
         conflicts = []
+        self.use_network(track_sections)
         
         # Check for spatial conflicts (same track section)
         spatial_conflicts = self._detect_spatial_conflicts(trains, track_sections)
@@ -22,6 +49,10 @@ class ConflictDetector:
         junction_conflicts = self._detect_junction_conflicts(trains, track_sections)
         conflicts.extend(junction_conflicts)
         
+        # Check for block conflicts within the look-ahead horizon
+        predicted_conflicts = self._detect_predicted_conflicts(trains)
+        conflicts.extend(predicted_conflicts)
+        
         return conflicts
     
     def _detect_spatial_conflicts(self, trains, track_sections):
@@ -31,16 +62,7 @@ class ConflictDetector:
         for i, train1 in enumerate(trains):
             for j, train2 in enumerate(trains[i+1:], i+1):
                 if self._are_trains_conflicting(train1, train2):
-                    conflict = {
-                        'type': 'spatial_conflict',
-                        'severity': 'high',
-                        'trains': [train1.id, train2.id],
-                        'train_names': [train1.name, train2.name],
-                        'location': self._get_conflict_location(train1, train2),
-                        'estimated_time': self._estimate_conflict_time(train1, train2),
-                        'description': f"Potential collision between {train1.name} and {train2.name}"
-                    }
-                    conflicts.append(conflict)
+                    conflicts.append(self._spatial_conflict(train1, train2))
                     
         return conflicts
     
@@ -60,7 +82,7 @@ class ConflictDetector:
         for route, route_trains in route_groups.items():
             if len(route_trains) > 1:
                 # Sort by expected arrival time
-                route_trains.sort(key=lambda t: t.current_position)
+                route_trains.sort(key=self._expected_arrival)
                 
                 for i in range(len(route_trains) - 1):
                     train1 = route_trains[i]
@@ -69,16 +91,7 @@ class ConflictDetector:
                     # Check if trains are too close in time
                     time_gap = self._calculate_time_gap(train1, train2)
                     if time_gap < self.safety_buffer:
-                        conflict = {
-                            'type': 'temporal_conflict',
-                            'severity': 'medium',
-                            'trains': [train1.id, train2.id],
-                            'train_names': [train1.name, train2.name],
-                            'time_gap': time_gap,
-                            'required_gap': self.safety_buffer,
-                            'description': f"Insufficient time gap between {train1.name} and {train2.name}"
-                        }
-                        conflicts.append(conflict)
+                        conflicts.append(self._temporal_conflict(train1, train2, time_gap))
                         
         return conflicts
     
@@ -91,7 +104,7 @@ class ConflictDetector:
         
         for train in trains:
             # Simulate junction detection based on position
-            if 'junction' in train.current_position.lower() or train.current_position.endswith('_JN'):
+            if self._is_junction(train.current_position):
                 junction = train.current_position
                 if junction not in junction_trains:
                     junction_trains[junction] = []
@@ -102,29 +115,132 @@ class ConflictDetector:
             if len(trains_at_junction) > 1:
                 for i, train1 in enumerate(trains_at_junction):
                     for train2 in trains_at_junction[i+1:]:
-                        conflict = {
-                            'type': 'junction_conflict',
-                            'severity': 'high',
-                            'trains': [train1.id, train2.id],
-                            'train_names': [train1.name, train2.name],
-                            'junction': junction,
-                            'description': f"Junction conflict at {junction} between {train1.name} and {train2.name}"
-                        }
-                        conflicts.append(conflict)
+                        conflicts.append(self._junction_conflict(junction, train1, train2))
                         
         return conflicts
     
+    def _detect_predicted_conflicts(self, trains):
+        """Detect trains projected to occupy the same signal block within the look-ahead horizon"""
+        if self.lookahead_minutes <= 0 or self.network is None:
+            return []
+        
+        table = self._reservation_table()
+        by_id = {}
+        order = {}
+        for index, train in enumerate(trains):
+            by_id[train.id] = train
+            order[train.id] = index
+            self._reserve_projection(table, train)
+        
+        conflicts = []
+        for pair, (time, block) in table.conflicts().items():
+            train1, train2 = sorted((by_id[train_id] for train_id in pair), key=lambda t: order[t.id])
+            conflicts.append(((order[train1.id], order[train2.id]),
+                              self._predicted_conflict(train1, train2, time, block, table)))
+        
+        conflicts.sort(key=lambda item: item[0])
+        return [conflict for _, conflict in conflicts]
+    
+    def _reservation_table(self):
+        return ReservationTable(self.network, self.block_length_km, self.block_clearance)
+    
+    def _reserve_projection(self, table, train):
+        """Reserve the blocks a train will run through within the horizon.
+        
+        The train leaves its position once its delay has run out and follows
+        its shortest route at its current speed.
+        """
+        if train.speed <= 0:
+            return
+        
+        time = float(train.delay_minutes)
+        for section, direction in self.network.route(train.current_position, train.destination):
+            if time >= self.lookahead_minutes:
+                break
+            running = self.network.lengths[section] / train.speed * 60
+            table.reserve_run(train.id, section, direction, time, time + running, self.lookahead_minutes)
+            time += running
+    
+    def _is_junction(self, position):
+        """Check if a position names a railway junction"""
+        return 'junction' in position.lower() or position.endswith('_JN')
+    
+    def _spatial_conflict(self, train1, train2):
+        """Build the conflict record for two trains on collision course"""
+        return {
+            'type': 'spatial_conflict',
+            'severity': 'high',
+            'trains': [train1.id, train2.id],
+            'train_names': [train1.name, train2.name],
+            'location': self._get_conflict_location(train1, train2),
+            'estimated_time': self._estimate_conflict_time(train1, train2),
+            'description': f"Potential collision between {train1.name} and {train2.name}"
+        }
+    
+    def _temporal_conflict(self, train1, train2, time_gap):
+        """Build the conflict record for two trains running too close in time"""
+        return {
+            'type': 'temporal_conflict',
+            'severity': 'medium',
+            'trains': [train1.id, train2.id],
+            'train_names': [train1.name, train2.name],
+            'time_gap': time_gap,
+            'required_gap': self.safety_buffer,
+            'description': f"Insufficient time gap between {train1.name} and {train2.name}"
+        }
+    
+    def _junction_conflict(self, junction, train1, train2):
+        """Build the conflict record for two trains meeting at a junction"""
+        return {
+            'type': 'junction_conflict',
+            'severity': 'high',
+            'trains': [train1.id, train2.id],
+            'train_names': [train1.name, train2.name],
+            'junction': junction,
+            'description': f"Junction conflict at {junction} between {train1.name} and {train2.name}"
+        }
+    
+    def _predicted_conflict(self, train1, train2, time, block, table):
+        """Build the conflict record for two trains projected into the same signal block"""
+        section, block_number = table.block_location(block)
+        section_id = self.network.section_ids[section]
+        minutes = int(time)
+        return {
+            'type': 'predicted_conflict',
+            'severity': 'high' if minutes < 15 else 'medium',
+            'trains': [train1.id, train2.id],
+            'train_names': [train1.name, train2.name],
+            'section': section_id,
+            'block': block_number,
+            'estimated_time': minutes,
+            'description': f"{train1.name} and {train2.name} projected in block {block_number + 1} "
+                           f"of {section_id} in {minutes} min"
+        }
+    
     def _are_trains_conflicting(self, train1, train2):
         """Check if two trains are on collision course"""
         # Simple conflict detection based on position and direction
         if train1.current_position == train2.current_position:
             return True
             
-        # Check if trains are moving towards each other
-        if train1.destination == train2.current_position and train2.destination == train1.current_position:
-            return True
-            
-        return False
+        # Check if trains are moving towards each other over the same track
+        movement, _ = self._movement(train1.current_position, train1.destination)
+        _, opposite = self._movement(train2.current_position, train2.destination)
+        return movement == opposite
+    
+    def _movement(self, position, destination):
+        """Keys of the track a train is about to run on, in its direction and in the opposite one.
+        
+        That is the first section of its shortest route; trains off the network
+        fall back to their (position, destination) pair.
+        """
+        section = -1
+        if self.network is not None:
+            section, direction = self.network.first_section(position, destination)
+        
+        if section < 0:
+            return (position, destination), (destination, position)
+        return (section, direction), (section, 1 - direction)
     
     def _get_conflict_location(self, train1, train2):
         """Get estimated conflict location"""
@@ -133,15 +249,92 @@ class ConflictDetector:
     
     def _estimate_conflict_time(self, train1, train2):
         """Estimate time until conflict occurs"""
-        # Simple calculation based on speed and distance
+        # Closing time over the track between the two trains when the network knows it
+        closing_speed = train1.speed + train2.speed
+        if self.network is not None and closing_speed > 0:
+            distance = self.network.distance(train1.current_position, train2.current_position)
+            if 0 < distance < math.inf:
+                return max(2, int(distance / closing_speed * 60))
+        
+        # Otherwise a simple calculation based on speed
         base_time = 10  # minutes
         speed_factor = (train1.speed + train2.speed) / 120  # normalize to average speed
         return max(2, int(base_time / speed_factor))
     
+    def _expected_arrival(self, train):
+        """Minutes until a train reaches its destination along the track (inf if unknown)"""
+        if train.current_position == train.destination:
+            return train.delay_minutes
+        
+        distance = self.network.distance(train.current_position, train.destination) if self.network else math.inf
+        if math.isinf(distance) or train.speed <= 0:
+            return math.inf
+        return train.delay_minutes + distance / train.speed * 60
+    
     def _calculate_time_gap(self, train1, train2):
-        """Calculate time gap between two trains"""
-        # Simple calculation based on position difference and speed
-        position_diff = abs(hash(train1.current_position) - hash(train2.current_position)) % 20
-        avg_speed = (train1.speed + train2.speed) / 2
-        time_gap = (position_diff / avg_speed) * 60  # convert to minutes
-        return max(1, int(time_gap))
\ No newline at end of file
+        """Calculate time gap between two trains heading for the same destination"""
+        # Difference of their expected arrivals; unknown when either is off the network
+        arrival1 = self._expected_arrival(train1)
+        arrival2 = self._expected_arrival(train2)
+        if math.isinf(arrival1) or math.isinf(arrival2):
+            return math.inf
+        return max(1, int(abs(arrival2 - arrival1)))
+
+
+class IndexedConflictDetector(ConflictDetector):
+    """Conflict detector that only compares co-located trains.
+
+    Trains are bucketed by position and by the track they are about to run
+    on, so the spatial check visits only pairs that share a position or run
+    head-on over the same section, instead of every pair in the fleet.
+    Produces the same conflicts, in the same order, as ConflictDetector.
+    """
+    
+    def _detect_spatial_conflicts(self, trains, track_sections):
+        """Detect trains on collision course using a position index"""
+        by_position = {}
+        by_movement = {}
+        
+        opposites = {}
+        
+        if isinstance(trains, FleetStore):
+            # Interned place codes compare exactly like the place names
+            positions = trains.position_codes.tolist()
+            destinations = trains.destination_codes.tolist()
+            places = trains.places
+        else:
+            positions = [train.current_position for train in trains]
+            destinations = [train.destination for train in trains]
+            places = None
+        
+        # Movement keys are looked up once per distinct (position, destination)
+        movements = {}
+        for pair in set(zip(positions, destinations)):
+            names = (places[pair[0]], places[pair[1]]) if places is not None else pair
+            movement, opposite = self._movement(*names)
+            movements[pair] = movement
+            opposites[movement] = opposite
+        
+        for index, (position, destination) in enumerate(zip(positions, destinations)):
+            by_position.setdefault(position, []).append(index)
+            by_movement.setdefault(movements[(position, destination)], []).append(index)
+        
+        pairs = set()
+        
+        # Trains sharing a position
+        for indices in by_position.values():
+            for i, first in enumerate(indices):
+                for second in indices[i+1:]:
+                    pairs.add((first, second))
+        
+        # Trains moving towards each other over the same section
+        for movement, indices in by_movement.items():
+            opposite = opposites[movement]
+            if opposite == movement:
+                continue  # stationary trains, already paired by position
+            for other in by_movement.get(opposite, ()):
+                for index in indices:
+                    if index < other:
+                        pairs.add((index, other))
+        
+        return [self._spatial_conflict(trains[i], trains[j]) for i, j in sorted(pairs)]
@@ -0,0 +1,175 @@
+import heapq
+import math
+
+# Severity order of conflict records, most urgent highest
+SEVERITY_LEVELS = {'low': 0, 'medium': 1, 'high': 2}
+
+class ConflictGraph:
+    """Conflicts indexed as a graph: trains are nodes, conflicting pairs are edges.
+
+    The detectors report one record per check, so a pair can appear several
+    times (spatial, temporal, junction, predicted). Here each pair is one
+    edge carrying its conflict types, its highest severity and its earliest
+    time to conflict. Connected components are the conflict clusters:
+    trains that cannot be rescheduled independently of each other. Clusters
+    are kept in a heap ordered by urgency (severity, then time to conflict,
+    then size), so the most urgent ones come out without re-sorting.
+
+    Built once per conflict list (e.g. memoized per fleet state version);
+    lookups by train id are dictionary lookups.
+    """
+
+    def __init__(self, conflicts):
+        self.train_ids = []
+        self._nodes = {}          # train id -> node index
+        self._edges = {}          # (node, node) with the smaller index first -> edge index
+        self._edge_nodes = []     # edge index -> (node, node)
+        self._adjacent = []       # node -> edge indices
+        self.edges = []           # edge dicts: trains, types, severity, time_to_conflict, conflicts
+        self.conflict_count = 0
+
+        for conflict in conflicts:
+            self._add(conflict)
+
+        self._label_components()
+
+    def __len__(self):
+        return len(self.edges)
+
+    def __contains__(self, train_id):
+        return train_id in self._nodes
+
+    def conflicts_of(self, train_id):
+        """Edges of a train, one per conflicting partner"""
+        node = self._nodes.get(train_id)
+        return [] if node is None else [self.edges[edge] for edge in self._adjacent[node]]
+
+    def neighbors(self, train_id):
+        """Ids of the trains a train conflicts with"""
+        node = self._nodes.get(train_id)
+        if node is None:
+            return []
+        return [self.train_ids[self._other(edge, node)] for edge in self._adjacent[node]]
+
+    def cluster_of(self, train_id):
+        """The conflict cluster a train belongs to, or None if it has no conflict"""
+        node = self._nodes.get(train_id)
+        return None if node is None else self.clusters[self.component_of[node]]
+
+    def components(self):
+        """Train ids of every cluster, largest first"""
+        return [cluster['trains'] for cluster in sorted(self.clusters, key=lambda cluster: -cluster['size'])]
+
+    def top_clusters(self, n, max_trains=None):
+        """The n most urgent clusters, most urgent first; with max_trains, copies listing at most that many trains"""
+        clusters = [self.clusters[index] for *_, index in heapq.nsmallest(n, self._ranking)]
+        if max_trains is None:
+            return clusters
+        return [dict(cluster, trains=cluster['trains'][:max_trains]) for cluster in clusters]
+
+    def urgency_order(self):
+        """Cluster indices from most to least urgent"""
+        return [index for *_, index in sorted(self._ranking)]
+
+    def _add(self, conflict):
+        a, b = conflict['trains'][:2]
+        node_a, node_b = self._node(a), self._node(b)
+        if node_a == node_b:
+            return
+        self.conflict_count += 1
+
+        key = (min(node_a, node_b), max(node_a, node_b))
+        index = self._edges.get(key)
+        if index is None:
+            index = self._edges[key] = len(self.edges)
+            self._edge_nodes.append(key)
+            self.edges.append({
+                'trains': [self.train_ids[key[0]], self.train_ids[key[1]]],
+                'types': [],
+                'severity': 'low',
+                'time_to_conflict': None,
+                'conflicts': 0
+            })
+            self._adjacent[node_a].append(index)
+            self._adjacent[node_b].append(index)
+
+        edge = self.edges[index]
+        edge['conflicts'] += 1
+        if conflict['type'] not in edge['types']:
+            edge['types'].append(conflict['type'])
+        severity = conflict.get('severity', 'low')
+        if SEVERITY_LEVELS.get(severity, 0) > SEVERITY_LEVELS[edge['severity']]:
+            edge['severity'] = severity
+        minutes = conflict.get('estimated_time')
+        if minutes is not None and (edge['time_to_conflict'] is None or minutes < edge['time_to_conflict']):
+            edge['time_to_conflict'] = minutes
+
+    def _node(self, train_id):
+        node = self._nodes.get(train_id)
+        if node is None:
+            node = self._nodes[train_id] = len(self.train_ids)
+            self.train_ids.append(train_id)
+            self._adjacent.append([])
+        return node
+
+    def _other(self, edge, node):
+        a, b = self._edge_nodes[edge]
+        return b if a == node else a
+
+    def _label_components(self):
+        """Union-find over the edges, then one cluster summary per component"""
+        parent = list(range(len(self.train_ids)))
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for a, b in self._edge_nodes:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        roots = {}
+        self.component_of = []
+        for node in range(len(self.train_ids)):
+            self.component_of.append(roots.setdefault(find(node), len(roots)))
+
+        self.clusters = [{
+            'cluster': index,
+            'trains': [],
+            'size': 0,
+            'pairs': 0,
+            'conflicts': 0,
+            'types': [],
+            'severity': 'low',
+            'time_to_conflict': None
+        } for index in range(len(roots))]
+
+        for node, component in enumerate(self.component_of):
+            cluster = self.clusters[component]
+            cluster['trains'].append(self.train_ids[node])
+            cluster['size'] += 1
+
+        for (a, _), edge in zip(self._edge_nodes, self.edges):
+            cluster = self.clusters[self.component_of[a]]
+            cluster['pairs'] += 1
+            cluster['conflicts'] += edge['conflicts']
+            for conflict_type in edge['types']:
+                if conflict_type not in cluster['types']:
+                    cluster['types'].append(conflict_type)
+            if SEVERITY_LEVELS[edge['severity']] > SEVERITY_LEVELS[cluster['severity']]:
+                cluster['severity'] = edge['severity']
+            minutes = edge['time_to_conflict']
+            if minutes is not None and (cluster['time_to_conflict'] is None or minutes < cluster['time_to_conflict']):
+                cluster['time_to_conflict'] = minutes
+
+        # Most severe first, then soonest (clusters without an estimate last), then largest
+        self._ranking = [
+            (-SEVERITY_LEVELS[cluster['severity']],
+             math.inf if cluster['time_to_conflict'] is None else cluster['time_to_conflict'],
+             -cluster['size'], cluster['cluster'])
+            for cluster in self.clusters
+        ]
+        heapq.heapify(self._ranking)
@@ -2,6 +2,9 @@ from datetime import datetime
 import random
 
 class Train:
+    __slots__ = ('id', 'name', 'current_position', 'destination', 'priority',
+                 'delay_minutes', 'speed', 'status')
+    
     def __init__(self, train_id, name, current_position, destination, priority=1):
         self.id = train_id
         self.name = name
@@ -22,6 +25,8 @@ class Train:
             return random.choice(['On Time', 'At Platform'])
 
 class Station:
+    __slots__ = ('id', 'name', 'platforms', 'current_occupancy')
+    
     def __init__(self, station_id, name, platforms=4):
         self.id = station_id
         self.name = name
@@ -29,12 +34,16 @@ class Station:
         self.current_occupancy = random.randint(0, platforms)
 
 class TrackSection:
-    def __init__(self, section_id, name, start_station, end_station, capacity=2):
+    __slots__ = ('id', 'name', 'start_station', 'end_station', 'capacity', 'length_km',
+                 'current_trains', 'signals')
+    
+    def __init__(self, section_id, name, start_station, end_station, capacity=2, length_km=100):
         self.id = section_id
         self.name = name
         self.start_station = start_station
         self.end_station = end_station
         self.capacity = capacity
+        self.length_km = length_km
         self.current_trains = random.randint(0, capacity)
         self.signals = self._generate_signals()
         
@@ -0,0 +1,482 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.helpers import (DEFAULT_FUEL_CONSUMPTION_RATE, FUEL_CONSUMPTION_RATES, estimate_fuel_consumption_array,
+                           get_train_type)
+
+from .fleet_store import FleetStore
+from .rail_network import RailNetwork
+from .reservation_table import ReservationTable
+from .genome import DEPARTURE_TIME, ROUTE_PRIORITY, PLATFORM_ASSIGNMENT, SPEED_ADJUSTMENT, DEFAULT_PLATFORMS
+
+# Nominal running speed (km/h) and service braking rate (m/s^2) per train class
+CLASS_SPEEDS = {
+    'Vande Bharat': 160,
+    'Shatabdi': 150,
+    'Rajdhani': 130,
+    'Duronto': 130,
+    'Express': 110,
+    'Passenger': 100,
+    'Local': 90,
+    'Freight': 75
+}
+CLASS_BRAKING = {
+    'Freight': 0.3
+}
+DEFAULT_BRAKING = 0.7
+
+TRAIN_CLASSES = list(CLASS_SPEEDS)
+
+# Fitness weights
+THROUGHPUT_WEIGHT = 2.0
+DELAY_WEIGHT = 1.5
+CONFLICT_WEIGHT = 3.0
+CAPACITY_WEIGHT = 10.0  # per excess train occupying a section
+
+# A cache miss is re-scored relative to a cached parent only if at most this share of its trains changed
+PARTIAL_RESCORE_FRACTION = 0.25
+
+# Bit layout of the integer genes in a packed train code (see FitnessCache._train_codes)
+INTEGER_GENES = [DEPARTURE_TIME, ROUTE_PRIORITY, PLATFORM_ASSIGNMENT]
+INTEGER_GENE_WEIGHTS = np.array([1 << 16, 1 << 8, 1], dtype=np.float64)
+INTEGER_GENE_OFFSET = float(1 << 31)  # shifts negative departures into the unsigned range
+
+class SectionTimeTables:
+    """Travel-time and minimum-headway lookup tables indexed by (section, train class).
+
+    travel[s, c] is the nominal running time in minutes for class c over
+    section s; headway[s, c] is the minimum gap a class c train needs behind
+    the train ahead of it on section s: the safety buffer plus the time to
+    cover its braking distance.
+    """
+
+    def __init__(self, track_sections, safety_buffer=5):
+        lengths = np.array([section.length_km for section in track_sections], dtype=np.float64)
+        speeds = np.array([CLASS_SPEEDS[train_class] for train_class in TRAIN_CLASSES], dtype=np.float64)
+        braking = np.array([CLASS_BRAKING.get(train_class, DEFAULT_BRAKING) for train_class in TRAIN_CLASSES])
+
+        # Braking distance v^2 / 2a, converted from metres to km
+        braking_km = (speeds / 3.6) ** 2 / (2 * braking) / 1000
+
+        self.travel = lengths[:, np.newaxis] / speeds[np.newaxis, :] * 60
+        self.headway = np.broadcast_to(safety_buffer + braking_km / speeds * 60, self.travel.shape).copy()
+
+class FitnessEvaluator:
+    """Scores candidate schedules by simulating section occupancy.
+
+    Built once per optimization run: trains are mapped to the section they
+    run on (the first section of their route on the RailNetwork), their class
+    and nominal running time are looked up from SectionTimeTables, and the
+    trains are grouped per section and direction. Every generation then only
+    does array arithmetic over the population.
+
+    Fitness is split into per-train terms (throughput and lateness) and
+    per-section terms (headway and capacity violations) so they can be
+    evaluated separately.
+
+    repair() makes genomes feasible before they are scored: platforms within
+    the platform count of the train's destination station (from stations),
+    and no section holding more trains at once than its capacity.
+    """
+
+    def __init__(self, trains, track_sections, safety_buffer=5, network=None, stations=None):
+        self.tables = SectionTimeTables(track_sections, safety_buffer)
+        self.n_trains = len(trains)
+        self.n_sections = len(track_sections)
+
+        if isinstance(trains, FleetStore):
+            self.priorities = trains.priority.astype(np.float64)
+            self.delays = trains.delay_minutes.astype(np.float64)
+        else:
+            self.priorities = np.array([train.priority for train in trains], dtype=np.float64)
+            self.delays = np.array([train.delay_minutes for train in trains], dtype=np.float64)
+
+        class_index = {train_class: i for i, train_class in enumerate(TRAIN_CLASSES)}
+        self.classes = np.array([class_index.get(get_train_type(train.name), class_index['Passenger'])
+                                 for train in trains], dtype=np.intp)
+
+        # Section each train runs on next (the first of its shortest route, -1 when off the network)
+        # and its direction
+        if network is None:
+            network = RailNetwork(track_sections)
+        self.network = network
+        placement = [network.first_section(train.current_position, train.destination) for train in trains]
+        self.sections = np.array([s for s, _ in placement], dtype=np.intp)
+        self.directions = np.array([d for _, d in placement], dtype=np.intp)
+        self.capacities = np.array([section.capacity for section in track_sections], dtype=np.intp)
+
+        on_section = self.sections >= 0
+        self.nominal = np.zeros(self.n_trains)
+        self.nominal[on_section] = self.tables.travel[self.sections[on_section], self.classes[on_section]]
+        self.headways = np.zeros(self.n_trains)
+        self.headways[on_section] = self.tables.headway[self.sections[on_section], self.classes[on_section]]
+
+        # Energy objective inputs: distance run, class speed and fuel rate per train
+        lengths = np.array([section.length_km for section in track_sections], dtype=np.float64)
+        self.run_km = np.zeros(self.n_trains)
+        self.run_km[on_section] = lengths[self.sections[on_section]]
+        self.class_speeds = np.array([CLASS_SPEEDS[c] for c in TRAIN_CLASSES], dtype=np.float64)[self.classes]
+        self.fuel_rates = np.array([FUEL_CONSUMPTION_RATES.get(c, DEFAULT_FUEL_CONSUMPTION_RATE)
+                                    for c in TRAIN_CLASSES])[self.classes]
+
+        # Train indices per section, and per (section, direction) for headway checks
+        order = np.argsort(self.sections, kind='stable')
+        bounds = np.searchsorted(self.sections[order], np.arange(self.n_sections + 1))
+        self.section_trains = [order[bounds[s]:bounds[s + 1]] for s in range(self.n_sections)]
+        self.section_sizes = np.diff(bounds)
+        # Only sections with two or more trains can be penalized; the rest always score 0
+        self.shared_sections = np.flatnonzero(self.section_sizes >= 2).tolist()
+        self.section_lanes = [[] for _ in range(self.n_sections)]
+        for s in self.shared_sections:
+            members = self.section_trains[s]
+            self.section_lanes[s] = [lane for lane in (members[self.directions[members] == 0],
+                                                       members[self.directions[members] == 1]) if len(lane) > 1]
+
+        # Platform domain per train: 1..platforms of its destination station
+        platforms = {station.name: station.platforms for station in stations or ()}
+        self.platform_counts = np.array([platforms.get(train.destination, DEFAULT_PLATFORMS) for train in trains],
+                                        dtype=np.float64)
+
+        # Sections with more trains than capacity, largest first, as a (section, member) matrix padded
+        # with -1; only these can ever be over capacity
+        crowded = np.flatnonzero(self.section_sizes > self.capacities)
+        crowded = crowded[np.argsort(-self.section_sizes[crowded], kind='stable')]
+        width = int(self.section_sizes[crowded].max()) if len(crowded) else 0
+        self.crowded_members = np.full((len(crowded), width), -1, dtype=np.intp)
+        for row, section in enumerate(crowded.tolist()):
+            self.crowded_members[row, :self.section_sizes[section]] = self.section_trains[section]
+        self.crowded_capacities = self.capacities[crowded]
+        self.crowded_active = (self.section_sizes[crowded][np.newaxis, :] > np.arange(width)[:, np.newaxis]).sum(axis=1)
+
+    def evaluate(self, population):
+        """Fitness of every individual in a (population_size, n_trains, n_genes) array"""
+        fitness = self.train_terms(population).sum(axis=1)
+        for s in self.shared_sections:
+            fitness += self.section_terms(population, s)
+        return fitness
+
+    def schedule(self, genes, trains=slice(None)):
+        """Entry and exit minutes (from now) for genes of the given train indices"""
+        entry = np.maximum(0.0, self.delays[trains] + genes[..., DEPARTURE_TIME])
+        running = self.nominal[trains] / genes[..., SPEED_ADJUSTMENT]
+        return entry, entry + running
+
+    def train_terms(self, genes, trains=slice(None)):
+        """Per-train fitness contributions for genes of the given train indices.
+
+        With a whole population and the default trains this has shape
+        (population_size, n_trains); with matching index arrays it scores
+        arbitrary (individual, train) pairs.
+        """
+        lateness, throughput = self.train_outcomes(genes, trains)
+        return self.priorities[trains] * (THROUGHPUT_WEIGHT * throughput - DELAY_WEIGHT * lateness)
+
+    def train_outcomes(self, genes, trains=slice(None)):
+        """(lateness in minutes, throughput ratio) per train for genes of the given train indices"""
+        entry, exit_time = self.schedule(genes, trains)
+        nominal = self.nominal[trains]
+
+        # Lateness against running the section on time at nominal speed
+        lateness = np.maximum(0.0, exit_time - nominal)
+
+        # Throughput: fraction of the nominal completion rate achieved
+        completion = np.maximum(exit_time, 1.0)
+        throughput = np.where(self.sections[trains] >= 0, np.maximum(nominal, 1.0) / completion,
+                              genes[..., SPEED_ADJUSTMENT])
+        return lateness, throughput
+
+    def objectives(self, population, energy=False):
+        """Objectives to minimize for every individual, with its constraint violation.
+
+        Columns: priority-weighted lateness, negated priority-weighted
+        throughput and, with energy, fuel in litres for every train's run
+        over its section at its adjusted speed. The violation is the
+        headway/capacity penalty (0 for a conflict-free schedule).
+        """
+        lateness, throughput = self.train_outcomes(population)
+        columns = [(self.priorities * lateness).sum(axis=1), -(self.priorities * throughput).sum(axis=1)]
+        if energy:
+            fuel = estimate_fuel_consumption_array(self.run_km, self.class_speeds * population[..., SPEED_ADJUSTMENT],
+                                                   self.fuel_rates)
+            columns.append(fuel.sum(axis=1))
+
+        violation = np.zeros(len(population))
+        for section in self.shared_sections:
+            violation -= self.section_terms(population, section)
+        return np.stack(columns, axis=1), violation
+
+    def repair(self, population):
+        """Make every genome of a (population_size, n_trains, n_genes) array feasible, in place.
+
+        Platforms outside a train's domain are wrapped into it. On crowded
+        sections, trains are admitted in entry order onto the earliest free
+        of the section's capacity tracks; a train finding none free has its
+        departure held (whole minutes) until one is. All crowded sections
+        and individuals are repaired together, one member rank at a time.
+        Returns the number of genomes that had to be changed.
+        """
+        platform = population[..., PLATFORM_ASSIGNMENT]
+        outside = (platform < 1) | (platform > self.platform_counts)
+        repaired = outside.any(axis=1)
+        if outside.any():
+            population[..., PLATFORM_ASSIGNMENT] = np.where(outside, (platform - 1) % self.platform_counts + 1,
+                                                            platform)
+
+        if not len(self.crowded_members):
+            return int(repaired.sum())
+
+        members = self.crowded_members
+        padding = members < 0
+        safe = np.where(padding, 0, members)
+        entry = np.maximum(0.0, self.delays[safe] + population[:, :, DEPARTURE_TIME][:, safe])
+        running = self.nominal[safe] / population[:, :, SPEED_ADJUSTMENT][:, safe]
+        entry = np.where(padding, np.inf, entry)
+
+        # Entry order of each crowded section's trains, per individual; rank-major so each step is contiguous
+        order = np.argsort(entry, axis=2, kind='stable')
+        delays = np.broadcast_to(self.delays[safe], entry.shape)
+        sorted_entry, sorted_running, sorted_delays = (
+            np.ascontiguousarray(np.moveaxis(np.take_along_axis(values, order, axis=2), 2, 0))
+            for values in (entry, running, delays))
+
+        # Free-from time of each track; tracks beyond a section's capacity never free up
+        width, population_size, n_crowded = sorted_entry.shape
+        n_tracks = int(self.crowded_capacities.max())
+        tracks = np.where(np.arange(n_tracks) < self.crowded_capacities[:, np.newaxis], 0.0, np.inf)
+        tracks = np.broadcast_to(tracks, (population_size, n_crowded, n_tracks)).copy()
+        held = np.zeros_like(sorted_entry)
+
+        for rank in range(width):
+            # Sections are largest first, so those with a train at this rank are a prefix
+            active = self.crowded_active[rank]
+            wanted = sorted_entry[rank, :, :active]
+            section_tracks = tracks[:, :active]
+            track = np.argmin(section_tracks, axis=2)[:, :, np.newaxis]
+            free = np.take_along_axis(section_tracks, track, axis=2)[:, :, 0]
+            late = free > wanted
+            # Held departures are whole minutes after the train's own delay
+            delay = sorted_delays[rank, :, :active]
+            start = np.where(late, delay + np.ceil(free - delay - 1e-9), wanted)
+            held[rank, :, :active][late] = start[late] - wanted[late]
+            np.put_along_axis(section_tracks, track, (start + sorted_running[rank, :, :active])[:, :, np.newaxis],
+                              axis=2)
+
+        ranks, individuals, sections = np.nonzero(held)
+        if len(individuals):
+            trains = members[sections, order[individuals, sections, ranks]]
+            population[individuals, trains, DEPARTURE_TIME] = (
+                np.maximum(0.0, self.delays[trains] + population[individuals, trains, DEPARTURE_TIME])
+                + held[ranks, individuals, sections] - self.delays[trains])
+            repaired[individuals] = True
+
+        return int(repaired.sum())
+
+    def block_conflicts(self, genes, block_length_km=5.0, horizon=60):
+        """Feasibility check of one genome: train index pairs whose runs share a signal block
+        within the horizon (minutes), with the (time, block) of their earliest overlap"""
+        table = ReservationTable(self.network, block_length_km, clearance_minutes=0)
+        entry, exit_time = self.schedule(genes)
+        for train in np.flatnonzero(self.sections >= 0).tolist():
+            table.reserve_run(train, self.sections[train], self.directions[train],
+                              float(entry[train]), float(exit_time[train]), horizon)
+        return table.conflicts()
+
+    def section_terms(self, population, section):
+        """Conflict penalty of one section for every individual, shape (population_size,)"""
+        return self.section_penalty(population[:, self.section_trains[section]], section)
+
+    def section_penalty(self, member_genes, section):
+        """Conflict penalty of one section from the genes of just the trains running on it"""
+        members = self.section_trains[section]
+        penalty = np.zeros(len(member_genes))
+        if len(members) < 2:
+            return penalty
+
+        entry, exit_time = self.schedule(member_genes, members)
+
+        # Headway: each follower must enter at least its minimum headway after the train ahead
+        for lane in self.section_lanes[section]:
+            positions = np.searchsorted(members, lane)
+            lane_entry = entry[:, positions]
+            order = np.argsort(lane_entry, axis=1)
+            sorted_entry = np.take_along_axis(lane_entry, order, axis=1)
+            required = self.headways[lane][order[:, 1:]]
+            penalty += np.maximum(0.0, required - np.diff(sorted_entry, axis=1)).sum(axis=1)
+
+        penalty += CAPACITY_WEIGHT * self._capacity_excess(entry, exit_time, section)
+
+        return -CONFLICT_WEIGHT * penalty
+
+    def section_excess(self, member_genes, section):
+        """Trains over the section's capacity, summed over entries, from the genes of its trains"""
+        members = self.section_trains[section]
+        if len(members) <= self.capacities[section]:
+            return np.zeros(len(member_genes))
+        entry, exit_time = self.schedule(member_genes, members)
+        return self._capacity_excess(entry, exit_time, section)
+
+    def _capacity_excess(self, entry, exit_time, section):
+        # Trains occupying the section at once, swept over entry/exit events
+        times = np.concatenate([exit_time, entry], axis=1)
+        steps = np.concatenate([-np.ones_like(exit_time), np.ones_like(entry)], axis=1)
+        order = np.argsort(times, axis=1, kind='stable')  # exits sort before entries at equal times
+        sorted_steps = np.take_along_axis(steps, order, axis=1)
+        occupancy = np.cumsum(sorted_steps, axis=1)
+        return np.where(sorted_steps > 0, np.maximum(0.0, occupancy - self.capacities[section]), 0.0).sum(axis=1)
+
+class FitnessCache:
+    """Bounded LRU cache of fitness evaluations keyed by a genome hash.
+
+    Each entry keeps the per-train and per-section terms of a genome, not
+    just its total. When a child misses the cache but one of its parents is
+    cached, only the trains whose genes differ from that parent and the
+    sections those trains run on are re-scored.
+    """
+
+    def __init__(self, evaluator, max_entries=2048):
+        self.evaluator = evaluator
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # genome hash -> (train terms, section terms, fitness)
+        self._previous = None          # (train codes, keys) of the last evaluated generation
+        self.evaluations = 0
+        self.hits = 0
+        self.partial = 0
+        self.repaired = 0
+
+    def __getstate__(self):
+        # Worker processes start with an empty cache rather than pickling every entry
+        state = self.__dict__.copy()
+        state.update(_entries=OrderedDict(), _previous=None, evaluations=0, hits=0, partial=0, repaired=0)
+        return state
+
+    def repair(self, population):
+        """Make the population feasible in place before it is evaluated (see FitnessEvaluator.repair)"""
+        self.repaired += self.evaluator.repair(population)
+
+    def evaluate(self, population, lineage=None):
+        """Fitness of every individual; lineage[i] lists parent indices into the previous population"""
+        codes = self._train_codes(population)
+        keys = self._genome_keys(codes)
+        fitness = np.empty(len(population))
+
+        missing = {}
+        for i, key in enumerate(keys):
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                fitness[i] = entry[2]
+                self.hits += 1
+            elif key in missing:
+                self.hits += 1  # duplicate within this generation, scored once below
+            else:
+                missing[key] = i
+
+        if missing:
+            rows = np.fromiter(missing.values(), dtype=np.intp, count=len(missing))
+            train_terms, section_terms = self._score(population, codes, rows, lineage)
+            totals = train_terms.sum(axis=1) + section_terms.sum(axis=1)
+
+            for k, key in enumerate(missing):
+                self._entries[key] = (train_terms[k], section_terms[k], float(totals[k]))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            for i, key in enumerate(keys):
+                if key in missing:
+                    fitness[i] = self._entries[key][2]
+
+        self.evaluations += len(population)
+        self._previous = (codes, keys)
+        return fitness
+
+    def stats(self):
+        return {
+            'evaluations': self.evaluations,
+            'cache_hits': self.hits,
+            'partial_evaluations': self.partial,
+            'repaired_genomes': self.repaired
+        }
+
+    def _train_codes(self, population):
+        """Pack each train's genes into one uint64: the integer genes (departure as int16,
+        route priority and platform as uint8) in the high word, the speed factor's float32
+        bits in the low word"""
+        integer_genes = population[..., INTEGER_GENES] @ INTEGER_GENE_WEIGHTS + INTEGER_GENE_OFFSET
+        speed = population[..., SPEED_ADJUSTMENT].astype(np.float32).view(np.uint32)
+        return (integer_genes.astype(np.uint64) << np.uint64(32)) | speed
+
+    def _genome_keys(self, codes):
+        """Compact hash per genome of its packed train codes"""
+        return [hashlib.blake2b(genome.tobytes(), digest_size=16).digest() for genome in codes]
+
+    def _score(self, population, codes, rows, lineage):
+        """Per-train and per-section terms for the given rows, reusing a cached parent where possible"""
+        evaluator = self.evaluator
+        count = len(rows)
+        train_terms = np.empty((count, evaluator.n_trains))
+        section_terms = np.zeros((count, evaluator.n_sections))
+        partial = np.zeros(count, dtype=bool)
+        changed = np.zeros((count, evaluator.n_trains), dtype=bool)
+
+        if lineage is not None and self._previous is not None:
+            previous_codes, previous_keys = self._previous
+
+            # Trains whose genes differ from each parent, for every missing row at once
+            parents = lineage[rows]
+            diffs = codes[rows, np.newaxis] != previous_codes[np.maximum(parents, 0)]
+
+            # Re-scoring a section re-sorts all of its trains, so the cost of a partial
+            # update is the number of changed trains plus the trains on the sections they
+            # touch. Children far from both parents are cheaper to score in the full batch.
+            limit = max(1, int(evaluator.n_trains * PARTIAL_RESCORE_FRACTION))
+            costs = diffs.sum(axis=2)
+            candidates = np.flatnonzero((costs <= limit).any(axis=1))
+
+            k_index, slot_index, changed_trains = np.nonzero(diffs[candidates])
+            touched = evaluator.sections[changed_trains]
+            on_section = touched >= 0
+            dirty = np.zeros((len(candidates), 2, evaluator.n_sections))
+            dirty[k_index[on_section], slot_index[on_section], touched[on_section]] = 1
+            costs[candidates] += (dirty @ evaluator.section_sizes).astype(costs.dtype)
+
+            for k in candidates:
+                for slot in ((0, 1) if costs[k, 0] <= costs[k, 1] else (1, 0)):
+                    parent = parents[k, slot]
+                    if parent < 0 or costs[k, slot] > limit:
+                        continue
+                    entry = self._entries.get(previous_keys[parent])
+                    if entry is not None:
+                        partial[k] = True
+                        changed[k] = diffs[k, slot]
+                        train_terms[k] = entry[0]
+                        section_terms[k] = entry[1]
+                        break
+
+        # Rows without a usable parent: score every train and section in one batch
+        full = np.flatnonzero(~partial)
+        if len(full):
+            genomes = population[rows[full]]
+            train_terms[full] = evaluator.train_terms(genomes)
+            for section in evaluator.shared_sections:
+                section_terms[full, section] = evaluator.section_terms(genomes, section)
+
+        # Rows close to a cached parent: re-score only the changed trains...
+        pair_rows, pair_trains = np.nonzero(changed)
+        train_terms[pair_rows, pair_trains] = evaluator.train_terms(
+            population[rows[pair_rows], pair_trains], pair_trains)
+
+        # ...and only the sections those trains run on
+        touched = evaluator.sections[pair_trains]
+        on_section = touched >= 0
+        dirty = np.zeros((count, evaluator.n_sections), dtype=bool)
+        dirty[pair_rows[on_section], touched[on_section]] = True
+
+        for section in np.flatnonzero(dirty.any(axis=0)):
+            section_rows = np.flatnonzero(dirty[:, section])
+            member_genes = population[np.ix_(rows[section_rows], evaluator.section_trains[section])]
+            section_terms[section_rows, section] = evaluator.section_penalty(member_genes, section)
+
+        self.partial += int(partial.sum())
+        return train_terms, section_terms
@@ -0,0 +1,278 @@
+import numpy as np
+
+class FleetStore:
+    """Columnar store for a whole fleet of trains.
+
+    Positions, destinations and statuses are interned to integer codes and the
+    numeric attributes live in typed NumPy columns (int8 priority, float32
+    speed, int16 delay). Iterating or indexing yields TrainView objects that
+    keep the Train attribute API, so existing code works unchanged, while
+    vectorized code can read the columns directly.
+    """
+
+    def __init__(self, capacity=16):
+        capacity = max(1, capacity)
+        self._size = 0
+        self.ids = []
+        self.names = []
+        self._row_of = {}
+
+        self._position = np.zeros(capacity, dtype=np.int32)
+        self._destination = np.zeros(capacity, dtype=np.int32)
+        self._priority = np.zeros(capacity, dtype=np.int8)
+        self._speed = np.zeros(capacity, dtype=np.float32)
+        self._delay = np.zeros(capacity, dtype=np.int16)
+        self._status = np.zeros(capacity, dtype=np.int8)
+
+        # Interned station/position names and status labels
+        self.places = []
+        self._place_codes = {}
+        self.statuses = []
+        self._status_codes = {}
+
+    @classmethod
+    def from_trains(cls, trains):
+        """Build a store from Train-like objects"""
+        trains = list(trains)
+        store = cls(capacity=len(trains))
+        for train in trains:
+            store.append(train.id, train.name, train.current_position, train.destination,
+                         priority=train.priority, speed=train.speed,
+                         delay_minutes=train.delay_minutes, status=train.status)
+        return store
+
+    @classmethod
+    def from_columns(cls, ids, names, current_positions, destinations, priority, speed, delay_minutes, statuses):
+        """Build a store from parallel columns in one pass (bulk loads, e.g. from the database)"""
+        ids = list(ids)
+        size = len(ids)
+        store = cls(capacity=size)
+        store.ids = ids
+        store.names = list(names)
+        store._row_of = {train_id: row for row, train_id in enumerate(ids)}
+        if len(store._row_of) != size:
+            raise ValueError('Duplicate train ids')
+
+        # Intern in one pass each: a new name gets the next code (dicts keep insertion order)
+        place_codes = store._place_codes
+        status_codes = store._status_codes
+        store._size = size
+        store._position[:size] = [place_codes.setdefault(place, len(place_codes)) for place in current_positions]
+        store._destination[:size] = [place_codes.setdefault(place, len(place_codes)) for place in destinations]
+        store._priority[:size] = priority
+        store._speed[:size] = speed
+        store._delay[:size] = delay_minutes
+        store._status[:size] = [status_codes.setdefault(status, len(status_codes)) for status in statuses]
+        store.places = list(place_codes)
+        store.statuses = list(status_codes)
+        return store
+
+    def append(self, train_id, name, current_position, destination, priority=1, speed=0,
+               delay_minutes=0, status='On Time'):
+        """Add a train and return its view"""
+        if train_id in self._row_of:
+            raise ValueError(f"Duplicate train id: {train_id}")
+
+        if self._size == len(self._priority):
+            self._grow(2 * self._size)
+
+        row = self._size
+        self._size += 1
+        self.ids.append(train_id)
+        self.names.append(name)
+        self._row_of[train_id] = row
+
+        self._position[row] = self.intern_place(current_position)
+        self._destination[row] = self.intern_place(destination)
+        self._priority[row] = priority
+        self._speed[row] = speed
+        self._delay[row] = delay_minutes
+        self._status[row] = self._intern_status(status)
+
+        return TrainView(self, row)
+
+    def copy(self):
+        """Independent copy of the store (columns are copied, interned tables shared by value)"""
+        clone = FleetStore(capacity=self._size)
+        clone._size = self._size
+        clone.ids = list(self.ids)
+        clone.names = list(self.names)
+        clone._row_of = dict(self._row_of)
+        for column in ('_position', '_destination', '_priority', '_speed', '_delay', '_status'):
+            setattr(clone, column, getattr(self, column)[:max(1, self._size)].copy())
+        clone.places = list(self.places)
+        clone._place_codes = dict(self._place_codes)
+        clone.statuses = list(self.statuses)
+        clone._status_codes = dict(self._status_codes)
+        return clone
+
+    def snapshot(self):
+        """Point-in-time copy for readers: the numeric columns and names are copied, everything else is shared.
+
+        Train ids and the interned place/status tables only ever grow, so
+        sharing them is safe; a snapshot just ignores rows appended after
+        it was taken. Names are renamed in place and so are copied. Meant
+        for reading (e.g. scenario simulation) rather than for updates.
+        """
+        clone = FleetStore.__new__(FleetStore)
+        clone.__dict__.update(self.__dict__)
+        clone.names = list(self.names)
+        for column in ('_position', '_destination', '_priority', '_speed', '_delay', '_status'):
+            setattr(clone, column, getattr(self, column)[:max(1, self._size)].copy())
+        return clone
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for row in range(self._size):
+            yield TrainView(self, row)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [TrainView(self, i) for i in range(*row.indices(self._size))]
+        if row < 0:
+            row += self._size
+        if not 0 <= row < self._size:
+            raise IndexError('FleetStore index out of range')
+        return TrainView(self, row)
+
+    def get(self, train_id):
+        """View of a train by id, or None"""
+        row = self._row_of.get(train_id)
+        return TrainView(self, row) if row is not None and row < self._size else None
+
+    def row_of(self, train_id):
+        return self._row_of[train_id]
+
+    # Column access for vectorized consumers; views into the live arrays
+
+    @property
+    def position_codes(self):
+        return self._position[:self._size]
+
+    @property
+    def destination_codes(self):
+        return self._destination[:self._size]
+
+    @property
+    def priority(self):
+        return self._priority[:self._size]
+
+    @property
+    def speed(self):
+        return self._speed[:self._size]
+
+    @property
+    def delay_minutes(self):
+        return self._delay[:self._size]
+
+    @property
+    def status_codes(self):
+        return self._status[:self._size]
+
+    def intern_place(self, place):
+        """Integer code of a station/position name"""
+        code = self._place_codes.get(place)
+        if code is None:
+            code = len(self.places)
+            self.places.append(place)
+            self._place_codes[place] = code
+        return code
+
+    def place_code(self, place):
+        """Code of an already interned place, or -1"""
+        return self._place_codes.get(place, -1)
+
+    def _intern_status(self, status):
+        code = self._status_codes.get(status)
+        if code is None:
+            code = len(self.statuses)
+            self.statuses.append(status)
+            self._status_codes[status] = code
+        return code
+
+    def _grow(self, capacity):
+        for column in ('_position', '_destination', '_priority', '_speed', '_delay', '_status'):
+            old = getattr(self, column)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, column, new)
+
+class TrainView:
+    """Train-compatible view of one row of a FleetStore"""
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    @property
+    def id(self):
+        return self._store.ids[self._row]
+
+    @property
+    def name(self):
+        return self._store.names[self._row]
+
+    @name.setter
+    def name(self, value):
+        self._store.names[self._row] = value
+
+    @property
+    def current_position(self):
+        return self._store.places[self._store._position[self._row]]
+
+    @current_position.setter
+    def current_position(self, value):
+        self._store._position[self._row] = self._store.intern_place(value)
+
+    @property
+    def destination(self):
+        return self._store.places[self._store._destination[self._row]]
+
+    @destination.setter
+    def destination(self, value):
+        self._store._destination[self._row] = self._store.intern_place(value)
+
+    @property
+    def priority(self):
+        return int(self._store._priority[self._row])
+
+    @priority.setter
+    def priority(self, value):
+        self._store._priority[self._row] = value
+
+    @property
+    def speed(self):
+        return float(self._store._speed[self._row])
+
+    @speed.setter
+    def speed(self, value):
+        self._store._speed[self._row] = value
+
+    @property
+    def delay_minutes(self):
+        return int(self._store._delay[self._row])
+
+    @delay_minutes.setter
+    def delay_minutes(self, value):
+        self._store._delay[self._row] = value
+
+    @property
+    def status(self):
+        return self._store.statuses[self._store._status[self._row]]
+
+    @status.setter
+    def status(self, value):
+        self._store._status[self._row] = self._store._intern_status(value)
+
+    def __eq__(self, other):
+        return isinstance(other, TrainView) and other._store is self._store and other._row == self._row
+
+    def __hash__(self):
+        return hash((id(self._store), self._row))
+
+    def __repr__(self):
+        return f"TrainView({self.id!r}, {self.name!r})"
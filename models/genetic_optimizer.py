@@ -1,180 +1,633 @@
-import random
+import os
+import time
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+from .fitness import FitnessCache, FitnessEvaluator
+from .fleet_store import FleetStore
+from .genome import DEPARTURE_TIME, ROUTE_PRIORITY, PLATFORM_ASSIGNMENT, SPEED_ADJUSTMENT, N_GENES, DEFAULT_PLATFORMS
+from .pareto import crowding_distances, non_dominated_ranks, select_survivors
+
+# Share of a warm-started population drawn at random instead of from the previous run, to keep diversity
+WARM_START_FRESH_FRACTION = 0.2
+
+# Adaptive mutation: the rate doubles (up to the cap) while diversity is below the floor,
+# and decays back towards the configured rate once it recovers
+MAX_MUTATION_RATE = 0.5
+MUTATION_DECAY = 0.8
+
+class OptimizationCancelled(Exception):
+    """Raised from a progress callback to abort a running optimization"""
+
+def _evolve_island(settings, seed, population, fitness_scores, fitness_args, generations):
+    """Process pool entry point: evolve one island for a migration epoch"""
+    optimizer = GeneticOptimizer(seed=seed, **settings)
+    result = optimizer._run_generations(population, fitness_scores, fitness_args, generations)
+    fitness_cache = fitness_args[0]
+    return result + (fitness_cache.stats(),)
+
 class GeneticOptimizer:
-    def __init__(self, population_size=50, generations=30, mutation_rate=0.1):
+    def __init__(self, population_size=50, generations=30, mutation_rate=0.1, seed=None,
+                 islands=1, migration_interval=5, migration_size=2, fitness_cache_size=2048,
+                 block_length_km=5.0, warm_start=False, warm_start_max_changed=0.5,
+                 convergence_patience=0, convergence_tolerance=1e-3, local_search=None,
+                 time_budget=None, adaptive_mutation=False, diversity_floor=0.1):
         self.population_size = population_size
         self.generations = generations
         self.mutation_rate = mutation_rate
-        
-    def optimize(self, trains, track_sections, conflicts):
-        """Main optimization function using genetic algorithm"""
-        
-        # Initialize population
-        population = self._initialize_population(trains, track_sections)
-        
+        self.rng = np.random.default_rng(seed)
+
+        # Adaptive mutation raises the rate in use while population diversity is below diversity_floor
+        self.adaptive_mutation = adaptive_mutation
+        self.diversity_floor = diversity_floor
+        self._mutation_rate = mutation_rate
+
+        # Island model: each island evolves its own population_size individuals
+        self.islands = islands
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+
+        # Fitness memoization; statistics of the latest run are kept in last_run_stats
+        # and its best genome, shape (n_trains, N_GENES), in last_solution
+        self.fitness_cache_size = fitness_cache_size
+        self.last_run_stats = None
+        self.last_solution = None
+
+        # Platform count per train of the current run (platform genes are drawn from 1..count)
+        self.platform_counts = None
+
+        # Signal block length of the final feasibility check
+        self.block_length_km = block_length_km
+
+        # Warm start: the next run is seeded from this run's final population (kept in warm_state)
+        # unless more than warm_start_max_changed of the trains are new or changed
+        self.warm_start = warm_start
+        self.warm_start_max_changed = warm_start_max_changed
+        self.warm_state = None
+
+        # Convergence: stop once the best fitness has not improved by more than
+        # convergence_tolerance (relative) for convergence_patience generations; 0 disables
+        self.convergence_patience = convergence_patience
+        self.convergence_tolerance = convergence_tolerance
+
+        # Wall-clock budget in seconds: no generation is started that would not finish in time
+        self.time_budget = time_budget
+        self._started = None
+        self._stop_reason = None
+
+        # Per-generation best/mean fitness, diversity and mutation rate of the latest run
+        self.last_trace = None
+        self._trace = None
+
+        # Optional refinement of the best solution after the GA: any object with
+        # refine(genes, evaluator) -> (genes, statistics), e.g. LocalSearchRefiner
+        self.local_search = local_search
+
+    def optimize(self, trains, track_sections, conflicts, progress_callback=None, stations=None,
+                 return_trace=False, network=None):
+        """Main optimization function using genetic algorithm.
+
+        progress_callback, if given, is called after every generation with a
+        dict of generation, generations and best_fitness; it may raise
+        OptimizationCancelled to stop the run. stations give each train's
+        platform domain (the platforms of its destination); without them
+        every station is assumed to have DEFAULT_PLATFORMS. network may pass
+        the RailNetwork of track_sections to save building it.
+
+        The run ends after self.generations, on convergence or when the time
+        budget would be exceeded, whichever comes first. With return_trace
+        the result is (schedule, trace), the trace holding best and mean
+        fitness, diversity and mutation rate per generation (also kept in
+        last_trace).
+        """
+        self._started = time.perf_counter()
+        self._stop_reason = 'generations'
+        self._mutation_rate = self.mutation_rate
+        self._trace = []
+
+        # Travel-time tables and section grouping are built once and shared by every evaluation
+        evaluator = FitnessEvaluator(trains, track_sections, network=network, stations=stations)
+        fitness_cache = FitnessCache(evaluator, self.fitness_cache_size)
+        fitness_args = (fitness_cache,)
+        self.platform_counts = evaluator.platform_counts
+
+        if self.generations <= 0 or not len(trains):
+            self.last_trace = self._trace
+            self.last_solution = None
+            return (self._format_solution(None, trains), self.last_trace) if return_trace else \
+                self._format_solution(None, trains)
+
+        signatures = self._train_signatures(trains) if self.warm_start else None
+        seed = self._warm_start_seed(trains, signatures)
+
+        if self.islands > 1:
+            best_solution, best_fitness, cache_stats, completed, population = self._optimize_islands(
+                trains, track_sections, fitness_args, progress_callback, seed)
+        else:
+            # Initialize population
+            population = self._initialize_population(trains, track_sections, seed)
+            population, fitness_scores, best_solution, best_fitness, completed, _ = self._run_generations(
+                population, None, fitness_args, self.generations - 1, progress_callback)
+            population = population[np.argsort(-fitness_scores)]
+            cache_stats = fitness_cache.stats()
+
+        local_search_stats = None
+        if self.local_search is not None and best_solution is not None:
+            best_solution, local_search_stats = self.local_search.refine(best_solution, fitness_cache.evaluator)
+            best_fitness += local_search_stats['improvement']
+
+        self.last_run_stats = dict(
+            cache_stats,
+            generations=completed,
+            stopped_early=completed < self.generations,
+            stop_reason=self._stop_reason,
+            elapsed_seconds=round(time.perf_counter() - self._started, 3),
+            final_mutation_rate=self._mutation_rate,
+            best_fitness=best_fitness,
+            cache_hit_rate=cache_stats['cache_hits'] / max(1, cache_stats['evaluations']),
+            repaired_fraction=cache_stats['repaired_genomes'] / max(1, cache_stats['evaluations']),
+            warm_start=None if seed is None else {
+                'reused_trains': int(seed[1].sum()),
+                'reseeded_trains': int(len(seed[1]) - seed[1].sum())
+            },
+            local_search=local_search_stats
+        )
+
+        if self.warm_start:
+            self.warm_state = {
+                'columns': {train_id: column for column, train_id in enumerate(self._train_ids(trains))},
+                'signatures': signatures,
+                'population': np.concatenate([best_solution[np.newaxis], population])[:self.population_size]
+            }
+
+        # Feasibility of the chosen schedule on the signal-block reservation grid
+        if best_solution is not None:
+            block_conflicts = fitness_cache.evaluator.block_conflicts(best_solution, self.block_length_km)
+            self.last_run_stats['block_conflicts'] = len(block_conflicts)
+
+        self.last_trace, self._trace = self._trace, None
+        self.last_solution = best_solution
+        schedule = self._format_solution(best_solution, trains)
+        return (schedule, self.last_trace) if return_trace else schedule
+
+    def optimize_pareto(self, trains, track_sections, conflicts, stations=None, energy=False, max_solutions=20,
+                        progress_callback=None):
+        """Multi-objective optimization (NSGA-II) of delay against throughput and, optionally, energy.
+
+        Instead of one schedule weighing the objectives together, returns up
+        to max_solutions schedules from the non-dominated front, spread along
+        it by crowding distance and ordered by delay. Each carries its
+        objectives: priority-weighted delay and throughput, fuel in litres
+        with energy, and the remaining headway/capacity conflict penalty.
+        The penalty is an objective of its own rather than a hard constraint:
+        on busy fleets no schedule clears every conflict, and constrained
+        domination would then collapse the front onto the least-conflicted
+        genome. Genomes are repaired as in optimize;
+        the run ends after self.generations or at the time budget. Warm
+        start, islands and local search do not apply.
+        """
+        self._started = time.perf_counter()
+        self._stop_reason = 'generations'
+        self._mutation_rate = self.mutation_rate
+        self._trace = None
+
+        evaluator = FitnessEvaluator(trains, track_sections, stations=stations)
+        self.platform_counts = evaluator.platform_counts
+        if self.generations <= 0 or not len(trains):
+            return []
+
+        population = self._random_genes((self.population_size, len(trains)))
+        repaired = evaluator.repair(population)
+        objectives = self._pareto_objectives(evaluator, population, energy)
+        ranks = non_dominated_ranks(objectives)
+        crowding = crowding_distances(objectives, ranks)
+        completed = 1
+        self._report_progress(progress_callback, completed, float(np.sum(ranks == 0)))
+
+        while completed < self.generations and not self._should_stop([], completed):
+            # Binary tournaments on (front, crowding); children join their parents, the best half survives
+            parents1 = self._crowded_tournament(ranks, crowding, self.population_size)
+            parents2 = self._crowded_tournament(ranks, crowding, self.population_size)
+            children = self._mutate(self._crossover(population[parents1], population[parents2]))
+            repaired += evaluator.repair(children)
+            child_objectives = self._pareto_objectives(evaluator, children, energy)
+
+            population = np.concatenate([population, children])
+            objectives = np.concatenate([objectives, child_objectives])
+            survivors, ranks, crowding = select_survivors(objectives, None, self.population_size)
+            population, objectives = population[survivors], objectives[survivors]
+
+            completed += 1
+            self._report_progress(progress_callback, completed, float(np.sum(ranks == 0)))
+
+        # First front, one individual per distinct objective vector, thinned to the most spread out
+        front = np.flatnonzero(ranks == 0)
+        _, distinct = np.unique(np.round(objectives[front], 6), axis=0, return_index=True)
+        front = front[distinct]
+        if len(front) > max_solutions:
+            front = front[np.argsort(-crowding_distances(objectives[front], np.zeros(len(front), dtype=np.intp)),
+                                     kind='stable')[:max_solutions]]
+        front = front[np.argsort(objectives[front, 0], kind='stable')]
+
+        self.last_run_stats = {
+            'generations': completed,
+            'stop_reason': self._stop_reason,
+            'elapsed_seconds': round(time.perf_counter() - self._started, 3),
+            'evaluations': completed * self.population_size,
+            'repaired_fraction': repaired / (completed * self.population_size),
+            'front_size': int(np.sum(ranks == 0)),
+            'objectives': ['weighted_delay', 'weighted_throughput'] + (['energy_litres'] if energy else []) +
+                          ['conflict_penalty']
+        }
+
+        solutions = []
+        for index in front:
+            values = {
+                'weighted_delay': float(objectives[index, 0]),
+                'weighted_throughput': float(-objectives[index, 1]),
+                'conflict_penalty': float(objectives[index, -1])
+            }
+            if energy:
+                values['energy_litres'] = float(objectives[index, 2])
+            solutions.append({'objectives': values, 'schedule': self._format_solution(population[index], trains)})
+        return solutions
+
+    @staticmethod
+    def _pareto_objectives(evaluator, population, energy):
+        """The evaluator's objective columns with the conflict penalty appended as the last one"""
+        objectives, violations = evaluator.objectives(population, energy)
+        return np.column_stack([objectives, violations])
+
+    def _crowded_tournament(self, ranks, crowding, count):
+        """Binary tournament on the crowded comparison: lower front wins, then larger crowding distance"""
+        pairs = self.rng.integers(0, len(ranks), size=(count, 2))
+        first, second = pairs[:, 0], pairs[:, 1]
+        first_wins = (ranks[first] < ranks[second]) | \
+                     ((ranks[first] == ranks[second]) & (crowding[first] >= crowding[second]))
+        return np.where(first_wins, first, second)
+
+    def _run_generations(self, population, fitness_scores, fitness_args, generations, progress_callback=None):
+        """Evolve an evaluated population for a number of generations.
+
+        Returns the final population with its fitness scores, the best
+        solution seen along the way with its fitness, the number of
+        generations evaluated, which is smaller than asked for once the run
+        has converged, and the best fitness after each of them. Pass
+        fitness_scores=None to evaluate the starting population first.
+        """
+        completed = 0
+        if fitness_scores is None:
+            fitness_scores = self._evaluate_fitness(population, *fitness_args)
+            completed += 1
+
+        best_idx = int(np.argmax(fitness_scores))
+        best_fitness = float(fitness_scores[best_idx])
+        best_solution = population[best_idx].copy()
+        if completed:
+            self._record_generation(completed, [population], [fitness_scores], best_fitness)
+            self._report_progress(progress_callback, completed, best_fitness)
+        history = [best_fitness]
+
+        for generation in range(generations):
+            if self._should_stop(history, completed):
+                break
+
+            # Selection and reproduction
+            population, lineage = self._evolve_population(population, fitness_scores)
+
+            # Evaluate fitness for the whole population at once
+            fitness_scores = self._evaluate_fitness(population, *fitness_args, lineage=lineage)
+
+            best_idx = int(np.argmax(fitness_scores))
+            if fitness_scores[best_idx] > best_fitness:
+                best_fitness = float(fitness_scores[best_idx])
+                best_solution = population[best_idx].copy()
+
+            completed += 1
+            self._record_generation(completed, [population], [fitness_scores], best_fitness)
+            self._report_progress(progress_callback, completed, best_fitness)
+            history.append(best_fitness)
+
+        return population, fitness_scores, best_solution, best_fitness, completed, history[len(history) - completed:]
+
+    def _should_stop(self, history, completed, upcoming=1):
+        """Whether to stop before evolving the next upcoming generations (records the reason)"""
+        if self._converged(history):
+            self._stop_reason = 'converged'
+            return True
+
+        # Anytime: stop if the next generations would not finish within the budget at the pace so far
+        if self.time_budget and self._started is not None and completed:
+            elapsed = time.perf_counter() - self._started
+            if elapsed + elapsed / completed * upcoming > self.time_budget:
+                self._stop_reason = 'time_budget'
+                return True
+        return False
+
+    def _converged(self, history):
+        """Whether the best fitness (one entry per generation) has stalled for the patience window"""
+        patience = self.convergence_patience
+        if patience <= 0 or len(history) <= patience:
+            return False
+        before, now = history[-patience - 1], history[-1]
+        return now - before <= self.convergence_tolerance * max(abs(before), 1.0)
+
+    def _record_generation(self, generation, populations, scores, best_fitness):
+        """Trace an evaluated generation (of one or several islands) and adapt the mutation rate"""
+        diversity = float(np.mean([self._diversity(population, fitness_scores)
+                                   for population, fitness_scores in zip(populations, scores)]))
+
+        if self.adaptive_mutation:
+            if diversity < self.diversity_floor:
+                self._mutation_rate = min(MAX_MUTATION_RATE, self._mutation_rate * 2)
+            else:
+                self._mutation_rate = max(self.mutation_rate, self._mutation_rate * MUTATION_DECAY)
+
+        if self._trace is not None:
+            self._trace.append({
+                'generation': generation,
+                'best_fitness': best_fitness,
+                'mean_fitness': float(np.mean([np.mean(fitness_scores) for fitness_scores in scores])),
+                'diversity': round(diversity, 4),
+                'mutation_rate': round(self._mutation_rate, 4),
+                'elapsed_seconds': round(time.perf_counter() - self._started, 4)
+            })
+
+    @staticmethod
+    def _diversity(population, fitness_scores):
+        """Share of (individual, train) slots whose genes differ from the best individual's"""
+        best = population[int(np.argmax(fitness_scores))]
+        return float(np.mean(np.any(population != best, axis=2)))
+
+    def _report_progress(self, progress_callback, generation, best_fitness):
+        """Notify the progress callback that a generation has been evaluated"""
+        if progress_callback is not None:
+            progress_callback({
+                'generation': generation,
+                'generations': self.generations,
+                'best_fitness': best_fitness
+            })
+
+    def _optimize_islands(self, trains, track_sections, fitness_args, progress_callback=None, seed=None):
+        """Evolve several populations in parallel, migrating elites around a ring between epochs.
+
+        Convergence, the time budget and the mutation rate are checked
+        between epochs. Returns the best solution and fitness, the cache
+        statistics, the generations completed and the best population_size
+        individuals across the islands.
+        """
+        populations = [self._initialize_population(trains, track_sections, seed) for _ in range(self.islands)]
+        scores = [None] * self.islands
+
         best_solution = None
         best_fitness = float('-inf')
-        
-        for generation in range(self.generations):
-            # Evaluate fitness for each solution
-            fitness_scores = []
-            for solution in population:
-                fitness = self._evaluate_fitness(solution, trains, conflicts)
-                fitness_scores.append(fitness)
-                
-                if fitness > best_fitness:
-                    best_fitness = fitness
-                    best_solution = solution.copy()
-            
-            # Selection and reproduction
-            population = self._evolve_population(population, fitness_scores)
-            
-        return self._format_solution(best_solution, trains)
-    
-    def _initialize_population(self, trains, track_sections):
-        """Initialize random population of scheduling solutions"""
-        population = []
-        
-        for _ in range(self.population_size):
-            solution = {}
-            for train in trains:
-                # Random scheduling decisions
-                solution[train.id] = {
-                    'departure_time': self._random_time_adjustment(),
-                    'route_priority': random.randint(1, 10),
-                    'platform_assignment': random.randint(1, 4),
-                    'speed_adjustment': random.uniform(0.8, 1.2)
-                }
-            population.append(solution)
-            
+        completed = 0
+        history = []
+        cache_stats = {'evaluations': 0, 'cache_hits': 0, 'partial_evaluations': 0, 'repaired_genomes': 0}
+
+        # The first epoch only evaluates the initial populations
+        epochs = [0]
+        remaining = self.generations - 1
+        while remaining > 0:
+            epochs.append(min(self.migration_interval, remaining))
+            remaining -= epochs[-1]
+
+        workers = min(self.islands, os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for epoch, generations in enumerate(epochs):
+                settings = self._island_settings()
+                seeds = self.rng.integers(0, 2**63, size=self.islands)
+                futures = [
+                    executor.submit(_evolve_island, settings, int(seeds[i]), populations[i], scores[i],
+                                    fitness_args, generations)
+                    for i in range(self.islands)
+                ]
+
+                # Best fitness across the islands after each generation of the epoch
+                epoch_history = np.full(generations if epoch else 1, best_fitness)
+                for i, future in enumerate(futures):
+                    populations[i], scores[i], island_best, island_fitness, _, island_history, island_stats = \
+                        future.result()
+                    for name, value in island_stats.items():
+                        cache_stats[name] += value
+                    if island_fitness > best_fitness:
+                        best_fitness = island_fitness
+                        best_solution = island_best
+                    epoch_history = np.maximum(epoch_history, island_history)
+
+                completed += generations if epoch else 1
+                self._record_generation(completed, populations, scores, best_fitness)
+                self._report_progress(progress_callback, completed, best_fitness)
+                history.extend(np.maximum.accumulate(epoch_history).tolist())
+                if epoch < len(epochs) - 1 and self._should_stop(history, completed, epochs[epoch + 1]):
+                    break
+
+                if epoch < len(epochs) - 1:
+                    self._migrate(populations, scores)
+
+        population = np.concatenate(populations)
+        ranked = np.argsort(-np.concatenate(scores))[:self.population_size]
+        return best_solution, best_fitness, cache_stats, completed, population[ranked]
+
+    def _migrate(self, populations, scores):
+        """Copy each island's elites over the worst individuals of the next island in the ring"""
+        count = min(self.migration_size, self.population_size)
+        if count <= 0:
+            return
+
+        elites = []
+        for population, fitness_scores in zip(populations, scores):
+            elite_indices = np.argsort(fitness_scores)[len(fitness_scores) - count:]
+            elites.append((population[elite_indices].copy(), fitness_scores[elite_indices].copy()))
+
+        for i in range(len(populations)):
+            migrants, migrant_scores = elites[i - 1]
+            worst_indices = np.argsort(scores[i])[:count]
+            populations[i][worst_indices] = migrants
+            scores[i][worst_indices] = migrant_scores
+
+    def _island_settings(self):
+        """Constructor arguments for the single-island optimizers run in worker processes"""
+        return {
+            'population_size': self.population_size,
+            'generations': self.generations,
+            'mutation_rate': self._mutation_rate,
+            'fitness_cache_size': self.fitness_cache_size
+        }
+
+    def _initialize_population(self, trains, track_sections, seed=None):
+        """Initialize random population of scheduling solutions.
+
+        With a warm-start seed (see _warm_start_seed) most individuals take
+        the genes of unchanged trains from the previous run's population, in
+        fitness order; new and changed trains keep random genes.
+        """
+        population = self._random_genes((self.population_size, len(trains)))
+        if seed is None:
+            return population
+
+        columns, kept = seed
+        previous = self.warm_state['population']
+        count = self.population_size - int(self.population_size * WARM_START_FRESH_FRACTION)
+        rows = np.arange(count) % len(previous)
+        population[:count, kept] = previous[rows][:, columns[kept]]
         return population
-    
-    def _evaluate_fitness(self, solution, trains, conflicts):
-        """Evaluate fitness of a scheduling solution"""
-        fitness = 0
-        
-        # Factors for fitness calculation
-        delay_penalty = 0
-        throughput_bonus = 0
-        conflict_penalty = 0
-        
-        for train in trains:
-            train_solution = solution.get(train.id, {})
-            
-            # Delay penalty
-            delay_penalty += train.delay_minutes * train.priority
-            
-            # Throughput calculation
-            speed_factor = train_solution.get('speed_adjustment', 1.0)
-            throughput_bonus += speed_factor * train.priority
-            
-        # Conflict resolution bonus
-        resolved_conflicts = len(conflicts) * 0.8  # Assume 80% resolution
-        conflict_penalty = len(conflicts) - resolved_conflicts
-        
-        # Fitness function: maximize throughput, minimize delays and conflicts
-        fitness = (throughput_bonus * 2) - (delay_penalty * 1.5) - (conflict_penalty * 3)
-        
-        return fitness
-    
+
+    @staticmethod
+    def _train_ids(trains):
+        return trains.ids[:len(trains)] if isinstance(trains, FleetStore) else [train.id for train in trains]
+
+    @staticmethod
+    def _train_signatures(trains):
+        """Per train, the inputs of its part of the schedule; a train whose signature changed is re-seeded"""
+        if isinstance(trains, FleetStore):
+            places = trains.places
+            return list(zip([places[code] for code in trains.position_codes.tolist()],
+                            [places[code] for code in trains.destination_codes.tolist()],
+                            trains.priority.tolist(), trains.delay_minutes.tolist()))
+        return [(train.current_position, train.destination, train.priority, train.delay_minutes)
+                for train in trains]
+
+    def _warm_start_seed(self, trains, signatures):
+        """(previous column per train, mask of unchanged trains) for seeding from warm_state, or None
+        for a cold start"""
+        if not self.warm_start or self.warm_state is None or not len(trains):
+            return None
+
+        previous_columns = self.warm_state['columns']
+        previous_signatures = self.warm_state['signatures']
+        columns = np.array([previous_columns.get(train_id, -1) for train_id in self._train_ids(trains)],
+                           dtype=np.intp)
+        kept = np.array([column >= 0 and previous_signatures[column] == signature
+                         for column, signature in zip(columns.tolist(), signatures)], dtype=bool)
+
+        if 1 - kept.mean() > self.warm_start_max_changed:
+            return None
+        return columns, kept
+
+    def _evaluate_fitness(self, population, fitness_cache, lineage=None):
+        """Evaluate fitness of every scheduling solution in the population"""
+
+        # Repair first (platform domains, section capacity) so only feasible schedules are scored
+        fitness_cache.repair(population)
+
+        # Simulated schedule: maximize throughput, minimize lateness, headway and capacity conflicts.
+        # Genomes seen before come from the cache; children are re-scored relative to a parent.
+        return fitness_cache.evaluate(population, lineage)
+
     def _evolve_population(self, population, fitness_scores):
-        """Evolve population using selection, crossover, and mutation"""
-        new_population = []
-        
+        """Evolve population using selection, crossover, and mutation.
+
+        Returns the new population and its lineage: for each individual, the
+        indices of its parents in the old population (-1 where unused).
+        """
+
         # Keep best solutions (elitism)
         elite_count = int(self.population_size * 0.1)
-        elite_indices = np.argsort(fitness_scores)[-elite_count:]
-        
-        for idx in elite_indices:
-            new_population.append(population[idx].copy())
-        
+        elite_indices = np.argsort(fitness_scores)[len(fitness_scores) - elite_count:]
+        elites = population[elite_indices]
+
         # Generate rest through crossover and mutation
-        while len(new_population) < self.population_size:
-            # Tournament selection
-            parent1 = self._tournament_selection(population, fitness_scores)
-            parent2 = self._tournament_selection(population, fitness_scores)
-            
-            # Crossover
-            child = self._crossover(parent1, parent2)
-            
-            # Mutation
-            if random.random() < self.mutation_rate:
-                child = self._mutate(child)
-                
-            new_population.append(child)
-            
-        return new_population
-    
-    def _tournament_selection(self, population, fitness_scores, tournament_size=3):
-        """Tournament selection for parent selection"""
-        tournament_indices = random.sample(range(len(population)), tournament_size)
-        best_idx = max(tournament_indices, key=lambda i: fitness_scores[i])
-        return population[best_idx]
-    
-    def _crossover(self, parent1, parent2):
-        """Crossover between two parent solutions"""
-        child = {}
-        
-        for train_id in parent1.keys():
-            if random.random() < 0.5:
-                child[train_id] = parent1[train_id].copy()
-            else:
-                child[train_id] = parent2[train_id].copy()
-                
-        return child
-    
-    def _mutate(self, solution):
-        """Mutate a solution"""
-        mutated = solution.copy()
-        
-        for train_id in mutated.keys():
-            if random.random() < 0.3:  # 30% chance to mutate each train
-                mutated[train_id]['departure_time'] = self._random_time_adjustment()
-                mutated[train_id]['route_priority'] = random.randint(1, 10)
-                mutated[train_id]['speed_adjustment'] = random.uniform(0.8, 1.2)
-                
+        child_count = self.population_size - len(elites)
+
+        # Tournament selection
+        parents1 = self._tournament_selection(population, fitness_scores, child_count)
+        parents2 = self._tournament_selection(population, fitness_scores, child_count)
+
+        # Crossover
+        children = self._crossover(population[parents1], population[parents2])
+
+        # Mutation
+        children = self._mutate(children)
+
+        lineage = np.concatenate([
+            np.stack([elite_indices, np.full(len(elite_indices), -1)], axis=1),
+            np.stack([parents1, parents2], axis=1)
+        ])
+        return np.concatenate([elites, children]), lineage
+
+    def _tournament_selection(self, population, fitness_scores, count, tournament_size=3):
+        """Tournament selection for parent selection; returns the population index of each winner"""
+        tournament_indices = self.rng.integers(0, len(population), size=(count, tournament_size))
+        winners = np.argmax(fitness_scores[tournament_indices], axis=1)
+        return tournament_indices[np.arange(count), winners]
+
+    def _crossover(self, parents1, parents2):
+        """Uniform crossover: each train's genes come from either parent"""
+        mask = self.rng.random(parents1.shape[:2]) < 0.5
+        return np.where(mask[:, :, np.newaxis], parents1, parents2)
+
+    def _mutate(self, solutions):
+        """Mutate a batch of solutions"""
+        mutated = solutions.copy()
+
+        mutate_solution = self.rng.random(len(solutions)) < self._mutation_rate
+        mutate_train = self.rng.random(solutions.shape[:2]) < 0.3  # 30% chance to mutate each train
+        mask = mutate_train & mutate_solution[:, np.newaxis]
+
+        # Platform assignment is fixed at initialization and never mutated
+        fresh = self._random_genes(solutions.shape[:2])
+        for gene in (DEPARTURE_TIME, ROUTE_PRIORITY, SPEED_ADJUSTMENT):
+            mutated[:, :, gene] = np.where(mask, fresh[:, :, gene], mutated[:, :, gene])
+
         return mutated
-    
-    def _random_time_adjustment(self):
-        """Generate random time adjustment in minutes"""
-        return random.randint(-15, 15)
-    
+
+    def _random_genes(self, shape):
+        """Generate random scheduling decisions for every (solution, train) slot in shape"""
+        genes = np.empty(shape + (N_GENES,), dtype=np.float64)
+        genes[..., DEPARTURE_TIME] = self.rng.integers(-15, 16, size=shape)  # minutes
+        genes[..., ROUTE_PRIORITY] = self.rng.integers(1, 11, size=shape)
+        platforms = self.platform_counts if self.platform_counts is not None else DEFAULT_PLATFORMS
+        genes[..., PLATFORM_ASSIGNMENT] = np.floor(self.rng.random(shape) * platforms) + 1
+        genes[..., SPEED_ADJUSTMENT] = self.rng.uniform(0.8, 1.2, size=shape)
+        return genes
+
+    def _decode_genes(self, genes):
+        """Convert one train's gene vector into a scheduling decision dict"""
+        return {
+            'departure_time': int(genes[DEPARTURE_TIME]),
+            'route_priority': int(genes[ROUTE_PRIORITY]),
+            'platform_assignment': int(genes[PLATFORM_ASSIGNMENT]),
+            'speed_adjustment': float(genes[SPEED_ADJUSTMENT])
+        }
+
     def _format_solution(self, solution, trains):
         """Format solution for API response"""
         formatted_solution = []
-        
-        for train in trains:
-            if train.id in solution:
-                train_solution = solution[train.id]
-                formatted_solution.append({
-                    'train_id': train.id,
-                    'train_name': train.name,
-                    'original_delay': train.delay_minutes,
-                    'optimized_delay': max(0, train.delay_minutes + train_solution['departure_time']),
-                    'priority': train_solution['route_priority'],
-                    'platform': train_solution['platform_assignment'],
-                    'speed_factor': train_solution['speed_adjustment'],
-                    'recommendation': self._generate_recommendation(train_solution)
-                })
-                
+
+        if solution is None:
+            return formatted_solution
+
+        for train, genes in zip(trains, solution):
+            train_solution = self._decode_genes(genes)
+            formatted_solution.append({
+                'train_id': train.id,
+                'train_name': train.name,
+                'original_delay': train.delay_minutes,
+                'optimized_delay': max(0, train.delay_minutes + train_solution['departure_time']),
+                'priority': train_solution['route_priority'],
+                'platform': train_solution['platform_assignment'],
+                'speed_factor': train_solution['speed_adjustment'],
+                'recommendation': self._generate_recommendation(train_solution)
+            })
+
         return formatted_solution
-    
+
     def _generate_recommendation(self, solution):
         """Generate human-readable recommendation"""
         recommendations = []
-        
+
         if solution['departure_time'] < 0:
             recommendations.append(f"Depart {abs(solution['departure_time'])} min early")
         elif solution['departure_time'] > 0:
             recommendations.append(f"Delay departure by {solution['departure_time']} min")
-            
+
         if solution['speed_adjustment'] > 1.0:
             recommendations.append("Increase speed by {:.1%}".format(solution['speed_adjustment'] - 1))
         elif solution['speed_adjustment'] < 1.0:
             recommendations.append("Reduce speed by {:.1%}".format(1 - solution['speed_adjustment']))
-            
+
         recommendations.append(f"Use platform {solution['platform_assignment']}")
-        
-        return "; ".join(recommendations)
\ No newline at end of file
+
+        return "; ".join(recommendations)
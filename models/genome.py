@@ -0,0 +1,10 @@
+"""Gene layout of the last axis of the GA's (population_size, n_trains, N_GENES) population array"""
+
+DEPARTURE_TIME = 0
+ROUTE_PRIORITY = 1
+PLATFORM_ASSIGNMENT = 2
+SPEED_ADJUSTMENT = 3
+N_GENES = 4
+
+# Platforms assumed at a station the optimizer has no data for
+DEFAULT_PLATFORMS = 4
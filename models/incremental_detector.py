@@ -0,0 +1,300 @@
+from .conflict_detector import ConflictDetector
+
+# Train attributes that feed into each kind of conflict check
+SPATIAL_FIELDS = {'current_position', 'destination', 'speed'}
+TEMPORAL_FIELDS = {'current_position', 'destination', 'speed', 'delay_minutes'}
+JUNCTION_FIELDS = {'current_position'}
+PREDICTED_FIELDS = {'current_position', 'destination', 'speed', 'delay_minutes'}
+
+# Conflict types recomputed per route group or junction rather than per train
+GROUPED_TYPES = {'temporal_conflict', 'junction_conflict'}
+
+class IncrementalConflictDetector(ConflictDetector):
+    """Stateful conflict detector that re-evaluates only what a train update touches.
+
+    The fleet is loaded once; afterwards each update re-checks the spatial
+    bucket (position and head-on movement over a section), the temporal
+    bucket (destination route group) and the junction bucket of the changed
+    train, re-projects its run in the reservation table when looking ahead,
+    and reports the difference as added and removed conflicts. The current conflict list is
+    kept in the same order ConflictDetector.detect_conflicts would produce.
+    """
+
+    def __init__(self, network=None, lookahead_minutes=0, block_length_km=5.0):
+        super().__init__(network, lookahead_minutes, block_length_km)
+        self._reset()
+
+    def _reset(self):
+        self._trains = {}            # train id -> train
+        self._order = {}             # train id -> index in the loaded fleet
+        self._by_position = {}       # position -> set of train ids
+        self._by_movement = {}       # movement key (see ConflictDetector._movement) -> set of train ids
+        self._movements = {}         # train id -> (movement key, opposite movement key)
+        self._by_destination = {}    # destination -> set of train ids
+        self._conflicts = {}         # conflict key -> (sort key, conflict record)
+        self._train_conflicts = {}   # train id -> set of conflict keys
+        self._group_conflicts = {}   # (conflict type, destination or junction) -> set of conflict keys
+        self._reservations = None    # ReservationTable of projected runs when looking ahead
+        self._sorted = None
+
+    def load(self, trains, track_sections=None):
+        """Index a full fleet and compute its conflicts from scratch"""
+        self._reset()
+        self.use_network(track_sections)
+
+        for index, train in enumerate(trains):
+            self._trains[train.id] = train
+            self._order[train.id] = index
+            self._train_conflicts[train.id] = set()
+            self._index(train)
+
+        for train in trains:
+            for key, sort_key, conflict in self._spatial_for(train):
+                if key not in self._conflicts:
+                    self._store(key, sort_key, conflict)
+
+        for destination in self._by_destination:
+            for key, sort_key, conflict in self._temporal_for(destination):
+                self._store(key, sort_key, conflict)
+
+        for position in self._by_position:
+            for key, sort_key, conflict in self._junction_for(position):
+                self._store(key, sort_key, conflict)
+
+        if self.lookahead_minutes > 0 and self.network is not None:
+            self._reservations = self._reservation_table()
+            for train in trains:
+                self._reserve_projection(self._reservations, train)
+            for (first, second), (time, block) in self._reservations.conflicts().items():
+                train1, train2 = self._ordered_pair(self._trains[first], self._trains[second])
+                self._store(*self._predicted_entry(train1, train2, time, block))
+
+        return self.conflicts()
+
+    def detect_conflicts(self, trains, track_sections):
+        """Detect potential conflicts between trains, replacing the loaded state"""
+        return self.load(trains, track_sections)
+
+    def conflicts(self):
+        """Current conflicts in detection order"""
+        if self._sorted is None:
+            ordered = sorted(self._conflicts.values(), key=lambda item: item[0])
+            self._sorted = [conflict for _, conflict in ordered]
+        return self._sorted
+
+    def update(self, train_id, **changes):
+        """Apply a change to one train (e.g. current_position, speed, delay_minutes) and return the conflict diff"""
+        return self.apply_updates([dict(changes, id=train_id)])
+
+    def apply_updates(self, updates):
+        """Apply a batch of train updates ({'id': ..., field: value}) and return the combined conflict diff.
+
+        The diff also lists the ids of the trains that actually changed, and
+        under 'rejected' those whose update held a value the train cannot
+        take (e.g. out of range for a fleet store column); such a train is
+        left exactly as it was. Route groups and junctions touched by several
+        trains of the batch are recomputed once, after every update has been
+        applied.
+        """
+        before = {}
+        changed_trains = []
+        rejected = []
+        dirty_groups = set()     # destinations whose temporal conflicts need recomputing
+        dirty_junctions = set()  # junctions whose junction conflicts need recomputing
+
+        for update in updates:
+            train = self._trains.get(update.get('id'))
+            if train is None:
+                continue
+
+            changed = {field for field, value in update.items()
+                       if field != 'id' and hasattr(train, field) and getattr(train, field) != value}
+            if not changed:
+                continue
+            old_destination = train.destination
+            old_position = train.current_position
+            old_values = {field: getattr(train, field) for field in changed}
+
+            self._unindex(train)
+            try:
+                for field in changed:
+                    setattr(train, field, update[field])
+            except (TypeError, ValueError, OverflowError):
+                for field, value in old_values.items():
+                    setattr(train, field, value)
+                self._index(train)
+                rejected.append(train.id)
+                continue
+            self._index(train)
+            changed_trains.append(train.id)
+
+            # Spatial conflicts of the changed train
+            if changed & SPATIAL_FIELDS:
+                for key in list(self._train_conflicts[train.id]):
+                    if key[0] == 'spatial_conflict':
+                        self._discard(key, before)
+                for key, sort_key, conflict in self._spatial_for(train):
+                    self._replace(key, sort_key, conflict, before)
+
+            # Temporal conflicts of every route group the train left or joined
+            if changed & TEMPORAL_FIELDS:
+                dirty_groups.update((old_destination, train.destination))
+
+            # Junction conflicts of every junction the train left or entered
+            if changed & JUNCTION_FIELDS:
+                dirty_junctions.update((old_position, train.current_position))
+
+            # Predicted conflicts of the train's re-projected run
+            if changed & PREDICTED_FIELDS and self._reservations is not None:
+                for key in list(self._train_conflicts[train.id]):
+                    if key[0] == 'predicted_conflict':
+                        self._discard(key, before)
+                self._reservations.release(train.id)
+                self._reserve_projection(self._reservations, train)
+                for other_id, (time, block) in self._reservations.conflicts_of(train.id).items():
+                    train1, train2 = self._ordered_pair(train, self._trains[other_id])
+                    self._replace(*self._predicted_entry(train1, train2, time, block), before)
+
+        for destination in dirty_groups:
+            self._refresh_group('temporal_conflict', destination, self._temporal_for(destination), before)
+        for junction in dirty_junctions:
+            self._refresh_group('junction_conflict', junction, self._junction_for(junction), before)
+
+        return dict(self._diff(before), trains=changed_trains, rejected=rejected)
+
+    def _index(self, train):
+        """Add a train to the position, movement and destination buckets"""
+        movements = self._movement(train.current_position, train.destination)
+        self._movements[train.id] = movements
+        self._by_position.setdefault(train.current_position, set()).add(train.id)
+        self._by_movement.setdefault(movements[0], set()).add(train.id)
+        self._by_destination.setdefault(train.destination, set()).add(train.id)
+
+    def _unindex(self, train):
+        """Remove a train from the position, movement and destination buckets"""
+        for bucket, key in ((self._by_position, train.current_position),
+                            (self._by_movement, self._movements[train.id][0]),
+                            (self._by_destination, train.destination)):
+            members = bucket.get(key)
+            if members is not None:
+                members.discard(train.id)
+                if not members:
+                    del bucket[key]
+
+    def _ordered_pair(self, train, other):
+        """Order two trains the way a full scan over the fleet would pair them"""
+        if self._order[train.id] < self._order[other.id]:
+            return train, other
+        return other, train
+
+    def _spatial_for(self, train):
+        """Spatial conflicts between a train and the trains sharing its buckets"""
+        candidates = set(self._by_position.get(train.current_position, ()))
+        movement, opposite = self._movements[train.id]
+        if opposite != movement:
+            candidates |= self._by_movement.get(opposite, set())
+        candidates.discard(train.id)
+
+        found = []
+        for other_id in candidates:
+            train1, train2 = self._ordered_pair(train, self._trains[other_id])
+            key = ('spatial_conflict', train1.id, train2.id)
+            sort_key = (0, 0, self._order[train1.id], self._order[train2.id])
+            found.append((key, sort_key, self._spatial_conflict(train1, train2)))
+        return found
+
+    def _junction_for(self, junction):
+        """Junction conflicts between all trains at one junction"""
+        members = self._by_position.get(junction)
+        if not members or len(members) < 2 or not self._is_junction(junction):
+            return []
+
+        trains_at_junction = sorted((self._trains[train_id] for train_id in members), key=lambda t: self._order[t.id])
+        first = self._order[trains_at_junction[0].id]
+
+        found = []
+        for i, train1 in enumerate(trains_at_junction):
+            for train2 in trains_at_junction[i+1:]:
+                key = ('junction_conflict', junction, train1.id, train2.id)
+                sort_key = (2, first, self._order[train1.id], self._order[train2.id])
+                found.append((key, sort_key, self._junction_conflict(junction, train1, train2)))
+        return found
+
+    def _temporal_for(self, destination):
+        """Temporal conflicts within one destination route group"""
+        members = self._by_destination.get(destination)
+        if not members or len(members) < 2:
+            return []
+
+        route_trains = sorted((self._trains[train_id] for train_id in members), key=lambda t: self._order[t.id])
+        first = self._order[route_trains[0].id]
+        route_trains.sort(key=self._expected_arrival)
+
+        found = []
+        for i in range(len(route_trains) - 1):
+            train1 = route_trains[i]
+            train2 = route_trains[i + 1]
+            time_gap = self._calculate_time_gap(train1, train2)
+            if time_gap < self.safety_buffer:
+                key = ('temporal_conflict', destination, train1.id, train2.id)
+                found.append((key, (1, first, i, 0), self._temporal_conflict(train1, train2, time_gap)))
+        return found
+
+    def _predicted_entry(self, train1, train2, time, block):
+        """Key, sort key and record of a predicted conflict between two ordered trains"""
+        key = ('predicted_conflict', train1.id, train2.id)
+        sort_key = (3, 0, self._order[train1.id], self._order[train2.id])
+        return key, sort_key, self._predicted_conflict(train1, train2, time, block, self._reservations)
+
+    def _store(self, key, sort_key, conflict):
+        """Record a conflict and index it by its trains"""
+        self._conflicts[key] = (sort_key, conflict)
+        for train_id in conflict['trains']:
+            self._train_conflicts[train_id].add(key)
+        if key[0] in GROUPED_TYPES:
+            self._group_conflicts.setdefault(key[:2], set()).add(key)
+        self._sorted = None
+
+    def _discard(self, key, before):
+        """Drop a conflict, remembering its previous state for the diff"""
+        entry = self._conflicts.pop(key, None)
+        if entry is None:
+            return
+        before.setdefault(key, entry[1])
+        for train_id in entry[1]['trains']:
+            self._train_conflicts[train_id].discard(key)
+        if key[0] in GROUPED_TYPES:
+            self._group_conflicts[key[:2]].discard(key)
+        self._sorted = None
+
+    def _refresh_group(self, conflict_type, group, found, before):
+        """Replace every conflict of one route group or junction with a recomputed set"""
+        for key in list(self._group_conflicts.get((conflict_type, group), ())):
+            self._discard(key, before)
+        for key, sort_key, conflict in found:
+            self._replace(key, sort_key, conflict, before)
+
+    def _replace(self, key, sort_key, conflict, before):
+        """Store a recomputed conflict, remembering its previous state for the diff"""
+        if key in self._conflicts:
+            before.setdefault(key, self._conflicts[key][1])
+        else:
+            before.setdefault(key, None)
+        self._store(key, sort_key, conflict)
+
+    def _diff(self, before):
+        """Compare touched conflicts with their previous state"""
+        added = []
+        removed = []
+
+        for key, old in before.items():
+            entry = self._conflicts.get(key)
+            new = entry[1] if entry is not None else None
+            if old == new:
+                continue
+            if old is not None:
+                removed.append(old)
+            if new is not None:
+                added.append(new)
+
+        return {'added': added, 'removed': removed}
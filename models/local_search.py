@@ -0,0 +1,163 @@
+import time
+
+import numpy as np
+
+from .genome import DEPARTURE_TIME, PLATFORM_ASSIGNMENT, SPEED_ADJUSTMENT
+
+# Gene bounds the moves stay within (the ranges GeneticOptimizer draws from)
+DEPARTURE_RANGE = (-15, 15)
+SPEED_RANGE = (0.8, 1.2)
+
+class LocalSearchRefiner:
+    """Best-improvement hill climbing on one genome, run after the GA.
+
+    For each train in turn, every move touching it is scored at once with
+    delta evaluation: only the train terms of the trains that move and the
+    penalty of the sections they run on are recomputed, against the cached
+    terms of the current genome. The best improving move is applied. The
+    search stops at a local optimum (a full pass without improvement) or
+    when the time budget runs out.
+
+    Moves: shift the departure by +/-1 minute, step the speed factor by
+    +/-speed_step, and swap platforms with up to max_swaps trains on the
+    same section. Moves that would put a section over capacity or a
+    platform outside its station's domain are never made, so a repaired
+    genome stays feasible.
+    """
+
+    def __init__(self, time_budget=0.5, speed_step=0.05, max_swaps=4, max_passes=50, seed=None):
+        self.time_budget = time_budget
+        self.speed_step = speed_step
+        self.max_swaps = max_swaps
+        self.max_passes = max_passes
+        self.rng = np.random.default_rng(seed)
+
+    def refine(self, genes, evaluator):
+        """Improve one (n_trains, n_genes) genome; returns (refined genes, statistics)"""
+        started = time.perf_counter()
+        deadline = started + self.time_budget
+        genes = genes.copy()
+        n_trains = len(genes)
+
+        train_terms = evaluator.train_terms(genes[np.newaxis])[0]
+        section_terms = np.array([evaluator.section_penalty(genes[np.newaxis, members], section)[0]
+                                  for section, members in enumerate(evaluator.section_trains)])
+
+        evaluated = applied = passes = 0
+        improvement = 0.0
+        local_optimum = False
+
+        while passes < self.max_passes and time.perf_counter() < deadline:
+            passes += 1
+            improved = False
+
+            # Worst-scoring trains first: they have the most to gain
+            for train in np.argsort(train_terms).tolist():
+                if time.perf_counter() >= deadline:
+                    break
+
+                candidates, moved = self._moves(genes, train, evaluator)
+                if not len(candidates):
+                    continue
+                evaluated += len(candidates)
+
+                delta, new_train_terms, new_section_term = self._deltas(
+                    genes, candidates, moved, train, evaluator, train_terms, section_terms)
+                best = int(np.argmax(delta))
+                if delta[best] <= 1e-9:
+                    continue
+
+                genes[moved[best]] = candidates[best]
+                train_terms[moved[best]] = new_train_terms[best]
+                section = evaluator.sections[train]
+                if section >= 0:
+                    section_terms[section] = new_section_term[best]
+                improvement += float(delta[best])
+                applied += 1
+                improved = True
+
+            if not improved:
+                local_optimum = n_trains > 0
+                break
+
+        return genes, {
+            'moves_evaluated': evaluated,
+            'moves_applied': applied,
+            'passes': passes,
+            'improvement': improvement,
+            'local_optimum': local_optimum,
+            'elapsed_seconds': round(time.perf_counter() - started, 4)
+        }
+
+    def _moves(self, genes, train, evaluator):
+        """Candidate gene rows for the trains a move touches: (candidates (k, 2, n_genes), [train, partner])
+
+        Single-train moves repeat the train's new row as their own partner, so
+        every move has the same shape.
+        """
+        section = evaluator.sections[train]
+        partners = []
+        if section >= 0 and self.max_swaps > 0:
+            # Partners whose platform differs and fits both trains' platform domains
+            others = evaluator.section_trains[section]
+            platforms = evaluator.platform_counts
+            others = others[(others != train) &
+                            (genes[others, PLATFORM_ASSIGNMENT] != genes[train, PLATFORM_ASSIGNMENT]) &
+                            (genes[others, PLATFORM_ASSIGNMENT] <= platforms[train]) &
+                            (genes[train, PLATFORM_ASSIGNMENT] <= platforms[others])]
+            if len(others) > self.max_swaps:
+                others = self.rng.choice(others, self.max_swaps, replace=False)
+            partners = others.tolist()
+
+        own = genes[train]
+        rows = []
+        for shift in (-1, 1):
+            departure = own[DEPARTURE_TIME] + shift
+            # Departures held beyond the range by capacity repair may still move back towards it
+            if DEPARTURE_RANGE[0] <= departure <= max(DEPARTURE_RANGE[1], own[DEPARTURE_TIME]):
+                row = own.copy()
+                row[DEPARTURE_TIME] = departure
+                rows.append((row, row, train))
+        for step in (-self.speed_step, self.speed_step):
+            speed = min(SPEED_RANGE[1], max(SPEED_RANGE[0], own[SPEED_ADJUSTMENT] + step))
+            if speed != own[SPEED_ADJUSTMENT]:
+                row = own.copy()
+                row[SPEED_ADJUSTMENT] = speed
+                rows.append((row, row, train))
+
+        # Swaps touch two trains: each candidate carries both rows, grouped by partner
+        swaps = []
+        for partner in partners:
+            row, other = own.copy(), genes[partner].copy()
+            row[PLATFORM_ASSIGNMENT], other[PLATFORM_ASSIGNMENT] = other[PLATFORM_ASSIGNMENT], row[PLATFORM_ASSIGNMENT]
+            swaps.append((row, other, partner))
+
+        candidates = [(np.stack([row, other]), partner) for row, other, partner in rows + swaps]
+        if not candidates:
+            return np.empty((0, 2, genes.shape[1])), None
+        return np.stack([c for c, _ in candidates]), np.array([[train, p] for _, p in candidates])
+
+    def _deltas(self, genes, candidates, moved, train, evaluator, train_terms, section_terms):
+        """Fitness change of every candidate, with the new terms of the moved trains and section"""
+        # Train terms of both slots; a single-train move counts its one train once
+        new_train_terms = evaluator.train_terms(candidates, moved)
+        single = moved[:, 0] == moved[:, 1]
+        old = train_terms[moved]
+        delta = (new_train_terms[:, 0] - old[:, 0]) + np.where(single, 0.0, new_train_terms[:, 1] - old[:, 1])
+
+        # Swap partners share the train's section, so each move re-scores that one section
+        section = evaluator.sections[train]
+        new_section_term = np.zeros(len(candidates))
+        if section >= 0:
+            members = evaluator.section_trains[section]
+            member_genes = np.broadcast_to(genes[members], (len(candidates),) + genes[members].shape).copy()
+            for slot in (0, 1):
+                positions = np.searchsorted(members, moved[:, slot])
+                member_genes[np.arange(len(candidates)), positions] = candidates[:, slot]
+            new_section_term = evaluator.section_penalty(member_genes, section)
+            delta += new_section_term - section_terms[section]
+
+            # Never trade a capacity violation for a better score elsewhere
+            delta[evaluator.section_excess(member_genes, section) > 0] = -np.inf
+
+        return delta, new_train_terms, new_section_term
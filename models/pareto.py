@@ -0,0 +1,78 @@
+import numpy as np
+
+def non_dominated_ranks(objectives, violations=None):
+    """Pareto front index (0 = non-dominated) of every row of an (n, k) objective matrix, all minimized.
+
+    Uses constrained domination: a feasible row (violation 0) dominates any
+    infeasible one, and of two infeasible rows the smaller violation wins.
+    The dominance relation is built as one boolean matrix and fronts are
+    peeled off with vectorized count updates, so the O(n^2) work stays in
+    NumPy rather than in Python loops.
+    """
+    n = len(objectives)
+    if violations is None:
+        violations = np.zeros(n)
+
+    # One (n, n) comparison per objective rather than an (n, n, k) block
+    no_worse = np.ones((n, n), dtype=bool)
+    better = np.zeros((n, n), dtype=bool)
+    for column in objectives.T:
+        no_worse &= column[:, np.newaxis] <= column[np.newaxis, :]
+        better |= column[:, np.newaxis] < column[np.newaxis, :]
+    pareto = no_worse & better
+
+    feasible = violations <= 0
+    both_feasible = feasible[:, np.newaxis] & feasible[np.newaxis, :]
+    one_feasible = feasible[:, np.newaxis] ^ feasible[np.newaxis, :]
+    dominates = np.where(both_feasible, pareto,
+                         np.where(one_feasible, feasible[:, np.newaxis],
+                                  violations[:, np.newaxis] < violations[np.newaxis, :]))
+
+    # dominates[i, j]: row i dominates row j; a row joins a front once nothing left dominates it
+    dominated_by = dominates.sum(axis=0)
+    ranks = np.full(n, -1, dtype=np.intp)
+    front = np.flatnonzero(dominated_by == 0)
+    rank = 0
+    while len(front):
+        ranks[front] = rank
+        dominated_by -= dominates[front].sum(axis=0)
+        dominated_by[ranks >= 0] = -1
+        front = np.flatnonzero(dominated_by == 0)
+        rank += 1
+    return ranks
+
+def crowding_distances(objectives, ranks):
+    """Crowding distance of every row within its front (boundary rows get infinity)"""
+    n, k = objectives.shape
+    distances = np.zeros(n)
+    if n == 0:
+        return distances
+
+    for m in range(k):
+        values = objectives[:, m]
+        # Sorted by front, then by this objective: neighbours in a front are adjacent
+        order = np.lexsort((values, ranks))
+        sorted_values = values[order]
+        sorted_ranks = ranks[order]
+
+        first = np.r_[True, sorted_ranks[1:] != sorted_ranks[:-1]]
+        last = np.r_[sorted_ranks[1:] != sorted_ranks[:-1], True]
+
+        # Objective span of each front, for normalization
+        front_ids = np.cumsum(first) - 1
+        span = (sorted_values[last] - sorted_values[first])[front_ids]
+
+        gap = np.zeros(n)
+        inner = ~(first | last)
+        gap[inner] = (sorted_values[2:] - sorted_values[:-2])[inner[1:-1]]
+        contribution = np.where(span > 0, gap / np.where(span > 0, span, 1.0), 0.0)
+        contribution[first | last] = np.inf
+        distances[order] += contribution
+    return distances
+
+def select_survivors(objectives, violations, count):
+    """Indices of the count best rows by (front, descending crowding distance), with their ranks and distances"""
+    ranks = non_dominated_ranks(objectives, violations)
+    distances = crowding_distances(objectives, ranks)
+    order = np.lexsort((-distances, ranks))[:count]
+    return order, ranks[order], distances[order]
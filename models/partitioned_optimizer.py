@@ -0,0 +1,278 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .conflict_graph import ConflictGraph
+from .fitness import FitnessEvaluator
+from .genetic_optimizer import GeneticOptimizer
+from .genome import ROUTE_PRIORITY, PLATFORM_ASSIGNMENT, SPEED_ADJUSTMENT, N_GENES
+
+# (optimizer factory, region trains, region conflicts, track sections, stations, network) of the run a worker
+# process serves
+_partition = None
+
+def _init_worker(*partition):
+    global _partition
+    _partition = partition
+
+def _optimize_region(index, partition=None):
+    """(index, best genes, run statistics) of one region's GA run"""
+    optimizer_factory, regions, region_conflicts, track_sections, stations, network = partition or _partition
+    optimizer = optimizer_factory()
+    optimizer.optimize(regions[index], track_sections, region_conflicts[index], stations=stations, network=network)
+    return index, optimizer.last_solution, optimizer.last_run_stats
+
+def partition_trains(sections, conflict_pairs, max_region_trains):
+    """Split train indices into regions of at most max_region_trains that can be optimized apart.
+
+    Trains are joined when they run on the same section (the fitness
+    couples them there) or share a conflict. Components without any
+    conflict need no optimization and are returned separately. Conflicted
+    components are packed into regions, largest first; a component larger
+    than max_region_trains is split between whole sections, cutting only
+    conflict links. Returns (regions, conflict-free train indices, indices
+    of boundary trains whose conflict partner is in another region).
+    """
+    n = len(sections)
+    parent = np.arange(n)
+    if n == 0:
+        return [], np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    # Trains on a section start out under its first train, a forest of depth one
+    on_section = np.flatnonzero(sections >= 0)
+    first = {}
+    for train, section in zip(on_section.tolist(), sections[on_section].tolist()):
+        parent[train] = first.setdefault(section, train)
+
+    def find(train):
+        while parent[train] != train:
+            parent[train] = parent[parent[train]]
+            train = parent[train]
+        return train
+
+    for a, b in conflict_pairs:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    # Flatten to component labels
+    while True:
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            break
+        parent = grandparent
+
+    pairs = np.array(conflict_pairs, dtype=np.intp).reshape(-1, 2)
+    conflicted = np.zeros(n, dtype=bool)
+    conflicted[parent[pairs[:, 0]]] = True
+
+    order = np.argsort(parent, kind='stable')
+    labels = parent[order]
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    components = np.split(order, starts[1:])
+
+    # Units that are never split: small conflicted components, and the sections of large ones
+    units = []
+    free = []
+    for component in components:
+        if not conflicted[parent[component[0]]]:
+            free.append(component)
+        elif len(component) <= max_region_trains:
+            units.append(component)
+        else:
+            keys = np.where(sections[component] >= 0, sections[component], -1 - component)
+            component = component[np.argsort(keys, kind='stable')]
+            keys = np.sort(keys, kind='stable')
+            units.extend(np.split(component, np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+
+    # Next-fit decreasing packing of the units into regions
+    regions = []
+    current = []
+    size = 0
+    for unit in sorted(units, key=len, reverse=True):
+        if current and size + len(unit) > max_region_trains:
+            regions.append(np.sort(np.concatenate(current)))
+            current, size = [], 0
+        current.append(unit)
+        size += len(unit)
+    if current:
+        regions.append(np.sort(np.concatenate(current)))
+
+    region_of = np.full(n, -1, dtype=np.intp)
+    for index, region in enumerate(regions):
+        region_of[region] = index
+    cut = region_of[pairs[:, 0]] != region_of[pairs[:, 1]]
+    boundary = np.unique(pairs[cut])
+
+    kept = np.sort(np.concatenate(free)) if free else np.empty(0, dtype=np.intp)
+    return regions, kept, boundary
+
+class PartitionedOptimizer:
+    """Optimizes a large fleet region by region instead of as one genome.
+
+    The fleet is split with partition_trains into regions of loosely coupled
+    trains, and a separate GA (from optimizer_factory) runs on every region
+    that has a conflict, in forked worker processes. Other trains are not
+    re-optimized: they keep the genes of the previous run (warm_state) while
+    their inputs are unchanged, and the current plan otherwise; so does a
+    conflicted region whose trains were all planned by the previous run and
+    have not changed since. Because regions never split a section, the
+    region fitnesses add up to the fleet's; the merged schedule is then
+    reconciled as a whole: capacity repair, and the factory optimizer's
+    local search when it has one, which also covers boundary trains whose
+    detector conflicts were cut between regions.
+
+    Regions are started most urgent first, by the ConflictGraph ranking of
+    their conflict clusters. Takes the same optimize() arguments as
+    GeneticOptimizer, so either can serve the API and the job manager.
+    """
+
+    def __init__(self, optimizer_factory, max_region_trains=200, max_workers=0):
+        self.optimizer_factory = optimizer_factory
+        self.max_region_trains = max_region_trains
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.last_run_stats = None
+        self.last_solution = None
+        self.last_trace = None
+        self.warm_state = None
+
+    def optimize(self, trains, track_sections, conflicts, progress_callback=None, stations=None,
+                 return_trace=False):
+        """Optimize every conflicted region and merge the results into one schedule.
+
+        progress_callback gets one update per finished region (generation =
+        regions done, generations = regions to optimize). The trace lists
+        per-region runs.
+        """
+        started = time.perf_counter()
+        optimizer = self.optimizer_factory()
+        evaluator = FitnessEvaluator(trains, track_sections, stations=stations)
+
+        train_ids = GeneticOptimizer._train_ids(trains)
+        rows = {train_id: row for row, train_id in enumerate(train_ids)}
+        # One edge per conflicting pair, however many checks reported it
+        graph = ConflictGraph(conflicts)
+        linked = [(edge, rows[edge['trains'][0]], rows[edge['trains'][1]]) for edge in graph.edges
+                  if edge['trains'][0] in rows and edge['trains'][1] in rows]
+        regions, kept, boundary = partition_trains(evaluator.sections, [(a, b) for _, a, b in linked],
+                                                   self.max_region_trains)
+
+        signatures = GeneticOptimizer._train_signatures(trains)
+        genes, known = self._kept_genes(train_ids, signatures, evaluator)
+        reused = [region for region in regions if known[region].all()]
+        regions = [region for region in regions if not known[region].all()]
+
+        # Most urgent regions first (by their most urgent conflict cluster), so they are started first
+        cluster_rank = {cluster: rank for rank, cluster in enumerate(graph.urgency_order())}
+        regions.sort(key=lambda region: min((cluster_rank[graph.cluster_of(train_ids[row])['cluster']]
+                                             for row in region.tolist() if train_ids[row] in graph),
+                                            default=len(cluster_rank)))
+
+        region_trains = [[trains[row] for row in region.tolist()] for region in regions]
+        region_conflicts = [[] for _ in regions]
+        region_of = np.full(len(train_ids), -1, dtype=np.intp)
+        for index, region in enumerate(regions):
+            region_of[region] = index
+        for edge, a, b in linked:
+            if region_of[a] >= 0 and region_of[a] == region_of[b]:
+                region_conflicts[region_of[a]].append(edge)
+
+        trace = []
+        for index, solution, statistics in self._run_regions(region_trains, region_conflicts, track_sections,
+                                                              stations, evaluator.network):
+            if solution is not None:
+                genes[regions[index]] = solution
+            trace.append({
+                'region': index,
+                'trains': len(regions[index]),
+                'conflict_pairs': len(region_conflicts[index]),
+                'generations': statistics.get('generations'),
+                'best_fitness': statistics.get('best_fitness'),
+                'stop_reason': statistics.get('stop_reason'),
+                'elapsed_seconds': statistics.get('elapsed_seconds')
+            })
+            if progress_callback is not None:
+                progress_callback({
+                    'generation': len(trace),
+                    'generations': len(regions),
+                    'best_fitness': statistics.get('best_fitness')
+                })
+
+        # Reconcile the merged schedule across region boundaries
+        repaired = evaluator.repair(genes[np.newaxis])
+        local_search_stats = None
+        if optimizer.local_search is not None and len(train_ids):
+            genes, local_search_stats = optimizer.local_search.refine(genes, evaluator)
+
+        self.last_run_stats = {
+            'conflict_clusters': len(graph.clusters),
+            'regions': len(regions),
+            'reused_regions': len(reused),
+            'largest_region': max((len(region) for region in regions), default=0),
+            'optimized_trains': int(sum(len(region) for region in regions)),
+            'kept_trains': len(kept) + int(sum(len(region) for region in reused)),
+            'boundary_trains': len(boundary),
+            'workers': min(self.max_workers, len(regions)),
+            'repaired_genomes': repaired,
+            'best_fitness': float(evaluator.evaluate(genes[np.newaxis])[0]) if len(train_ids) else 0.0,
+            'elapsed_seconds': round(time.perf_counter() - started, 3),
+            'local_search': local_search_stats
+        }
+        self.warm_state = {
+            'columns': rows,
+            'signatures': signatures,
+            'genes': genes
+        }
+        self.last_solution = genes
+        self.last_trace = sorted(trace, key=lambda entry: entry['region'])
+
+        schedule = optimizer._format_solution(genes, trains)
+        return (schedule, self.last_trace) if return_trace else schedule
+
+    def optimize_pareto(self, trains, track_sections, conflicts, **kwargs):
+        """Multi-objective runs are not decomposed: one GeneticOptimizer.optimize_pareto over the fleet"""
+        optimizer = self.optimizer_factory()
+        solutions = optimizer.optimize_pareto(trains, track_sections, conflicts, **kwargs)
+        self.last_run_stats = optimizer.last_run_stats
+        return solutions
+
+    def _kept_genes(self, train_ids, signatures, evaluator):
+        """Genes for every train, the previous run's where its inputs are unchanged and the current plan
+        otherwise, with the mask of trains that got the previous run's"""
+        known = np.zeros(len(train_ids), dtype=bool)
+        genes = np.zeros((len(train_ids), N_GENES))
+        genes[:, ROUTE_PRIORITY] = np.clip(evaluator.priorities, 1, 10)
+        genes[:, PLATFORM_ASSIGNMENT] = 1
+        genes[:, SPEED_ADJUSTMENT] = 1.0
+
+        if self.warm_state is not None:
+            previous_columns = self.warm_state['columns']
+            previous_signatures = self.warm_state['signatures']
+            previous_genes = self.warm_state['genes']
+            for row, (train_id, signature) in enumerate(zip(train_ids, signatures)):
+                column = previous_columns.get(train_id)
+                if column is not None and previous_signatures[column] == signature:
+                    genes[row] = previous_genes[column]
+                    known[row] = True
+        return genes, known
+
+    def _run_regions(self, region_trains, region_conflicts, track_sections, stations, network):
+        """Yield (index, genes, statistics) per region as it finishes; the regions share one network"""
+        partition = (self.optimizer_factory, region_trains, region_conflicts, track_sections, stations, network)
+        workers = min(self.max_workers, len(region_trains))
+
+        if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'),
+                                       initializer=_init_worker, initargs=partition)
+            try:
+                futures = [pool.submit(_optimize_region, index) for index in range(len(region_trains))]
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            for index in range(len(region_trains)):
+                yield _optimize_region(index, partition)
@@ -0,0 +1,234 @@
+import hashlib
+import heapq
+import math
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+class RailNetwork:
+    """Track graph of the railway: stations are nodes, track sections are edges.
+
+    Nodes get integer ids (stations first, in the given order, then any
+    section end not listed as a station). Adjacency is kept as CSR arrays:
+    the neighbours of node u are indices[indptr[u]:indptr[u+1]], with the
+    section lengths in weights and the section index in edge_sections.
+
+    Shortest distances come from Dijkstra searches that stop once the
+    target is settled and are memoized per (source, target) pair. For
+    networks small enough to hold it, precompute() builds the full
+    distance table (optionally stored on disk) so every lookup is O(1).
+    """
+
+    def __init__(self, track_sections, stations=(), cache_size=65536):
+        self.names = []
+        self.node_ids = {}
+        for station in stations:
+            self._node(station.name)
+
+        starts = np.array([self._node(section.start_station) for section in track_sections], dtype=np.intp)
+        ends = np.array([self._node(section.end_station) for section in track_sections], dtype=np.intp)
+        self.lengths = np.array([section.length_km for section in track_sections], dtype=np.float64)
+        self.section_starts = starts
+        self.section_ends = ends
+        self.section_ids = [section.id for section in track_sections]
+        self.n_nodes = len(self.names)
+        self.n_sections = len(track_sections)
+
+        # Section joining two adjacent nodes and the direction it is run in (shortest if parallel)
+        self._sections_between = {}
+        for s in np.argsort(-self.lengths, kind='stable'):
+            a, b = int(starts[s]), int(ends[s])
+            self._sections_between[(a, b)] = (int(s), 0)
+            self._sections_between[(b, a)] = (int(s), 1)
+
+        # CSR adjacency, every section in both directions
+        sources = np.concatenate([starts, ends])
+        order = np.argsort(sources, kind='stable')
+        self.indices = np.concatenate([ends, starts])[order]
+        self.weights = np.concatenate([self.lengths, self.lengths])[order]
+        self.edge_sections = np.concatenate([np.arange(self.n_sections)] * 2)[order]
+        self.indptr = np.zeros(self.n_nodes + 1, dtype=np.intp)
+        np.cumsum(np.bincount(sources, minlength=self.n_nodes), out=self.indptr[1:])
+
+        # The same adjacency as plain lists, which the heap-based searches iterate much faster
+        bounds = self.indptr.tolist()
+        edges = list(zip(self.indices.tolist(), self.weights.tolist(), self.edge_sections.tolist()))
+        self._adjacency = [edges[bounds[u]:bounds[u + 1]] for u in range(self.n_nodes)]
+
+        self.cache_size = cache_size
+        self._routes = OrderedDict()  # (source, target) -> (distance, first section, direction)
+        self._paths = OrderedDict()   # (source, target) -> ((section, direction), ...) along the route
+        self.table = None             # full distance table once precomputed
+
+    def _node(self, name):
+        node = self.node_ids.get(name)
+        if node is None:
+            node = len(self.names)
+            self.names.append(name)
+            self.node_ids[name] = node
+        return node
+
+    def node_id(self, name):
+        """Integer id of a station, or -1 if it is not on the network"""
+        return self.node_ids.get(name, -1)
+
+    def section_between(self, a, b):
+        """(section index, direction) of the section joining two adjacent stations, or (-1, 0)"""
+        return self._sections_between.get((self.node_id(a), self.node_id(b)), (-1, 0))
+
+    def distance(self, a, b):
+        """Length in km of the shortest route between two stations (inf if there is none)"""
+        source, target = self.node_id(a), self.node_id(b)
+        if source < 0 or target < 0:
+            return math.inf
+        if self.table is not None:
+            return float(self.table[source, target])
+        return self._route(source, target)[0]
+
+    def first_section(self, a, b):
+        """(section index, direction) of the first section on the shortest route from a to b, or (-1, 0)"""
+        source, target = self.node_id(a), self.node_id(b)
+        if source < 0 or target < 0 or source == target:
+            return (-1, 0)
+        # Not the direct section between adjacent stations: a multi-hop route can be shorter
+        return self._route(source, target)[1:]
+
+    def path(self, a, b):
+        """Station names along the shortest route from a to b (empty if there is none)"""
+        source, target = self.node_id(a), self.node_id(b)
+        if source < 0 or target < 0:
+            return []
+
+        distances, previous = self._search(source, target)
+        if target not in distances:
+            return []
+
+        nodes = [target]
+        while nodes[-1] != source:
+            nodes.append(previous[nodes[-1]][0])
+        return [self.names[node] for node in reversed(nodes)]
+
+    def route(self, a, b, avoid=None):
+        """(section index, direction) of every section along the shortest route from a to b.
+
+        Routes over the whole network are memoized; with avoid (a set of
+        section indices, e.g. closed track) the search skips those sections
+        and the result is not cached. Empty if there is no route.
+        """
+        source, target = self.node_id(a), self.node_id(b)
+        if source < 0 or target < 0 or source == target:
+            return ()
+
+        key = (source, target)
+        if not avoid:
+            sections = self._paths.get(key)
+            if sections is not None:
+                self._paths.move_to_end(key)
+                return sections
+
+        distances, previous = self._search(source, target, avoid)
+        steps = []
+        node = target
+        while target in distances and node != source:
+            node, section = previous[node]
+            steps.append((section, 0 if self.section_starts[section] == node else 1))
+        sections = tuple(reversed(steps))
+
+        if not avoid:
+            self._paths[key] = sections
+            if len(self._paths) > self.cache_size:
+                self._paths.popitem(last=False)
+        return sections
+
+    def _route(self, source, target):
+        """Memoized (distance, first section, direction) of the shortest route"""
+        key = (source, target)
+        route = self._routes.get(key)
+        if route is not None:
+            self._routes.move_to_end(key)
+            return route
+
+        distances, previous = self._search(source, target)
+        if target not in distances:
+            route = (math.inf, -1, 0)
+        elif source == target:
+            route = (0.0, -1, 0)
+        else:
+            node = target
+            while previous[node][0] != source:
+                node = previous[node][0]
+            section = previous[node][1]
+            route = (distances[target], section, 0 if self.section_starts[section] == source else 1)
+
+        self._routes[key] = route
+        if len(self._routes) > self.cache_size:
+            self._routes.popitem(last=False)
+        return route
+
+    def _search(self, source, target=None, avoid=None):
+        """Dijkstra from source over the CSR arrays, stopping once target is settled.
+
+        Sections in avoid are not used. Returns the settled distances and,
+        per reached node, the (previous node, section index) it was reached
+        through.
+        """
+        adjacency = self._adjacency
+        distances = {}
+        tentative = {source: 0.0}
+        previous = {}
+        heap = [(0.0, source)]
+
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if node in distances:
+                continue
+            distances[node] = distance
+            if node == target:
+                break
+
+            for neighbour, weight, section in adjacency[node]:
+                if avoid and section in avoid:
+                    continue
+                candidate = distance + weight
+                if neighbour not in distances and candidate < tentative.get(neighbour, math.inf):
+                    tentative[neighbour] = candidate
+                    previous[neighbour] = (node, section)
+                    heapq.heappush(heap, (candidate, neighbour))
+
+        return distances, previous
+
+    def fingerprint(self):
+        """Digest of the node names and sections, identifying a precomputed distance table"""
+        digest = hashlib.blake2b(digest_size=12)
+        digest.update('\n'.join(self.names).encode('utf-8'))
+        for array in (self.indptr, self.indices, self.weights):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    def precompute(self, cache_dir=None):
+        """Build the all-pairs distance table (float32, inf where unreachable).
+
+        With cache_dir, the table is stored as <cache_dir>/rail_network_<fingerprint>.npy
+        and later runs on the same network memory-map it instead of recomputing.
+        """
+        path = None
+        if cache_dir:
+            path = os.path.join(cache_dir, f"rail_network_{self.fingerprint()}.npy")
+            if os.path.exists(path):
+                self.table = np.load(path, mmap_mode='r')
+                return self.table
+
+        table = np.full((self.n_nodes, self.n_nodes), np.inf, dtype=np.float32)
+        for source in range(self.n_nodes):
+            distances, _ = self._search(source)
+            table[source, list(distances)] = list(distances.values())
+
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(temporary, table)
+            os.replace(temporary, path)
+
+        self.table = table
+        return table
@@ -0,0 +1,419 @@
+import heapq
+import math
+import time
+
+from .fleet_store import FleetStore
+
+# Fields of a simulated train, in the order ScenarioState.trains() returns them
+TRAIN_FIELDS = ('id', 'current_position', 'destination', 'priority', 'speed', 'delay_minutes')
+
+# Event kinds, in the order they are handled at equal times: a train leaving a
+# section frees its track before a queued train takes it, before new arrivals try
+EXIT, RESUME, READY = 0, 1, 2
+
+class ScenarioState:
+    """Copy-on-write view of the fleet with one scenario's changes on top.
+
+    The base fleet (normally a FleetStore snapshot) is shared and never
+    modified: changed trains are kept as per-field overrides, added trains
+    in their own list, and closures and speed restrictions as section
+    rules. Creating or cloning a state costs nothing per train, so many
+    scenarios can run against the same base.
+    """
+
+    def __init__(self, fleet):
+        self.fleet = fleet
+        self.overrides = {}      # train id -> {field: value}
+        self.extra_trains = []   # field tuples of added trains
+        self.closures = []       # (section index, start minute, end minute)
+        self.speed_limits = []   # (section index or -1 for every section, max km/h, start, end)
+
+    def clone(self):
+        """Another state on the same base fleet, with copies of this one's changes"""
+        clone = ScenarioState(self.fleet)
+        clone.overrides = {train_id: dict(fields) for train_id, fields in self.overrides.items()}
+        clone.extra_trains = list(self.extra_trains)
+        clone.closures = list(self.closures)
+        clone.speed_limits = list(self.speed_limits)
+        return clone
+
+    def _base_row(self, train_id):
+        if isinstance(self.fleet, FleetStore):
+            train = self.fleet.get(train_id)
+        else:
+            train = next((candidate for candidate in self.fleet if candidate.id == train_id), None)
+        if train is None:
+            return None
+        return tuple(getattr(train, field) for field in TRAIN_FIELDS)
+
+    def train(self, train_id):
+        """Fields of one train with the scenario's changes applied, or None"""
+        for row in self.extra_trains:
+            if row[0] == train_id:
+                return dict(zip(TRAIN_FIELDS, row))
+
+        row = self._base_row(train_id)
+        if row is None:
+            return None
+        return dict(zip(TRAIN_FIELDS, row), **self.overrides.get(train_id, {}))
+
+    def update_train(self, train_id, **fields):
+        if self.train(train_id) is None:
+            raise ValueError(f"Unknown train: {train_id}")
+        for index, row in enumerate(self.extra_trains):
+            if row[0] == train_id:
+                values = dict(zip(TRAIN_FIELDS, row), **fields)
+                self.extra_trains[index] = tuple(values[field] for field in TRAIN_FIELDS)
+                return
+        self.overrides.setdefault(train_id, {}).update(fields)
+
+    def add_train(self, train_id, current_position, destination, priority=1, speed=80, delay_minutes=0):
+        if self.train(train_id) is not None:
+            raise ValueError(f"Duplicate train id: {train_id}")
+        self.extra_trains.append((train_id, current_position, destination, priority, speed, delay_minutes))
+
+    def trains(self):
+        """Field tuples (see TRAIN_FIELDS) of every train with the scenario's changes applied"""
+        fleet = self.fleet
+        if isinstance(fleet, FleetStore):
+            places = fleet.places
+            rows = list(zip(fleet.ids,
+                            [places[code] for code in fleet.position_codes.tolist()],
+                            [places[code] for code in fleet.destination_codes.tolist()],
+                            fleet.priority.tolist(), fleet.speed.tolist(), fleet.delay_minutes.tolist()))
+            row_of = fleet.row_of
+        else:
+            rows = [tuple(getattr(train, field) for field in TRAIN_FIELDS) for train in fleet]
+            index = {row[0]: i for i, row in enumerate(rows)} if self.overrides else {}
+            row_of = index.__getitem__
+
+        for train_id, fields in self.overrides.items():
+            row = row_of(train_id)
+            values = dict(zip(TRAIN_FIELDS, rows[row]), **fields)
+            rows[row] = tuple(values[field] for field in TRAIN_FIELDS)
+
+        return rows + self.extra_trains
+
+class ScenarioSimulator:
+    """Discrete-event simulation of the fleet running over the track network.
+
+    Every train leaves its current position once its delay has run out and
+    follows its shortest route at its own speed. A section holds at most
+    capacity trains at a time; a train finding it full waits at the entry
+    (queued trains are admitted by priority, then arrival) and the wait
+    counts as a conflict. Closed sections are avoided by rerouting when
+    another route exists, otherwise the train waits for the section to
+    reopen. Speed restrictions cap the running speed on the sections they
+    cover while they are in force.
+
+    Times are minutes from now; the simulation stops at the horizon.
+    """
+
+    def __init__(self, network, track_sections, horizon_minutes=240):
+        self.network = network
+        self.horizon_minutes = horizon_minutes
+        self.capacity = [max(1, int(section.capacity)) for section in track_sections]
+        self.section_ids = [section.id for section in track_sections]
+        self.section_index = {section_id: index for index, section_id in enumerate(self.section_ids)}
+
+    def section(self, section_id):
+        """Index of a track section by id"""
+        index = self.section_index.get(section_id)
+        if index is None:
+            raise ValueError(f"Unknown track section: {section_id}")
+        return index
+
+    def apply(self, state, event):
+        """Apply one scenario event (a dict with a 'type') to a ScenarioState"""
+        if not isinstance(event, dict):
+            raise ValueError(f"Scenario events must be objects, got: {event!r}")
+        kind = event.get('type')
+        start = float(event.get('start_minute', 0))
+        duration = event.get('duration_minutes')
+        end = start + float(duration) if duration is not None else math.inf
+
+        if kind == 'block_closure':
+            state.closures.append((self.section(event.get('section_id')), start, end))
+
+        elif kind == 'speed_restriction':
+            max_speed = float(event.get('max_speed', 0))
+            if max_speed <= 0:
+                raise ValueError("Speed restriction needs a positive max_speed")
+            section = self.section(event['section_id']) if event.get('section_id') else -1
+            state.speed_limits.append((section, max_speed, start, end))
+
+        elif kind == 'extra_train':
+            train = event.get('train') or {}
+            if not isinstance(train, dict):
+                raise ValueError("Extra train must be an object")
+            missing = [field for field in ('id', 'current_position', 'destination') if not train.get(field)]
+            if missing:
+                raise ValueError(f"Extra train is missing: {', '.join(missing)}")
+            state.add_train(train['id'], train['current_position'], train['destination'],
+                            priority=int(train.get('priority', 1)), speed=float(train.get('speed', 80)),
+                            delay_minutes=float(train.get('delay_minutes', 0)))
+
+        elif kind == 'delay_injection':
+            train = state.train(event.get('train_id'))
+            if train is None:
+                raise ValueError(f"Unknown train: {event.get('train_id')}")
+            state.update_train(train['id'], delay_minutes=train['delay_minutes'] + float(event.get('minutes', 0)))
+
+        else:
+            raise ValueError(f"Unknown scenario event type: {kind}")
+
+    def evaluate(self, base, baseline, definition, horizon_minutes=None):
+        """Simulate one scenario definition ({name, type, events}) on base and compare it with baseline"""
+        scenario = base.clone()
+        events = list(definition.get('events') or [])
+        preset = definition.get('type')
+        if preset:
+            if preset not in SCENARIO_PRESETS:
+                raise ValueError(f"Unknown scenario type: {preset}")
+            events = SCENARIO_PRESETS[preset](base, baseline) + events
+        for event in events:
+            self.apply(scenario, event)
+
+        result = self.run(scenario, horizon_minutes)
+        throughput_change = (100 * (result['throughput'] - baseline['throughput']) / baseline['throughput']
+                             if baseline['throughput'] else 0.0)
+        return {
+            'scenario_name': definition.get('name', 'Test Scenario'),
+            'scenario_type': preset,
+            'event_count': len(events),
+            'predicted_delay': result['predicted_delay'],
+            'baseline_delay': baseline['predicted_delay'],
+            'delay_change': round(result['predicted_delay'] - baseline['predicted_delay'], 1),
+            'throughput': result['throughput'],
+            'baseline_throughput': baseline['throughput'],
+            'throughput_change': round(throughput_change, 1),
+            'conflicts': result['conflicts'],
+            'baseline_conflicts': baseline['conflicts'],
+            'safety_score': result['safety_score'],
+            'recommendations': recommend(result, baseline),
+            'simulation': result
+        }
+
+    def run(self, state, horizon_minutes=None):
+        """Simulate a ScenarioState up to the horizon and return delay, throughput and conflict figures"""
+        started = time.perf_counter()
+        horizon = self.horizon_minutes if horizon_minutes is None else horizon_minutes
+        network = self.network
+        lengths = network.lengths.tolist()
+        section_starts = network.section_starts.tolist()
+        section_ends = network.section_ends.tolist()
+        capacity = self.capacity
+
+        closures = {}
+        for section, start, end in state.closures:
+            closures.setdefault(section, []).append((start, end))
+        limits = {}
+        for section, max_speed, start, end in state.speed_limits:
+            limits.setdefault(section, []).append((max_speed, start, end))
+        global_limits = limits.pop(-1, [])
+
+        def closed_until(section, now):
+            """End of the closure covering section at now, or None"""
+            ends = [end for start, end in closures.get(section, ()) if start <= now < end]
+            return max(ends) if ends else None
+
+        def speed_limit(section, now):
+            applicable = [max_speed for max_speed, start, end in limits.get(section, global_limits)
+                          if start <= now < end]
+            if section in limits:
+                applicable += [max_speed for max_speed, start, end in global_limits if start <= now < end]
+            return min(applicable) if applicable else math.inf
+
+        rows = state.trains()
+        n = len(rows)
+        routes = [None] * n
+        steps = [0] * n
+        nodes = [0] * n
+        ideal = [0.0] * n
+        lost = [0.0] * n          # delay accumulated so far (initial delay, waits, slow running)
+        arrival = [None] * n
+        waited_since = [0.0] * n
+        held = [False] * n
+
+        occupancy = [0] * len(capacity)
+        waiting = {}              # section -> heap of (-priority, queued at, seq, train)
+        queue_minutes = {}        # section -> train-minutes spent waiting for it
+        traversals = {}           # section -> trains that entered it
+
+        events = []
+        seq = 0
+        unroutable = 0
+        at_destination = 0
+        for i, (_, position, destination, priority, speed, delay) in enumerate(rows):
+            if position == destination:
+                at_destination += 1
+                continue
+            route = network.route(position, destination)
+            if not route or speed <= 0:
+                unroutable += 1
+                continue
+            routes[i] = list(route)
+            nodes[i] = network.node_id(position)
+            ideal[i] = sum(lengths[section] for section, _ in route) / speed * 60
+            lost[i] = min(float(delay), horizon)
+            if delay < horizon:
+                events.append((float(delay), READY, seq, i))
+                seq += 1
+        heapq.heapify(events)
+
+        contentions = closure_holds = reroutes = stranded = processed = 0
+
+        def enter(i, section, direction, now):
+            nonlocal seq
+            occupancy[section] += 1
+            traversals[section] = traversals.get(section, 0) + 1
+            speed = rows[i][4]
+            running = lengths[section] / min(speed, speed_limit(section, now)) * 60
+            # Slow running only counts up to the horizon
+            lost[i] += (running - lengths[section] / speed * 60) * min(1.0, (horizon - now) / running)
+            if now + running < horizon:
+                heapq.heappush(events, (now + running, EXIT, seq, i))
+                seq += 1
+
+        while events:
+            now, kind, _, i = heapq.heappop(events)
+            processed += 1
+            route = routes[i]
+
+            if kind == EXIT:
+                section, direction = route[steps[i]]
+                occupancy[section] -= 1
+                nodes[i] = section_ends[section] if direction == 0 else section_starts[section]
+                steps[i] += 1
+                heapq.heappush(events, (now, READY, seq, i))
+                seq += 1
+
+                # The freed track goes to the first train queued for it
+                queued = waiting.get(section)
+                if queued:
+                    _, _, _, j = heapq.heappop(queued)
+                    queue_minutes[section] = queue_minutes.get(section, 0.0) + now - waited_since[j]
+                    lost[j] += now - waited_since[j]
+                    heapq.heappush(events, (now, RESUME, seq, j))
+                    seq += 1
+                continue
+
+            if steps[i] == len(route):
+                arrival[i] = now
+                continue
+
+            section, direction = route[steps[i]]
+            reopens = closed_until(section, now)
+            if reopens is not None:
+                closed = {s for s, spans in closures.items() if any(start <= now < end for start, end in spans)}
+                detour = network.route(network.names[nodes[i]], rows[i][2], avoid=closed)
+                if detour:
+                    reroutes += 1
+                    routes[i] = route = route[:steps[i]] + list(detour)
+                    section, direction = route[steps[i]]
+                else:
+                    closure_holds += 1
+                    lost[i] += min(reopens, horizon) - now
+                    if reopens < horizon:
+                        heapq.heappush(events, (reopens, READY, seq, i))
+                        seq += 1
+                    else:
+                        stranded += 1
+                    continue
+
+            if occupancy[section] >= capacity[section]:
+                contentions += 1
+                held[i] = True
+                waited_since[i] = now
+                heapq.heappush(waiting.setdefault(section, []), (-rows[i][3], now, seq, i))
+                seq += 1
+                continue
+
+            enter(i, section, direction, now)
+
+        # Trains still queued at the horizon have waited until then
+        for section, queued in waiting.items():
+            for _, _, _, j in queued:
+                queue_minutes[section] = queue_minutes.get(section, 0.0) + horizon - waited_since[j]
+                lost[j] += horizon - waited_since[j]
+
+        simulated = [i for i in range(n) if routes[i] is not None]
+        delays = [max(0.0, arrival[i] - ideal[i]) if arrival[i] is not None else lost[i] for i in simulated]
+        arrived = sum(1 for i in simulated if arrival[i] is not None)
+        trains_held = sum(1 for i in simulated if held[i])
+
+        bottlenecks = sorted(queue_minutes.items(), key=lambda item: -item[1])[:5]
+        busiest = sorted(traversals.items(), key=lambda item: -item[1])[:5]
+
+        return {
+            'horizon_minutes': horizon,
+            'trains': len(simulated),
+            'predicted_delay': round(sum(delays) / len(delays), 1) if delays else 0.0,
+            'max_delay': round(max(delays), 1) if delays else 0.0,
+            'throughput': arrived,
+            'throughput_per_hour': round(arrived / horizon * 60, 1) if horizon else 0.0,
+            'conflicts': contentions,
+            'trains_held': trains_held,
+            'closure_holds': closure_holds,
+            'reroutes': reroutes,
+            'stranded': stranded,
+            'unroutable': unroutable,
+            'at_destination': at_destination,
+            'safety_score': round(100 * (1 - trains_held / len(simulated))) if simulated else 100,
+            'bottlenecks': [{'section_id': self.section_ids[section], 'queue_minutes': round(minutes, 1),
+                             'traversals': traversals.get(section, 0)} for section, minutes in bottlenecks],
+            'busiest_sections': [{'section_id': self.section_ids[section], 'traversals': count}
+                                 for section, count in busiest],
+            'events_processed': processed,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+def recommend(result, baseline):
+    """Controller recommendations from a scenario result compared with the baseline run"""
+    recommendations = []
+
+    if result['stranded']:
+        recommendations.append(f"{result['stranded']} trains cannot pass closed sections before the horizon; "
+                               "arrange alternative services")
+    if result['reroutes']:
+        recommendations.append(f"Divert {result['reroutes']} train runs around closed sections")
+    if result['bottlenecks']:
+        worst = result['bottlenecks'][0]
+        recommendations.append(f"Regulate entry to {worst['section_id']}: "
+                               f"{worst['queue_minutes']:.0f} train-minutes of queueing")
+
+    delay_change = result['predicted_delay'] - baseline['predicted_delay']
+    if delay_change > 0.5:
+        recommendations.append(f"Average delay rises by {delay_change:.1f} min; hold low-priority trains "
+                               "at stations ahead of the bottleneck")
+    throughput_change = result['throughput'] - baseline['throughput']
+    if throughput_change < 0:
+        recommendations.append(f"{-throughput_change} fewer trains reach their destination within "
+                               f"{result['horizon_minutes'] / 60:g} h")
+
+    if not recommendations:
+        recommendations.append("No action needed: the scenario does not add delay or conflicts")
+    return recommendations
+
+def _busiest_section(baseline):
+    if not baseline['busiest_sections']:
+        raise ValueError("The network has no traffic to build this scenario on")
+    return baseline['busiest_sections'][0]['section_id']
+
+def _peak_hour_trains(state, baseline):
+    """One extra train, 10 minutes behind, for every fourth train of the fleet"""
+    return [{'type': 'extra_train', 'train': {
+        'id': f"{train_id}-X", 'current_position': position, 'destination': destination,
+        'priority': priority, 'speed': speed, 'delay_minutes': delay + 10
+    }} for train_id, position, destination, priority, speed, delay in state.trains()[::4]]
+
+# Scenario types offered on the dashboard, as event lists built from the state and its baseline run
+SCENARIO_PRESETS = {
+    'Emergency Stop': lambda state, baseline: [
+        {'type': 'block_closure', 'section_id': _busiest_section(baseline), 'duration_minutes': 30}],
+    'Weather Delay': lambda state, baseline: [
+        {'type': 'speed_restriction', 'max_speed': 60}],
+    'Track Maintenance': lambda state, baseline: [
+        {'type': 'block_closure', 'section_id': _busiest_section(baseline), 'duration_minutes': 120}],
+    'Peak Hour Rush': _peak_hour_trains
+}
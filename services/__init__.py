@@ -0,0 +1,15 @@
+"""
+RailSync AI Services Package
+
+This package contains the long-running background services that sit between the Flask API and the AI models.
+"""
+
+from .optimization_jobs import OptimizationJob, OptimizationJobManager
+from .live_stream import LiveStream
+from .fleet_state import FleetState
+from .storage import ConnectionPool, Storage
+from .telemetry import TelemetryIngestor
+from .scenario_batch import ScenarioBatchRunner
+
+__all__ = ['OptimizationJob', 'OptimizationJobManager', 'LiveStream', 'FleetState', 'ConnectionPool', 'Storage',
+           'TelemetryIngestor', 'ScenarioBatchRunner']
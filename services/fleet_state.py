@@ -0,0 +1,100 @@
+"""
+Versioned fleet state with per-version memoized views
+"""
+
+import copy
+import json
+import threading
+import uuid
+
+from models.conflict_graph import ConflictGraph
+from models.incremental_detector import IncrementalConflictDetector
+from models.rail_network import RailNetwork
+
+class FleetState:
+    """Live trains, stations and track sections behind a monotonically increasing version.
+
+    Anything derived from the state (conflicts, metrics, encoded JSON bodies)
+    is memoized for the current version and recomputed only after a change
+    bumps the version. The version is also the basis for HTTP ETags. With a
+    storage, changed trains are written through to the database.
+    """
+
+    def __init__(self, trains, stations, track_sections, network=None, conflict_detector=None, storage=None):
+        self.trains = trains
+        self.stations = stations
+        self.track_sections = track_sections
+        self.network = network if network is not None else RailNetwork(track_sections, stations)
+        self.storage = storage
+
+        # Distinguishes ETags issued by different processes or restarts
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.version = 1
+
+        self._lock = threading.RLock()
+        self._cache = {}
+        self._listeners = []
+
+        if conflict_detector is None:
+            conflict_detector = IncrementalConflictDetector(self.network)
+        self.conflict_detector = conflict_detector
+        self.conflict_detector.load(trains, track_sections)
+
+    def apply_updates(self, updates):
+        """Apply train updates ({'id': ..., field: value}); bumps the version if anything changed"""
+        with self._lock:
+            diff = self.conflict_detector.apply_updates(updates)
+            if diff['trains'] and self.storage is not None:
+                self.storage.update_trains(self.trains, diff['trains'], self.network)
+            if diff['trains']:
+                self.bump()
+        return diff
+
+    def snapshot(self):
+        """Point-in-time copy of the trains that later updates do not change"""
+        with self._lock:
+            if hasattr(self.trains, 'snapshot'):
+                return self.trains.snapshot()
+            return [copy.copy(train) for train in self.trains]
+
+    def bump(self):
+        """Mark the state as changed, invalidating every memoized view"""
+        with self._lock:
+            self.version += 1
+            self._cache.clear()
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener(self.version)
+
+    def add_listener(self, listener):
+        """Call listener(version) after every version bump"""
+        self._listeners.append(listener)
+
+    def memoize(self, name, compute):
+        """Return compute() for the current version, computing it at most once per version"""
+        with self._lock:
+            version = self.version
+            entry = self._cache.get(name)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+
+            value = compute()
+            if self.version == version:
+                self._cache[name] = (version, value)
+            return value
+
+    def encoded(self, name, compute, dumps=json.dumps):
+        """Memoized UTF-8 JSON body of compute() for the current version"""
+        return self.memoize(f"{name}.json", lambda: dumps(compute()).encode('utf-8'))
+
+    def etag(self, name):
+        """Entity tag of a named view at the current version"""
+        return f"{name}-{self.instance_id}-{self.version}"
+
+    def conflicts(self):
+        return self.memoize('conflicts', self.conflict_detector.conflicts)
+
+    def conflict_graph(self):
+        """Current conflicts as a ConflictGraph (deduplicated pairs, clusters ranked by urgency)"""
+        return self.memoize('conflict_graph', lambda: ConflictGraph(self.conflicts()))
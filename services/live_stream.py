@@ -0,0 +1,162 @@
+"""
+Server-Sent Events broadcaster for the live dashboard
+"""
+
+import json
+import queue
+import threading
+
+class LiveStream:
+    """Computes one dashboard snapshot per tick and fans deltas out to every subscriber.
+
+    snapshot_fn returns a dict with 'metrics', 'trains' (list of train dicts
+    with an 'id') and 'conflicts' (list of conflict dicts). Each message is
+    encoded once and the same bytes are queued for all subscribers. If
+    version_fn is given, ticks where it returns the same version as last
+    time skip the snapshot entirely.
+    """
+
+    def __init__(self, snapshot_fn, interval_seconds=5, max_queue=64, version_fn=None):
+        self.snapshot_fn = snapshot_fn
+        self.version_fn = version_fn
+        self.interval_seconds = interval_seconds
+        self.max_queue = max_queue
+
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+        self._version = 0
+        self._state_version = None
+        self._trains = {}
+        self._conflicts = {}
+        self._metrics = None
+        self._snapshot_message = None
+
+    def subscribe(self):
+        """Register a subscriber; its queue starts with the latest full snapshot"""
+        subscriber = queue.Queue(maxsize=self.max_queue)
+
+        with self._lock:
+            if self._snapshot_message is None:
+                self._tick()
+            subscriber.put(self._snapshot_message)
+            self._subscribers.add(subscriber)
+            self._ensure_running()
+
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def events(self, subscriber, heartbeat_seconds=15):
+        """Yield encoded SSE messages for one subscriber until the client disconnects"""
+        try:
+            while True:
+                try:
+                    yield subscriber.get(timeout=heartbeat_seconds)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def publish(self):
+        """Wake the broadcaster to push a tick now instead of waiting for the interval"""
+        self._wakeup.set()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _ensure_running(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='live-stream', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval_seconds)
+            self._wakeup.clear()
+
+            with self._lock:
+                if not self._subscribers:
+                    # Go idle until the next subscriber restarts the thread
+                    self._thread = None
+                    return
+
+                message = self._tick()
+                if message is not None:
+                    self._broadcast(message)
+
+    def _tick(self):
+        """Take a snapshot, diff it against the previous one and return the encoded delta (or None)"""
+        if self.version_fn is not None:
+            state_version = self.version_fn()
+            if state_version == self._state_version and self._snapshot_message is not None:
+                return None
+            self._state_version = state_version
+
+        snapshot = self.snapshot_fn()
+
+        trains = {train['id']: train for train in snapshot['trains']}
+        conflicts = {self._conflict_key(conflict): conflict for conflict in snapshot['conflicts']}
+        metrics = snapshot['metrics']
+
+        delta = {}
+
+        updated = [train for train_id, train in trains.items() if self._trains.get(train_id) != train]
+        removed = [train_id for train_id in self._trains if train_id not in trains]
+        if updated or removed:
+            delta['trains'] = {'updated': updated, 'removed': removed}
+
+        # New conflicts, and known ones whose details changed (clients replace the record under its key)
+        added = [dict(conflict, key=key) for key, conflict in conflicts.items() if self._conflicts.get(key) != conflict]
+        resolved = [key for key in self._conflicts if key not in conflicts]
+        if added or resolved:
+            delta['conflicts'] = {'added': added, 'removed': resolved}
+
+        if metrics != self._metrics:
+            delta['metrics'] = metrics
+
+        self._trains = trains
+        self._conflicts = conflicts
+        self._metrics = metrics
+
+        if not delta and self._snapshot_message is not None:
+            return None
+
+        self._version += 1
+        self._snapshot_message = self._encode('snapshot', {
+            'metrics': metrics,
+            'trains': list(trains.values()),
+            'conflicts': [dict(conflict, key=key) for key, conflict in conflicts.items()]
+        })
+        return self._encode('delta', delta)
+
+    def _broadcast(self, message):
+        for subscriber in self._subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Slow client: drop its backlog and resynchronise from the full snapshot
+                self._drain(subscriber)
+                subscriber.put_nowait(self._snapshot_message)
+
+    def _drain(self, subscriber):
+        while True:
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                return
+
+    def _encode(self, event, data):
+        return f"id: {self._version}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    def _conflict_key(self, conflict):
+        """Stable identity of a conflict across snapshots"""
+        parts = [conflict['type']] + list(conflict['trains'])
+        if 'junction' in conflict:
+            parts.append(conflict['junction'])
+        return ':'.join(parts)
@@ -0,0 +1,205 @@
+"""
+Background optimization jobs for RailSync AI
+"""
+
+import copy
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from models.fleet_store import FleetStore
+from models.genetic_optimizer import OptimizationCancelled
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+FINISHED_STATES = {JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED}
+
+class OptimizationJob:
+    """A single optimization run and its per-generation progress"""
+
+    def __init__(self, trains, track_sections, conflicts, stations=None):
+        self.id = uuid.uuid4().hex
+        self.status = JOB_QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = []
+        self.result = None
+        self.error = None
+
+        # Snapshot the fleet so live updates do not change the problem mid-run
+        if isinstance(trains, FleetStore):
+            self.trains = trains.copy()
+        else:
+            self.trains = [copy.copy(train) for train in trains]
+        self.track_sections = list(track_sections)
+        self.conflicts = list(conflicts)
+        self.stations = list(stations) if stations is not None else None
+
+        self._cancel_event = threading.Event()
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def cancel(self):
+        """Request cancellation; a queued job is cancelled immediately"""
+        self._cancel_event.set()
+        with self._changed:
+            if self.status == JOB_QUEUED:
+                self._finish(JOB_CANCELLED)
+
+    def record_progress(self, update):
+        """Progress callback handed to the optimizer"""
+        if self._cancel_event.is_set():
+            raise OptimizationCancelled(f"Job {self.id} cancelled")
+
+        elapsed = time.time() - self.started_at
+        remaining = update['generations'] - update['generation']
+        event = dict(update, eta_seconds=round(elapsed / update['generation'] * remaining, 2))
+
+        with self._changed:
+            self.progress.append(event)
+            self._changed.notify_all()
+
+    def wait_for_update(self, seen, timeout):
+        """Block until more than `seen` progress events exist or the job finishes"""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.progress) > seen or self.finished, timeout)
+            return self.progress[seen:], self.finished
+
+    def start(self):
+        """Mark the job as running; returns False if it was cancelled while queued"""
+        with self._changed:
+            if self.finished:
+                return False
+            self.status = JOB_RUNNING
+            self.started_at = time.time()
+            self._changed.notify_all()
+            return True
+
+    def complete(self, status, result=None, error=None):
+        with self._changed:
+            self.result = result
+            self.error = error
+            self._finish(status)
+
+    def _finish(self, status):
+        self.status = status
+        self.finished_at = time.time()
+        self.trains = self.track_sections = self.conflicts = self.stations = None
+        self._changed.notify_all()
+
+    def to_dict(self, include_result=True):
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': self.progress[-1] if self.progress else None
+        }
+        if include_result and self.status == JOB_COMPLETED:
+            data['result'] = self.result
+        if self.error:
+            data['error'] = self.error
+        return data
+
+class OptimizationJobManager:
+    """Runs optimization jobs on a worker pool and keeps finished jobs for a TTL.
+
+    Each job gets a fresh optimizer, seeded with the warm-start state of the
+    last completed job so consecutive re-optimizations start from its
+    population.
+    """
+
+    def __init__(self, optimizer_factory, max_workers=2, ttl_seconds=3600, storage=None):
+        self.optimizer_factory = optimizer_factory
+        self.ttl_seconds = ttl_seconds
+        self.storage = storage  # completed results are saved here when given
+        self.warm_state = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='optimizer')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, trains, track_sections, conflicts, stations=None):
+        """Queue an optimization of the given fleet and return its job"""
+        self._purge_expired()
+
+        job = OptimizationJob(trains, track_sections, conflicts, stations)
+        with self._lock:
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        self._purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def stream(self, job_id, heartbeat_seconds=15):
+        """Yield Server-Sent Events with the job's progress until it finishes"""
+        job = self.get(job_id)
+        seen = 0
+
+        while True:
+            events, finished = job.wait_for_update(seen, heartbeat_seconds)
+            seen += len(events)
+
+            for event in events:
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+            if finished:
+                yield f"event: done\ndata: {json.dumps(job.to_dict())}\n\n"
+                return
+
+            if not events:
+                yield ": keep-alive\n\n"
+
+    def _run(self, job):
+        if not job.start():
+            return
+
+        try:
+            optimizer = self.optimizer_factory()
+            optimizer.warm_state = self.warm_state
+            schedule, trace = optimizer.optimize(job.trains, job.track_sections, job.conflicts, stations=job.stations,
+                                                 progress_callback=job.record_progress, return_trace=True)
+            result = {
+                'optimized_schedule': schedule,
+                'conflicts_resolved': len(job.conflicts),
+                'convergence_trace': trace
+            }
+            if optimizer.warm_state is not None:
+                self.warm_state = optimizer.warm_state
+            if self.storage is not None:
+                result['result_id'] = self.storage.save_optimization_result(
+                    schedule, optimizer.last_run_stats, len(job.conflicts), job_id=job.id)
+            job.complete(JOB_COMPLETED, result=result)
+        except OptimizationCancelled:
+            job.complete(JOB_CANCELLED)
+        except Exception as e:
+            job.complete(JOB_FAILED, error=str(e))
+
+    def _purge_expired(self):
+        """Drop finished jobs older than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
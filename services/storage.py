@@ -0,0 +1,386 @@
+"""
+SQLite persistence for the network, the fleet, timetables and optimization results
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from models.data_models import Station, TrackSection
+from models.fleet_store import FleetStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stations (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    platforms INTEGER NOT NULL,
+    current_occupancy INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS track_sections (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    start_station TEXT NOT NULL,
+    end_station TEXT NOT NULL,
+    capacity INTEGER NOT NULL,
+    length_km REAL NOT NULL,
+    current_trains INTEGER NOT NULL DEFAULT 0,
+    entry_signal TEXT NOT NULL DEFAULT 'Green',
+    exit_signal TEXT NOT NULL DEFAULT 'Green'
+);
+
+CREATE TABLE IF NOT EXISTS trains (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    current_position TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    speed REAL NOT NULL,
+    delay_minutes INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS timetable (
+    train_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    section_id TEXT NOT NULL,
+    entry_time REAL NOT NULL,
+    exit_time REAL NOT NULL,
+    PRIMARY KEY (train_id, seq)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_timetable_section_time ON timetable (section_id, entry_time);
+
+CREATE TABLE IF NOT EXISTS optimization_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT,
+    created_at REAL NOT NULL,
+    conflicts_resolved INTEGER NOT NULL,
+    best_fitness REAL,
+    statistics TEXT NOT NULL,
+    schedule TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS optimized_assignments (
+    result_id INTEGER NOT NULL REFERENCES optimization_results (id) ON DELETE CASCADE,
+    train_id TEXT NOT NULL,
+    optimized_delay INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    platform INTEGER NOT NULL,
+    speed_factor REAL NOT NULL,
+    PRIMARY KEY (result_id, train_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_optimized_assignments_train ON optimized_assignments (train_id);
+"""
+
+TRAIN_COLUMNS = ('id', 'name', 'current_position', 'destination', 'priority', 'speed', 'delay_minutes', 'status')
+
+def sqlite_path(database_url):
+    """Filesystem path of a sqlite:/// URL (sqlite:///relative.db, sqlite:////absolute.db, sqlite:///:memory:)"""
+    prefix = 'sqlite:///'
+    if not database_url.startswith(prefix):
+        raise ValueError(f"Unsupported database URL: {database_url} (only {prefix} is supported)")
+    return database_url[len(prefix):]
+
+class ConnectionPool:
+    """A fixed number of SQLite connections handed out one per thread at a time.
+
+    The database runs in WAL mode, so every gunicorn worker keeps its own
+    pool on the same file: readers in all workers proceed concurrently and
+    never block the single writer. Connections are not carried across
+    fork(); a pool used in a new process (e.g. after gunicorn --preload)
+    discards the inherited ones and opens fresh connections.
+    """
+
+    def __init__(self, path, size=4, timeout=5.0, uri=False):
+        self.path = path
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.uri = uri
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                     check_same_thread=False, uri=self.uri)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA foreign_keys=ON')
+        connection.execute('PRAGMA temp_store=MEMORY')
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection (autocommit mode; use Storage.transaction for atomic writes)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            opened = self._opened < self.size and self._idle.empty()
+            if opened:
+                self._opened += 1
+            pool = self._idle
+
+        connection = self._connect() if opened else pool.get(timeout=self.timeout)
+        try:
+            yield connection
+        finally:
+            if pool is self._idle:
+                pool.put(connection)
+            else:
+                connection.close()
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            while not self._idle.empty():
+                self._idle.get_nowait().close()
+                self._opened -= 1
+
+class Storage:
+    """Stations, track sections, trains, their timetables and optimization results in SQLite.
+
+    Writes go through executemany in a single transaction, and the fleet is
+    read back with one query per table straight into a FleetStore, so a
+    cold start loads the live state instead of regenerating it.
+    """
+
+    def __init__(self, database_url, pool_size=4, timeout=5.0):
+        self.path = sqlite_path(database_url)
+        if self.path == ':memory:':
+            # Each connection would get its own empty database; make the pool share one
+            self.pool = ConnectionPool(f"file:railsync-{id(self)}?mode=memory&cache=shared", pool_size, timeout,
+                                       uri=True)
+        else:
+            self.pool = ConnectionPool(self.path, pool_size, timeout)
+
+        with self.pool.connection() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Connection inside BEGIN ... COMMIT (rolled back on error); immediate takes the write lock up front"""
+        with self.pool.connection() as connection:
+            connection.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    # Fleet
+
+    def save_fleet(self, trains, stations, track_sections, network=None):
+        """Replace the stored network and fleet (and, given the network, the fleet's timetable)"""
+        with self.transaction(immediate=True) as connection:
+            self._write_fleet(connection, trains, stations, track_sections, network)
+
+    def seed_fleet(self, trains, stations, track_sections, network=None):
+        """Store the fleet only if the database has none yet; returns whether it was stored.
+
+        The check and the writes share one write transaction, so when several
+        workers start together exactly one of them seeds the database.
+        """
+        with self.transaction(immediate=True) as connection:
+            if connection.execute('SELECT EXISTS (SELECT 1 FROM trains)').fetchone()[0]:
+                return False
+            self._write_fleet(connection, trains, stations, track_sections, network)
+            return True
+
+    def _write_fleet(self, connection, trains, stations, track_sections, network):
+        for table in ('timetable', 'trains', 'track_sections', 'stations'):
+            connection.execute(f"DELETE FROM {table}")
+
+        connection.executemany(
+            'INSERT INTO stations VALUES (?, ?, ?, ?)',
+            [(station.id, station.name, station.platforms, station.current_occupancy) for station in stations]
+        )
+        connection.executemany(
+            'INSERT INTO track_sections VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(section.id, section.name, section.start_station, section.end_station, section.capacity,
+              section.length_km, section.current_trains, section.signals['entry'], section.signals['exit'])
+             for section in track_sections]
+        )
+        connection.executemany(
+            'INSERT INTO trains VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            self._train_rows(trains)
+        )
+        if network is not None:
+            connection.executemany('INSERT INTO timetable VALUES (?, ?, ?, ?, ?)',
+                                   self._timetable_rows(trains, network))
+
+    def _train_rows(self, trains):
+        now = time.time()
+        if isinstance(trains, FleetStore):
+            places, statuses = trains.places, trains.statuses
+            return zip(trains.ids, trains.names,
+                       [places[code] for code in trains.position_codes.tolist()],
+                       [places[code] for code in trains.destination_codes.tolist()],
+                       trains.priority.tolist(), trains.speed.tolist(), trains.delay_minutes.tolist(),
+                       [statuses[code] for code in trains.status_codes.tolist()],
+                       [now] * len(trains))
+        return [(train.id, train.name, train.current_position, train.destination, int(train.priority),
+                 float(train.speed), int(train.delay_minutes), train.status, now) for train in trains]
+
+    def update_trains(self, trains, train_ids, network=None):
+        """Write the current state of the given trains back to the database.
+
+        Given the network, their timetables are re-projected from now in the
+        same transaction.
+        """
+        if not isinstance(trains, FleetStore):
+            trains = {train.id: train for train in trains}
+
+        now = time.time()
+        rows = []
+        changed = []
+        for train_id in train_ids:
+            train = trains.get(train_id)
+            if train is None:
+                continue
+            changed.append(train)
+            rows.append((train.name, train.current_position, train.destination, int(train.priority),
+                         float(train.speed), int(train.delay_minutes), train.status, now, train.id))
+
+        if rows:
+            with self.transaction() as connection:
+                connection.executemany(
+                    'UPDATE trains SET name = ?, current_position = ?, destination = ?, priority = ?, speed = ?, '
+                    'delay_minutes = ?, status = ?, updated_at = ? WHERE id = ?', rows
+                )
+                if network is not None:
+                    connection.executemany('DELETE FROM timetable WHERE train_id = ?',
+                                           [(train.id,) for train in changed])
+                    connection.executemany('INSERT INTO timetable VALUES (?, ?, ?, ?, ?)',
+                                           self._timetable_rows(changed, network, now))
+        return len(rows)
+
+    def load_fleet(self):
+        """(FleetStore, stations, track_sections) as stored, or None if no fleet has been stored"""
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                f"SELECT {', '.join(TRAIN_COLUMNS)} FROM trains ORDER BY rowid"
+            ).fetchall()
+            if not rows:
+                return None
+            station_rows = connection.execute('SELECT * FROM stations ORDER BY rowid').fetchall()
+            section_rows = connection.execute('SELECT * FROM track_sections ORDER BY rowid').fetchall()
+
+        trains = FleetStore.from_columns(*zip(*rows))
+
+        # Restored field by field: the constructors would draw fresh random live state
+        stations = []
+        for row in station_rows:
+            station = Station.__new__(Station)
+            station.id, station.name, station.platforms, station.current_occupancy = row
+            stations.append(station)
+
+        track_sections = []
+        for *fields, entry_signal, exit_signal in section_rows:
+            section = TrackSection.__new__(TrackSection)
+            (section.id, section.name, section.start_station, section.end_station, section.capacity,
+             section.length_km, section.current_trains) = fields
+            section.signals = {'entry': entry_signal, 'exit': exit_signal}
+            track_sections.append(section)
+
+        return trains, stations, track_sections
+
+    # Timetables
+
+    def refresh_timetable(self, trains, network):
+        """Re-project every train's timetable from now (stored times are absolute, so stale after a restart)"""
+        with self.transaction(immediate=True) as connection:
+            connection.execute('DELETE FROM timetable')
+            connection.executemany('INSERT INTO timetable VALUES (?, ?, ?, ?, ?)',
+                                   self._timetable_rows(trains, network))
+
+    def _timetable_rows(self, trains, network, now=None):
+        """(train id, seq, section id, entry time, exit time) along each train's shortest route.
+
+        A train leaves once its delay has run out and runs at its current
+        speed, as the look-ahead conflict projection assumes. Times are Unix
+        timestamps.
+        """
+        now = time.time() if now is None else now
+        rows = []
+        for train in trains:
+            if train.speed <= 0:
+                continue
+            entry = now + train.delay_minutes * 60
+            for seq, (section, _) in enumerate(network.route(train.current_position, train.destination)):
+                exit_time = entry + network.lengths[section] / train.speed * 3600
+                rows.append((train.id, seq, network.section_ids[section], entry, float(exit_time)))
+                entry = float(exit_time)
+        return rows
+
+    def section_timetable(self, section_id, start, end):
+        """Runs on a section entering between two Unix timestamps, in entry order"""
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                'SELECT train_id, entry_time, exit_time FROM timetable '
+                'WHERE section_id = ? AND entry_time >= ? AND entry_time < ? ORDER BY entry_time',
+                (section_id, start, end)
+            ).fetchall()
+        return [{'train_id': train_id, 'entry_time': entry, 'exit_time': exit_time}
+                for train_id, entry, exit_time in rows]
+
+    def train_timetable(self, train_id):
+        """Sections a train runs through, in route order"""
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                'SELECT section_id, entry_time, exit_time FROM timetable WHERE train_id = ? ORDER BY seq',
+                (train_id,)
+            ).fetchall()
+        return [{'section_id': section_id, 'entry_time': entry, 'exit_time': exit_time}
+                for section_id, entry, exit_time in rows]
+
+    # Optimization results
+
+    def save_optimization_result(self, schedule, statistics=None, conflicts_resolved=0, job_id=None):
+        """Store an optimized schedule and its run statistics; returns the result id"""
+        statistics = statistics or {}
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                'INSERT INTO optimization_results (job_id, created_at, conflicts_resolved, best_fitness, '
+                'statistics, schedule) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, time.time(), conflicts_resolved, statistics.get('best_fitness'),
+                 json.dumps(statistics), json.dumps(schedule))
+            )
+            result_id = cursor.lastrowid
+            connection.executemany(
+                'INSERT OR REPLACE INTO optimized_assignments VALUES (?, ?, ?, ?, ?, ?)',
+                [(result_id, entry['train_id'], entry['optimized_delay'], entry['priority'], entry['platform'],
+                  entry['speed_factor']) for entry in schedule]
+            )
+        return result_id
+
+    def optimization_results(self, limit=10):
+        """Most recent optimization results, newest first"""
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                'SELECT id, job_id, created_at, conflicts_resolved, best_fitness, statistics, schedule '
+                'FROM optimization_results ORDER BY id DESC LIMIT ?', (limit,)
+            ).fetchall()
+        return [{
+            'id': result_id,
+            'job_id': job_id,
+            'created_at': created_at,
+            'conflicts_resolved': conflicts_resolved,
+            'best_fitness': best_fitness,
+            'statistics': json.loads(statistics),
+            'optimized_schedule': json.loads(schedule)
+        } for result_id, job_id, created_at, conflicts_resolved, best_fitness, statistics, schedule in rows]
+
+    def close(self):
+        self.pool.close()
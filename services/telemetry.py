@@ -0,0 +1,288 @@
+"""
+Streaming ingestion of train position reports into the live fleet state
+"""
+
+import csv
+import io
+import json
+import logging
+import queue
+import socketserver
+import threading
+import time
+from collections import deque
+
+from utils.validators import describe_batch_errors, validate_position_report_batch
+
+logger = logging.getLogger(__name__)
+
+# CSV columns converted from text; everything else stays a string
+NUMERIC_FIELDS = {'speed': float, 'delay_minutes': int, 'priority': int}
+
+def parse_ndjson(lines):
+    """Position reports from newline-delimited JSON lines: (reports, [(line number, error)])"""
+    reports, errors = [], []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            reports.append(json.loads(line))
+        except ValueError as e:
+            errors.append((number, f"Invalid JSON: {e}"))
+    return reports, errors
+
+def parse_csv(lines):
+    """Position reports from CSV lines with a header row; empty cells are left out of the report"""
+    reports, errors = [], []
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return reports, errors
+    header = [column.strip() for column in header]
+
+    for number, row in enumerate(reader, 2):
+        if not row:
+            continue
+        report = {}
+        try:
+            for column, value in zip(header, row):
+                if value == '':
+                    continue
+                convert = NUMERIC_FIELDS.get(column)
+                report[column] = convert(value) if convert is not None else value
+        except ValueError:
+            errors.append((number, f"Invalid number in column '{column}'"))
+            continue
+        reports.append(report)
+    return reports, errors
+
+PARSERS = {
+    'ndjson': parse_ndjson,
+    'csv': parse_csv
+}
+
+class TelemetryIngestor:
+    """Absorbs position reports into the fleet state without blocking the API threads.
+
+    submit() only validates and appends to a bounded queue; a worker thread
+    drains it in micro-batches of up to batch_size reports (or whatever
+    arrived within flush_seconds), merges repeated reports of the same
+    train and applies each batch with one apply_fn call (normally
+    FleetState.apply_updates), so a burst costs one version bump and one
+    conflict diff per batch. When the queue is full, submit() rejects the
+    whole batch (or, for readers that may block, waits for room) instead of
+    growing without bound.
+    """
+
+    def __init__(self, apply_fn, max_queue=50000, batch_size=1000, flush_seconds=0.05):
+        self.apply_fn = apply_fn
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+
+        self._queue = deque()  # (arrival time, report)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._thread = None
+        self._applying = False  # a popped batch is still being applied
+        self._server = None
+
+        self._counters = {
+            'received': 0,
+            'accepted': 0,
+            'invalid': 0,
+            'rejected_backpressure': 0,
+            'applied': 0,
+            'updates_applied': 0,
+            'trains_changed': 0,
+            'batches': 0,
+            'updates_rejected': 0,
+            'apply_errors': 0
+        }
+        self._max_depth = 0
+        self._last_batch = None
+        self._rate = 0.0  # exponentially weighted reports applied per second
+
+    def submit(self, reports, block=False, timeout=None):
+        """Validate reports and queue the valid ones for the next micro-batch.
+
+        Returns (accepted count, [(index, errors)] of invalid reports). Raises
+        queue.Full if the valid reports do not fit in the queue: immediately
+        when block is False, otherwise after waiting up to timeout seconds.
+        """
+        reports = list(reports)
+        described = describe_batch_errors(validate_position_report_batch(reports))
+        invalid = sorted(described.items())
+        valid = [report for index, report in enumerate(reports) if index not in described] if invalid else reports
+
+        arrived = time.monotonic()
+        with self._lock:
+            self._counters['received'] += len(valid) + len(invalid)
+            self._counters['invalid'] += len(invalid)
+
+            if len(self._queue) + len(valid) > self.max_queue:
+                fits = lambda: len(self._queue) + len(valid) <= self.max_queue
+                if not block or not self._not_full.wait_for(fits, timeout):
+                    self._counters['rejected_backpressure'] += len(valid)
+                    raise queue.Full(f"Telemetry queue full ({len(self._queue)}/{self.max_queue} reports)")
+
+            self._queue.extend((arrived, report) for report in valid)
+            self._counters['accepted'] += len(valid)
+            self._max_depth = max(self._max_depth, len(self._queue))
+            self._ensure_running()
+            self._not_empty.notify()
+
+        return len(valid), invalid
+
+    def ingest(self, lines, fmt='ndjson', block=False, timeout=None):
+        """Parse lines of the given format and submit the reports; parse errors count as invalid"""
+        reports, parse_errors = PARSERS[fmt](lines)
+        if parse_errors:
+            with self._lock:
+                self._counters['received'] += len(parse_errors)
+                self._counters['invalid'] += len(parse_errors)
+        accepted, invalid = self.submit(reports, block=block, timeout=timeout)
+        return accepted, parse_errors, invalid
+
+    def read_stream(self, stream, fmt='ndjson', chunk_size=None):
+        """Feed a file-like text stream (a file, a socket's makefile()) until EOF.
+
+        Lines are parsed chunk by chunk; a full queue makes the reader wait,
+        which pushes back on the sender instead of dropping reports.
+        """
+        chunk_size = chunk_size or self.batch_size
+        header = [] if fmt != 'csv' else [stream.readline()]
+        chunk = []
+        for line in stream:
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                self.ingest(header + chunk, fmt, block=True)
+                chunk = []
+        if chunk:
+            self.ingest(header + chunk, fmt, block=True)
+
+    def read_file(self, path, fmt=None):
+        """Feed a report file; the format follows the extension (.csv, otherwise NDJSON) unless given"""
+        fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        with open(path, encoding='utf-8', newline='') as stream:
+            self.read_stream(stream, fmt)
+
+    def serve(self, host, port, fmt='ndjson'):
+        """Accept line-delimited report feeds over TCP in a background thread; returns the bound port"""
+        ingestor = self
+
+        class FeedHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                ingestor.read_stream(io.TextIOWrapper(self.rfile, encoding='utf-8'), fmt)
+
+        self._server = socketserver.ThreadingTCPServer((host, port), FeedHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='telemetry-feed', daemon=True).start()
+        return self._server.server_address[1]
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def flush(self, timeout=5.0):
+        """Wait until every queued report has been applied; returns False on timeout"""
+        with self._lock:
+            self._not_empty.notify()
+            return self._not_full.wait_for(lambda: not self._queue and not self._applying, timeout)
+
+    @property
+    def queue_depth(self):
+        return len(self._queue)
+
+    def retry_after(self):
+        """Seconds a rejected sender should wait for the queue to drain to half full"""
+        with self._lock:
+            excess = len(self._queue) - self.max_queue // 2
+            rate = self._rate
+        if excess <= 0:
+            return 1
+        return max(1, round(excess / rate)) if rate > 0 else 1
+
+    def metrics(self):
+        with self._lock:
+            oldest = time.monotonic() - self._queue[0][0] if self._queue else 0.0
+            return dict(
+                self._counters,
+                queue_depth=len(self._queue),
+                queue_capacity=self.max_queue,
+                queue_utilization=round(len(self._queue) / self.max_queue, 3),
+                max_queue_depth=self._max_depth,
+                oldest_report_age_ms=round(oldest * 1000, 1),
+                applied_per_second=round(self._rate, 1),
+                last_batch=self._last_batch
+            )
+
+    def _ensure_running(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                # Wait for a full batch, but never hold reports longer than flush_seconds
+                self._not_empty.wait_for(lambda: len(self._queue) >= self.batch_size, self.flush_seconds)
+                if not self._queue:
+                    self._not_empty.wait()
+                    continue
+                count = min(self.batch_size, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(count)]
+                self._applying = True
+                self._not_full.notify_all()
+
+            self._apply(batch)
+
+            with self._lock:
+                self._applying = False
+                self._not_full.notify_all()
+
+    def _apply(self, batch):
+        # Later reports of a train override earlier ones, field by field
+        merged = {}
+        for _, report in batch:
+            update = merged.get(report['id'])
+            if update is None:
+                merged[report['id']] = dict(report)
+            else:
+                update.update(report)
+
+        started = time.perf_counter()
+        rejected = []
+        try:
+            diff = self.apply_fn(list(merged.values()))
+            changed, rejected, failed = len(diff['trains']), diff.get('rejected', []), False
+        except Exception:
+            logger.exception("Failed to apply a telemetry batch of %d updates", len(merged))
+            changed, failed = 0, True
+        if rejected:
+            logger.warning("Telemetry updates rejected for trains: %s", ', '.join(map(str, rejected)))
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            counters = self._counters
+            counters['batches'] += 1
+            if failed:
+                counters['apply_errors'] += 1
+            else:
+                counters['applied'] += len(batch)
+                counters['updates_applied'] += len(merged)
+                counters['trains_changed'] += changed
+                counters['updates_rejected'] += len(rejected)
+            rate = len(batch) / elapsed if elapsed > 0 else 0.0
+            self._rate = rate if not self._rate else 0.8 * self._rate + 0.2 * rate
+            self._last_batch = {
+                'reports': len(batch),
+                'updates': len(merged),
+                'trains_changed': changed,
+                'apply_ms': round(elapsed * 1000, 3),
+                'lag_ms': round((time.monotonic() - batch[0][0]) * 1000, 1)
+            }
@@ -1,77 +1,104 @@
 // RailSync AI Dashboard JavaScript with Mumbai Metro Animation
 
 let refreshInterval;
+let liveStream;
 let animationRunning = false;
 let trains = [];
 
+// Live state kept in sync by /api/stream deltas
+const liveTrains = new Map();
+const liveConflicts = new Map();
+
 // Initialize dashboard when page loads
 document.addEventListener('DOMContentLoaded', function() {
-    loadMetrics();
-    loadTrains();
-    detectConflicts();
     initializeMumbaiMetroMap();
     
-    // Auto-refresh every 30 seconds
-    refreshInterval = setInterval(() => {
+    if (window.EventSource) {
+        connectLiveStream();
+    } else {
         loadMetrics();
         loadTrains();
         detectConflicts();
-    }, 30000);
+        
+        // Auto-refresh every 30 seconds
+        refreshInterval = setInterval(() => {
+            loadMetrics();
+            loadTrains();
+            detectConflicts();
+        }, 30000);
+    }
 });
 
+// Subscribe to server-pushed snapshots and deltas
+function connectLiveStream() {
+    liveStream = new EventSource('/api/stream');
+    
+    liveStream.addEventListener('snapshot', event => {
+        const snapshot = JSON.parse(event.data);
+        
+        liveTrains.clear();
+        snapshot.trains.forEach(train => liveTrains.set(train.id, train));
+        liveConflicts.clear();
+        snapshot.conflicts.forEach(conflict => liveConflicts.set(conflict.key, conflict));
+        
+        renderMetrics(snapshot.metrics);
+        renderTrains(Array.from(liveTrains.values()));
+        renderConflicts(Array.from(liveConflicts.values()));
+    });
+    
+    liveStream.addEventListener('delta', event => {
+        const delta = JSON.parse(event.data);
+        
+        if (delta.trains) {
+            delta.trains.updated.forEach(train => liveTrains.set(train.id, train));
+            delta.trains.removed.forEach(trainId => liveTrains.delete(trainId));
+            renderTrains(Array.from(liveTrains.values()));
+        }
+        
+        if (delta.conflicts) {
+            delta.conflicts.added.forEach(conflict => liveConflicts.set(conflict.key, conflict));
+            delta.conflicts.removed.forEach(key => liveConflicts.delete(key));
+            renderConflicts(Array.from(liveConflicts.values()));
+        }
+        
+        if (delta.metrics) {
+            renderMetrics(delta.metrics);
+        }
+    });
+    
+    liveStream.onerror = error => {
+        // EventSource reconnects on its own and receives a fresh snapshot
+        console.error('Live stream interrupted:', error);
+    };
+}
+
 // Load system metrics
 async function loadMetrics() {
     try {
         const response = await fetch('/api/metrics');
         const metrics = await response.json();
-        
-        document.getElementById('total-trains').textContent = metrics.total_trains || 0;
-        document.getElementById('active-conflicts').textContent = metrics.active_conflicts || 0;
-        document.getElementById('average-delay').textContent = `${(metrics.average_delay || 0).toFixed(1)}min`;
-        document.getElementById('system-efficiency').textContent = `${metrics.system_efficiency || 0}%`;
-        document.getElementById('throughput-today').textContent = metrics.throughput_today || 0;
-        document.getElementById('ai-success-rate').textContent = `${metrics.optimization_success_rate || 0}%`;
+        renderMetrics(metrics);
         
     } catch (error) {
         console.error('Error loading metrics:', error);
     }
 }
 
+function renderMetrics(metrics) {
+    document.getElementById('total-trains').textContent = metrics.total_trains || 0;
+    document.getElementById('active-conflicts').textContent = metrics.active_conflicts || 0;
+    document.getElementById('average-delay').textContent = `${(metrics.average_delay || 0).toFixed(1)}min`;
+    document.getElementById('system-efficiency').textContent = `${metrics.system_efficiency || 0}%`;
+    document.getElementById('throughput-today').textContent = metrics.throughput_today || 0;
+    document.getElementById('ai-success-rate').textContent = `${metrics.optimization_success_rate || 0}%`;
+}
+
 // Load train data
 async function loadTrains() {
     try {
         const response = await fetch('/api/trains');
         const trains = await response.json();
-        
-        const trainList = document.getElementById('train-list');
-        trainList.innerHTML = '';
-        
-        trains.forEach(train => {
-            const statusClass = getStatusClass(train.status);
-            const trainCard = `
-                <div class="train-item mb-2 p-2 border rounded">
-                    <div class="d-flex justify-content-between">
-                        <div>
-                            <strong>${train.name}</strong>
-                            <br>
-                            <small class="text-muted">${train.current_position} â†’ ${train.destination}</small>
-                        </div>
-                        <div class="text-end">
-                            <span class="badge bg-${statusClass}">${train.status}</span>
-                            <br>
-                            <small class="text-muted">${train.delay_minutes}min delay</small>
-                        </div>
-                    </div>
-                    <div class="mt-2">
-                        <div class="progress" style="height: 5px;">
-                            <div class="progress-bar bg-info" style="width: ${(train.speed / 120) * 100}%"></div>
-                        </div>
-                        <small class="text-muted">${train.speed} km/h</small>
-                    </div>
-                </div>
-            `;
-            trainList.innerHTML += trainCard;
-        });
+        renderTrains(trains);
         
     } catch (error) {
         console.error('Error loading trains:', error);
@@ -79,39 +106,44 @@ async function loadTrains() {
     }
 }
 
+function renderTrains(trains) {
+    const trainList = document.getElementById('train-list');
+    trainList.innerHTML = '';
+    
+    trains.forEach(train => {
+        const statusClass = getStatusClass(train.status);
+        const trainCard = `
+            <div class="train-item mb-2 p-2 border rounded">
+                <div class="d-flex justify-content-between">
+                    <div>
+                        <strong>${train.name}</strong>
+                        <br>
+                        <small class="text-muted">${train.current_position} â†’ ${train.destination}</small>
+                    </div>
+                    <div class="text-end">
+                        <span class="badge bg-${statusClass}">${train.status}</span>
+                        <br>
+                        <small class="text-muted">${train.delay_minutes}min delay</small>
+                    </div>
+                </div>
+                <div class="mt-2">
+                    <div class="progress" style="height: 5px;">
+                        <div class="progress-bar bg-info" style="width: ${(train.speed / 120) * 100}%"></div>
+                    </div>
+                    <small class="text-muted">${train.speed} km/h</small>
+                </div>
+            </div>
+        `;
+        trainList.innerHTML += trainCard;
+    });
+}
+
 // Detect conflicts
 async function detectConflicts() {
     try {
         const response = await fetch('/api/conflicts');
         const conflicts = await response.json();
-        
-        const conflictList = document.getElementById('conflict-list');
-        conflictList.innerHTML = '';
-        
-        if (conflicts.length === 0) {
-            conflictList.innerHTML = '<div class="text-success text-center">No conflicts detected</div>';
-            return;
-        }
-        
-        conflicts.forEach(conflict => {
-            const severityClass = getSeverityClass(conflict.severity);
-            const conflictCard = `
-                <div class="alert alert-${severityClass} mb-2">
-                    <div class="d-flex justify-content-between">
-                        <div>
-                            <strong>${conflict.type.replace('_', ' ').toUpperCase()}</strong>
-                            <br>
-                            <small>${conflict.description}</small>
-                        </div>
-                        <div class="text-end">
-                            <span class="badge bg-${severityClass}">${conflict.severity}</span>
-                            ${conflict.estimated_time ? `<br><small>${conflict.estimated_time} min</small>` : ''}
-                        </div>
-                    </div>
-                </div>
-            `;
-            conflictList.innerHTML += conflictCard;
-        });
+        renderConflicts(conflicts);
         
     } catch (error) {
         console.error('Error detecting conflicts:', error);
@@ -119,6 +151,36 @@ async function detectConflicts() {
     }
 }
 
+function renderConflicts(conflicts) {
+    const conflictList = document.getElementById('conflict-list');
+    conflictList.innerHTML = '';
+    
+    if (conflicts.length === 0) {
+        conflictList.innerHTML = '<div class="text-success text-center">No conflicts detected</div>';
+        return;
+    }
+    
+    conflicts.forEach(conflict => {
+        const severityClass = getSeverityClass(conflict.severity);
+        const conflictCard = `
+            <div class="alert alert-${severityClass} mb-2">
+                <div class="d-flex justify-content-between">
+                    <div>
+                        <strong>${conflict.type.replace('_', ' ').toUpperCase()}</strong>
+                        <br>
+                        <small>${conflict.description}</small>
+                    </div>
+                    <div class="text-end">
+                        <span class="badge bg-${severityClass}">${conflict.severity}</span>
+                        ${conflict.estimated_time ? `<br><small>${conflict.estimated_time} min</small>` : ''}
+                    </div>
+                </div>
+            </div>
+        `;
+        conflictList.innerHTML += conflictCard;
+    });
+}
+
 // Run AI optimization
 async function runOptimization() {
     const button = event.target;
@@ -0,0 +1,22 @@
+import numpy as np
+
+from data.synthetic_data import generate_synthetic_data
+from models import GeneticOptimizer, IncrementalConflictDetector
+
+def test_front_survives_on_a_fleet_without_a_conflict_free_schedule():
+    trains, stations, track_sections = generate_synthetic_data(400, seed=0)[:3]
+    conflicts = IncrementalConflictDetector().detect_conflicts(trains, track_sections)
+    optimizer = GeneticOptimizer(population_size=40, generations=20, seed=0)
+
+    solutions = optimizer.optimize_pareto(trains, track_sections, conflicts, stations=stations, max_solutions=10)
+
+    penalties = [solution['objectives']['conflict_penalty'] for solution in solutions]
+    assert min(penalties) > 0  # the fleet is too busy for any genome to clear every conflict
+    assert optimizer.last_run_stats['front_size'] > 1
+    assert len(solutions) == 10
+
+    # A real trade-off: no returned schedule is best on every objective
+    objectives = np.array([[solution['objectives']['weighted_delay'], -solution['objectives']['weighted_throughput'],
+                            solution['objectives']['conflict_penalty']] for solution in solutions])
+    best = objectives.min(axis=0)
+    assert not any((row == best).all() for row in objectives)
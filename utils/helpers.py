@@ -5,6 +5,7 @@ Helper functions for RailSync AI system
 import random
 import string
 import math
+import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 
@@ -139,23 +140,30 @@ def get_train_type(train_name: str) -> str:
     else:
         return 'Passenger'
 
+# Base fuel consumption rates (liters per km) per train type
+FUEL_CONSUMPTION_RATES = {
+    'Freight': 3.5,
+    'Express': 2.8,
+    'Rajdhani': 2.5,
+    'Shatabdi': 2.2,
+    'Vande Bharat': 1.8,
+    'Local': 2.0,
+    'Passenger': 2.5
+}
+DEFAULT_FUEL_CONSUMPTION_RATE = 2.5
+
 def estimate_fuel_consumption(distance_km: float, speed_kmh: float, train_type: str) -> float:
     """Estimate fuel consumption in liters"""
-    # Base consumption rates (liters per km)
-    consumption_rates = {
-        'Freight': 3.5,
-        'Express': 2.8,
-        'Rajdhani': 2.5,
-        'Shatabdi': 2.2,
-        'Vande Bharat': 1.8,
-        'Local': 2.0,
-        'Passenger': 2.5
-    }
-    
-    base_rate = consumption_rates.get(train_type, 2.5)
+    base_rate = FUEL_CONSUMPTION_RATES.get(train_type, DEFAULT_FUEL_CONSUMPTION_RATE)
     
     # Speed factor (higher speed = more consumption)
     speed_factor = 1.0 + (speed_kmh - 80) * 0.01
     speed_factor = clamp(speed_factor, 0.8, 1.5)
     
-    return distance_km * base_rate * speed_factor
\ No newline at end of file
+    return distance_km * base_rate * speed_factor
+
+def estimate_fuel_consumption_array(distance_km: np.ndarray, speed_kmh: np.ndarray,
+                                    base_rates: np.ndarray) -> np.ndarray:
+    """Vectorized estimate_fuel_consumption over broadcastable arrays (base_rates in liters per km)"""
+    speed_factor = np.clip(1.0 + (np.asarray(speed_kmh) - 80) * 0.01, 0.8, 1.5)
+    return np.asarray(distance_km) * base_rates * speed_factor
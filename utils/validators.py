@@ -3,9 +3,19 @@ Data validation utilities for RailSync AI
 """
 
 import re
-from typing import Dict, List, Any, Optional
+from operator import itemgetter, not_
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Union
 from datetime import datetime
 
+import numpy as np
+
+TRAIN_ID_PATTERN = re.compile(r'^TRN\d{3}$')
+STATION_ID_PATTERN = re.compile(r'^STN\d{3}$')
+TRACK_ID_PATTERN = re.compile(r'^TRK\d{3}$')
+
+# Delays are whole minutes held in the fleet store's int16 column
+MAX_DELAY_MINUTES = 32767
+
 def validate_train_data(train_data: Dict) -> tuple[bool, List[str]]:
     """Validate train data structure and values"""
     errors = []
@@ -18,7 +28,7 @@ def validate_train_data(train_data: Dict) -> tuple[bool, List[str]]:
     
     # Validate train ID format
     train_id = train_data.get('id', '')
-    if train_id and not re.match(r'^TRN\d{3}$', train_id):
+    if train_id and not TRAIN_ID_PATTERN.match(train_id):
         errors.append("Train ID must be in format TRN### (e.g., TRN001)")
     
     # Validate speed
@@ -33,11 +43,60 @@ def validate_train_data(train_data: Dict) -> tuple[bool, List[str]]:
     
     # Validate delay
     delay = train_data.get('delay_minutes', 0)
-    if not isinstance(delay, (int, float)) or delay < 0:
-        errors.append("Delay must be a non-negative number")
+    if not isinstance(delay, int) or delay < 0 or delay > MAX_DELAY_MINUTES:
+        errors.append(f"Delay must be a whole number of minutes between 0 and {MAX_DELAY_MINUTES}")
     
     return len(errors) == 0, errors
 
+# Live train fields a position report may update
+POSITION_REPORT_FIELDS = frozenset({'current_position', 'destination', 'speed', 'delay_minutes', 'status', 'priority'})
+
+def validate_position_report(report: Dict) -> tuple[bool, List[str]]:
+    """Validate a position report: a train id plus any of the live train fields.
+
+    Reports carry only what changed, so the fields are checked with the
+    rules of validate_train_data only where present. The common all-valid
+    report is accepted after a few type checks without building messages.
+    """
+    if not isinstance(report, dict):
+        return False, ["Report must be a JSON object"]
+
+    train_id = report.get('id')
+    speed = report.get('speed', 0)
+    priority = report.get('priority', 1)
+    delay = report.get('delay_minutes', 0)
+    if (isinstance(train_id, str) and train_id and POSITION_REPORT_FIELDS.issuperset(report.keys() - {'id'})
+            and type(speed) in (int, float) and 0 <= speed <= 200
+            and type(priority) is int and 1 <= priority <= 5
+            and type(delay) is int and 0 <= delay <= MAX_DELAY_MINUTES
+            and all(isinstance(report.get(field, 'x'), str) and report.get(field, 'x')
+                    for field in ('current_position', 'destination', 'status'))):
+        return True, []
+
+    errors = []
+    if not train_id or not isinstance(train_id, str):
+        errors.append("Missing required field: id")
+
+    unknown = sorted(report.keys() - POSITION_REPORT_FIELDS - {'id'})
+    if unknown:
+        errors.append(f"Unknown fields: {', '.join(unknown)}")
+
+    for field in ('current_position', 'destination', 'status'):
+        if field in report and not (isinstance(report[field], str) and report[field]):
+            errors.append(f"Field '{field}' cannot be empty")
+
+    # Negated comparisons so that NaN is rejected too
+    if type(speed) not in (int, float) or not 0 <= speed <= 200:
+        errors.append("Speed must be between 0 and 200 km/h")
+
+    if type(priority) is not int or not 1 <= priority <= 5:
+        errors.append("Priority must be an integer between 1 and 5")
+
+    if type(delay) is not int or not 0 <= delay <= MAX_DELAY_MINUTES:
+        errors.append(f"Delay must be a whole number of minutes between 0 and {MAX_DELAY_MINUTES}")
+
+    return len(errors) == 0, errors
+
 def validate_station_data(station_data: Dict) -> tuple[bool, List[str]]:
     """Validate station data structure and values"""
     errors = []
@@ -50,7 +109,7 @@ def validate_station_data(station_data: Dict) -> tuple[bool, List[str]]:
     
     # Validate station ID format
     station_id = station_data.get('id', '')
-    if station_id and not re.match(r'^STN\d{3}$', station_id):
+    if station_id and not STATION_ID_PATTERN.match(station_id):
         errors.append("Station ID must be in format STN### (e.g., STN001)")
     
     # Validate platforms
@@ -72,7 +131,7 @@ def validate_track_section_data(track_data: Dict) -> tuple[bool, List[str]]:
     
     # Validate track ID format
     track_id = track_data.get('id', '')
-    if track_id and not re.match(r'^TRK\d{3}$', track_id):
+    if track_id and not TRACK_ID_PATTERN.match(track_id):
         errors.append("Track ID must be in format TRK### (e.g., TRK001)")
     
     # Validate capacity
@@ -88,6 +147,225 @@ def validate_track_section_data(track_data: Dict) -> tuple[bool, List[str]]:
     
     return len(errors) == 0, errors
 
+# Batch validation: the same rules as the validate_*_data functions, applied column by column.
+# Errors come back as a compact index of (row, field, code) tuples; ERROR_MESSAGES turns them into text.
+
+ERROR_MISSING = 'missing'
+ERROR_FORMAT = 'format'
+ERROR_RANGE = 'range'
+ERROR_UNKNOWN = 'unknown'
+ERROR_SAME_STATION = 'same_station'
+
+ERROR_MESSAGES = {
+    ('id', ERROR_FORMAT): "ID must match the format of its kind (TRN###, STN###, TRK###)",
+    ('speed', ERROR_RANGE): "Speed must be between 0 and 200 km/h",
+    ('priority', ERROR_RANGE): "Priority must be an integer between 1 and 5",
+    ('delay_minutes', ERROR_RANGE): f"Delay must be a whole number of minutes between 0 and {MAX_DELAY_MINUTES}",
+    ('platforms', ERROR_RANGE): "Platforms must be between 1 and 20",
+    ('capacity', ERROR_RANGE): "Track capacity must be between 1 and 10",
+    ('end_station', ERROR_SAME_STATION): "Start and end stations must be different"
+}
+
+BatchPayload = Union[Sequence[Dict], Dict[str, Sequence]]
+BatchErrors = List[Tuple[int, str, str]]
+
+_ABSENT = object()  # field left out of a record, as opposed to given as None
+
+def _columns(payload: BatchPayload, fields: Sequence[str]) -> tuple[int, Dict[str, list]]:
+    """Row count and one list per field from a list of records or a dict of columns (absent -> _ABSENT)"""
+    if isinstance(payload, dict):
+        lengths = {len(column) for column in payload.values()}
+        if len(lengths) > 1:
+            raise ValueError("Columns of a batch must have the same length")
+        size = lengths.pop() if lengths else 0
+        return size, {field: list(payload[field]) if field in payload else [_ABSENT] * size for field in fields}
+
+    size = len(payload)
+    columns = {}
+
+    # Fields of the first record are usually in every record and can be read without per-row checks
+    first = payload[0] if size and isinstance(payload[0], dict) else {}
+    present = set(fields)
+    if not present.issubset(first):
+        try:
+            present = set().union(*payload)  # only a hint: fields outside it are in no record
+        except TypeError:
+            pass
+
+    for field in fields:
+        if field not in present:
+            columns[field] = [_ABSENT] * size
+            continue
+        if field in first:
+            try:
+                columns[field] = list(map(itemgetter(field), payload))
+                continue
+            except (KeyError, TypeError):
+                pass
+        columns[field] = [record.get(field, _ABSENT) if isinstance(record, dict) else _ABSENT
+                          for record in payload]
+    return size, columns
+
+class _BatchErrorIndex:
+    """Collects error rows per (field, code) as arrays and merges them in row order"""
+
+    def __init__(self):
+        self._parts = []
+
+    def add(self, mask: np.ndarray, field: str, code: str) -> None:
+        self.add_rows(np.flatnonzero(mask), field, code)
+
+    def add_rows(self, rows: np.ndarray, field: str, code: str) -> None:
+        if len(rows):
+            self._parts.append((np.asarray(rows), field, code))
+
+    def result(self) -> BatchErrors:
+        errors = [(int(row), field, code) for rows, field, code in self._parts for row in rows.tolist()]
+        errors.sort(key=lambda error: error[0])  # stable: fields keep their check order within a row
+        return errors
+
+def _check_required(errors: _BatchErrorIndex, columns: Dict[str, list], fields: Sequence[str]) -> None:
+    for field in fields:
+        values = columns[field]
+        if _ABSENT in values:
+            missing = np.fromiter((value is _ABSENT or not value for value in values), bool, len(values))
+        else:
+            missing = np.fromiter(map(not_, values), bool, len(values))
+        errors.add(missing, field, ERROR_MISSING)
+
+def _check_pattern(errors: _BatchErrorIndex, values: list, pattern: re.Pattern) -> None:
+    """Flag present, non-empty ids that do not match the compiled pattern"""
+    match = pattern.match
+    if set(map(type, values)) == {str}:
+        bad = np.fromiter(map(not_, map(match, values)), bool, len(values))
+        bad &= np.fromiter(map(bool, values), bool, len(values))
+    else:
+        bad = np.fromiter((value is not _ABSENT and bool(value) and
+                           not (isinstance(value, str) and match(value)) for value in values), bool, len(values))
+    errors.add(bad, 'id', ERROR_FORMAT)
+
+def _check_range(errors: _BatchErrorIndex, values: list, field: str, low: float, high: float,
+                 default: float, integer: bool = False, optional: bool = False, allow_bool: bool = True) -> None:
+    """Flag values that are not numbers (integers if integer) in [low, high]; NaN is out of range.
+
+    Absent values take the default, or are skipped when optional. Homogeneous
+    numeric columns are checked as one array; mixed columns fall back to a
+    per-value type check first.
+    """
+    size = len(values)
+    present = None
+    if _ABSENT in values:
+        if optional:
+            present = np.fromiter((value is not _ABSENT for value in values), bool, size)
+        filler = 0 if optional else default
+        values = [filler if value is _ABSENT else value for value in values]
+
+    # NumPy folds bools into int arrays, so they need their own pass when not allowed
+    has_bool = not allow_bool and bool in set(map(type, values))
+    try:
+        array = np.asarray(values) if size else np.zeros(0)
+    except (ValueError, TypeError):
+        # Ragged lists or other containers among the values: not a numeric column
+        array = np.empty(size, dtype=object)
+    if not has_bool and array.ndim == 1 and (array.dtype.kind in 'biu' or (array.dtype.kind == 'f' and not integer)):
+        numbers = array.astype(np.float64)
+        bad = np.zeros(size, dtype=bool)
+    else:
+        kinds = int if integer else (int, float)
+        valid_type = np.fromiter((isinstance(value, kinds) and (allow_bool or type(value) is not bool)
+                                  for value in values), bool, size)
+        numbers = np.array([value if ok else 0 for value, ok in zip(values, valid_type)], dtype=np.float64)
+        bad = ~valid_type
+
+    with np.errstate(invalid='ignore'):
+        bad |= ~((numbers >= low) & (numbers <= high))
+    if present is not None:
+        bad &= present
+    errors.add(bad, field, ERROR_RANGE)
+
+def validate_train_batch(trains: BatchPayload) -> BatchErrors:
+    """Validate many train records at once, with the rules of validate_train_data"""
+    size, columns = _columns(trains, ('id', 'name', 'current_position', 'destination',
+                                      'speed', 'priority', 'delay_minutes'))
+    errors = _BatchErrorIndex()
+    _check_required(errors, columns, ('id', 'name', 'current_position', 'destination'))
+    _check_pattern(errors, columns['id'], TRAIN_ID_PATTERN)
+    _check_range(errors, columns['speed'], 'speed', 0, 200, default=0)
+    _check_range(errors, columns['priority'], 'priority', 1, 5, default=1, integer=True)
+    _check_range(errors, columns['delay_minutes'], 'delay_minutes', 0, MAX_DELAY_MINUTES, default=0, integer=True)
+    return errors.result()
+
+def validate_station_batch(stations: BatchPayload) -> BatchErrors:
+    """Validate many station records at once, with the rules of validate_station_data"""
+    size, columns = _columns(stations, ('id', 'name', 'platforms'))
+    errors = _BatchErrorIndex()
+    _check_required(errors, columns, ('id', 'name'))
+    _check_pattern(errors, columns['id'], STATION_ID_PATTERN)
+    _check_range(errors, columns['platforms'], 'platforms', 1, 20, default=4, integer=True)
+    return errors.result()
+
+def validate_track_section_batch(sections: BatchPayload) -> BatchErrors:
+    """Validate many track section records at once, with the rules of validate_track_section_data"""
+    size, columns = _columns(sections, ('id', 'name', 'start_station', 'end_station', 'capacity'))
+    errors = _BatchErrorIndex()
+    _check_required(errors, columns, ('id', 'name', 'start_station', 'end_station'))
+    _check_pattern(errors, columns['id'], TRACK_ID_PATTERN)
+    _check_range(errors, columns['capacity'], 'capacity', 1, 10, default=2, integer=True)
+    errors.add(np.fromiter((start is not _ABSENT and bool(start) and start == end
+                            for start, end in zip(columns['start_station'], columns['end_station'])), bool, size),
+               'end_station', ERROR_SAME_STATION)
+    return errors.result()
+
+def validate_position_report_batch(reports: BatchPayload) -> BatchErrors:
+    """Validate many position reports at once, with the rules of validate_position_report"""
+    size, columns = _columns(reports, ('id', 'current_position', 'destination', 'status',
+                                       'speed', 'priority', 'delay_minutes'))
+    errors = _BatchErrorIndex()
+    _check_required(errors, columns, ('id',))
+    errors.add(np.fromiter((bool(value) and value is not _ABSENT and not isinstance(value, str)
+                            for value in columns['id']), bool, size), 'id', ERROR_FORMAT)
+
+    if isinstance(reports, dict):
+        unknown = sorted(set(reports) - POSITION_REPORT_FIELDS - {'id'})
+        for field in unknown:
+            errors.add(np.ones(size, dtype=bool), field, ERROR_UNKNOWN)
+    else:
+        allowed = POSITION_REPORT_FIELDS | {'id'}
+        errors.add_rows([row for row, report in enumerate(reports) if not isinstance(report, dict)],
+                        'report', ERROR_FORMAT)
+        unknown = {}
+        for row, report in enumerate(reports):
+            if isinstance(report, dict) and not allowed.issuperset(report):
+                for field in sorted(report.keys() - allowed):
+                    unknown.setdefault(field, []).append(row)
+        for field, rows in sorted(unknown.items()):
+            errors.add_rows(rows, field, ERROR_UNKNOWN)
+
+    for field in ('current_position', 'destination', 'status'):
+        errors.add(np.fromiter((value is not _ABSENT and not (isinstance(value, str) and value)
+                                for value in columns[field]), bool, size), field, ERROR_MISSING)
+    _check_range(errors, columns['speed'], 'speed', 0, 200, default=0, optional=True, allow_bool=False)
+    _check_range(errors, columns['priority'], 'priority', 1, 5, default=1, integer=True, optional=True,
+                 allow_bool=False)
+    _check_range(errors, columns['delay_minutes'], 'delay_minutes', 0, MAX_DELAY_MINUTES, default=0, integer=True,
+                 optional=True, allow_bool=False)
+    return errors.result()
+
+def describe_batch_errors(errors: BatchErrors) -> Dict[int, List[str]]:
+    """Messages per row for an error index, worded like the single-record validators"""
+    described = {}
+    for row, field, code in errors:
+        if field == 'report':
+            message = "Report must be a JSON object"
+        elif code == ERROR_MISSING:
+            message = f"Missing required field: {field}"
+        elif code == ERROR_UNKNOWN:
+            message = f"Unknown field: {field}"
+        else:
+            message = ERROR_MESSAGES.get((field, code), f"Invalid value for {field}")
+        described.setdefault(row, []).append(message)
+    return described
+
 def validate_optimization_parameters(params: Dict) -> tuple[bool, List[str]]:
     """Validate genetic algorithm parameters"""
     errors = []